@@ -0,0 +1,77 @@
+"""
+Rebuild the chapter similarity index from the chapters in the database
+
+Every chapter with extracted content is embedded, in batches, into a fresh
+index. Needed after changing SIMILARITY_EMBEDDER or SIMILARITY_DIM and for
+chapters saved before the index existed; afterwards save_book_data keeps it up
+to date. Chapters not extracted yet (lazy ingestion) are indexed on first
+lookup.
+
+Usage:
+    python -m backend.cli.build_similarity_index [--batch-size 256]
+"""
+
+import argparse
+import shutil
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.controllers.similarity_controller import SimilarityController
+from backend.core.compression import decompress_text
+from backend.database import SessionLocal
+from backend.models.book import Chapter
+
+
+def build_index(db: Session, batch_size: int = 256) -> int:
+    """
+    Embed every chapter with content into an empty index
+
+    Args:
+        db: Database session
+        batch_size: Chapters read and embedded at a time
+
+    Returns:
+        Number of chapters indexed
+    """
+    # Start over, also when the stored index came from another embedder
+    shutil.rmtree(SimilarityController.INDEX_DIR, ignore_errors=True)
+    query = select(Chapter.id, Chapter.content, Chapter.content_compressed).where(
+        Chapter.content.is_not(None) | Chapter.content_compressed.is_not(None)
+    )
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            query.where(Chapter.id > last_id).order_by(Chapter.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return indexed
+        SimilarityController.index_chapters(
+            [chapter_id for chapter_id, _, _ in rows],
+            [
+                decompress_text(compressed) if compressed is not None else content
+                for _, content, compressed in rows
+            ],
+        )
+        indexed += len(rows)
+        last_id = rows[-1][0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        indexed = build_index(db, args.batch_size)
+    print(
+        f"Indexed {indexed} chapters in {time.perf_counter() - start:.1f}s "
+        f"into {SimilarityController.INDEX_DIR}"
+    )
+
+
+if __name__ == "__main__":
+    main()
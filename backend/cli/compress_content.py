@@ -0,0 +1,116 @@
+"""
+Convert stored chapter content between plain text and zlib-compressed storage
+
+Rows are converted in batches, one transaction per batch, and only rows still
+in the source format are selected, so an interrupted run can simply be
+restarted. Set CHAPTER_CONTENT_COMPRESSION to match, so new chapters are
+stored the same way.
+
+Usage:
+    python -m backend.cli.compress_content [--decompress] [--book-id ID]
+        [--batch-size 200]
+"""
+
+import argparse
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from backend.core.compression import ZLIB_LEVEL, compress_text, decompress_text
+from backend.database import SessionLocal
+from backend.models.book import Chapter
+
+
+def convert_content(
+    db: Session,
+    decompress: bool = False,
+    batch_size: int = 200,
+    level: int = ZLIB_LEVEL,
+    book_id: int | None = None,
+) -> dict[str, int]:
+    """
+    Compress plain chapter content, or decompress compressed content
+
+    Args:
+        db: Database session
+        decompress: Convert compressed rows back to plain text
+        batch_size: Chapters per transaction
+        level: zlib compression level
+        book_id: Only convert this book's chapters
+
+    Returns:
+        Dict with the number of chapters converted and their text and
+        compressed sizes in bytes
+    """
+    source = Chapter.content_compressed if decompress else Chapter.content
+    stats = {"chapters": 0, "text_bytes": 0, "compressed_bytes": 0}
+    query = select(Chapter.id, source).where(source.is_not(None))
+    if book_id is not None:
+        query = query.where(Chapter.book_id == book_id)
+    last_id = 0
+    while True:
+        rows = db.execute(
+            query.where(Chapter.id > last_id).order_by(Chapter.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return stats
+
+        updates = []
+        for chapter_id, value in rows:
+            if decompress:
+                text, compressed = decompress_text(value), value
+                updates.append(
+                    {"id": chapter_id, "content": text, "content_compressed": None}
+                )
+            else:
+                text, compressed = value, compress_text(value, level)
+                updates.append(
+                    {
+                        "id": chapter_id,
+                        "content": None,
+                        "content_compressed": compressed,
+                    }
+                )
+            stats["text_bytes"] += len(text.encode("utf-8"))
+            stats["compressed_bytes"] += len(compressed)
+
+        # Bulk UPDATE by primary key, executed as one executemany
+        db.execute(update(Chapter), updates)
+        db.commit()
+        stats["chapters"] += len(rows)
+        last_id = rows[-1].id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--decompress",
+        action="store_true",
+        help="convert compressed content back to plain text",
+    )
+    parser.add_argument("--book-id", type=int, help="only convert this book")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--level", type=int, default=ZLIB_LEVEL, help="zlib level")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        stats = convert_content(
+            db, args.decompress, args.batch_size, args.level, args.book_id
+        )
+    elapsed = time.perf_counter() - start
+
+    ratio = (
+        stats["compressed_bytes"] / stats["text_bytes"] if stats["text_bytes"] else 0
+    )
+    print(
+        f"{'Decompressed' if args.decompress else 'Compressed'} "
+        f"{stats['chapters']} chapters in {elapsed:.1f}s: "
+        f"{stats['text_bytes']} text bytes, {stats['compressed_bytes']} compressed "
+        f"bytes (ratio {ratio:.2f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Import a directory of books in bulk, without going through /upload
+
+Every file in a supported format (EPUB, PDF, HTML, plain text) is imported.
+
+Books are hashed and parsed in a process pool and written through the Book and
+Chapter models, several books per transaction. Files whose SHA-256 is already
+in the books table are skipped before parsing, so an interrupted import can
+simply be run again.
+
+Usage:
+    python -m backend.cli.import_library LIBRARY_DIR [--workers N]
+        [--batch-size 50] [--lazy] [--copy]
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.controllers.similarity_controller import SimilarityController
+from backend.controllers.upload_controller import UploadController
+from backend.core.epub_toc import SpineItem, read_spine
+from backend.core.timing import StageTimer
+from backend.database import SessionLocal
+from backend.models.book import Book
+from backend.parsers.base import ParsedChapter
+from backend.parsers.registry import parser_for, supported_extensions
+
+HASH_CHUNK_SIZE = 1024 * 1024
+PROGRESS_EVERY = 500  # files
+# Longer paths do not fit books.file_path
+FILE_PATH_LENGTH = Book.__table__.c.file_path.type.length
+
+# Hashes already imported when the run started, set in each worker process
+_known_hashes: frozenset[str] = frozenset()
+
+
+class ParsedBook(NamedTuple):
+    """Result of hashing and parsing one file in a worker process"""
+
+    path: Path
+    content_hash: str | None
+    # (title, content) pairs, or the spine in lazy mode; None when skipped
+    chapters: list[ParsedChapter] | list[SpineItem] | None
+    timings: dict[str, float]
+    error: str | None = None
+    # Registered from the table of contents; only EPUBs have one
+    lazy: bool = False
+
+
+def _init_worker(known_hashes: frozenset[str]) -> None:
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_book(path: Path, lazy: bool) -> ParsedBook:
+    """
+    Process pool entry point: hash a file and, unless already imported, parse it
+
+    Errors are returned rather than raised so one bad file does not stop the run.
+    """
+    timer = StageTimer()
+    content_hash = None
+    try:
+        with timer.stage("hash"):
+            content_hash = file_sha256(path)
+        if content_hash in _known_hashes:
+            return ParsedBook(path, content_hash, None, timer.timings)
+        lazy = lazy and parser_for(path.name).supports_lazy
+        with timer.stage("parse"):
+            chapters = (
+                read_spine(path)
+                if lazy
+                else list(UploadController.extract_chapters(path, parallel=False))
+            )
+        return ParsedBook(path, content_hash, chapters, timer.timings, lazy=lazy)
+    except Exception as e:
+        return ParsedBook(path, content_hash, None, timer.timings, f"{e!r}")
+
+
+class LibraryImporter:
+    """Walks a directory and imports every book not already in the database"""
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        batch_size: int = 50,
+        lazy: bool = False,
+        copy: bool = False,
+    ) -> None:
+        """
+        Args:
+            workers: Parser processes; defaults to the number of CPUs
+            batch_size: Books written per transaction
+            lazy: Register EPUB chapters from the table of contents only; the
+                API extracts their content on first read or in its backfill
+            copy: Copy files into the content-addressed upload store instead of
+                referencing them where they are
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.lazy = lazy
+        self.copy = copy
+        self.counts: Counter[str] = Counter()
+        # Stage totals in ms; hash and parse are summed across workers
+        self.stage_ms: Counter[str] = Counter()
+        self.failures: list[tuple[Path, str]] = []
+        self._seen_hashes: set[str] = set()
+        self._pending: list[ParsedBook] = []
+        self._next_progress = PROGRESS_EVERY
+
+    @staticmethod
+    def find_books(library_dir: Path) -> list[Path]:
+        extensions = set(supported_extensions())
+        return sorted(
+            path
+            for path in library_dir.rglob("*")
+            if path.suffix.lower() in extensions and path.is_file()
+        )
+
+    def run(self, library_dir: Path) -> None:
+        paths = self.find_books(library_dir)
+        self.counts["found"] = len(paths)
+        with SessionLocal() as db:
+            known_hashes = frozenset(
+                db.scalars(
+                    select(Book.content_hash).where(Book.content_hash.is_not(None))
+                )
+            )
+        self._seen_hashes.update(known_hashes)
+        print(
+            f"Found {len(paths)} book files, {len(known_hashes)} books already "
+            f"imported; parsing with {self.workers} processes"
+        )
+
+        start = time.perf_counter()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(known_hashes,),
+        )
+        with executor, SessionLocal() as db:
+            # Bound the parsed books held in memory while the writer catches up
+            max_in_flight = self.workers * 4
+            in_flight: set[Future[ParsedBook]] = set()
+            remaining = iter(paths)
+            while True:
+                for path in remaining:
+                    in_flight.add(executor.submit(parse_book, path, self.lazy))
+                    if len(in_flight) >= max_in_flight:
+                        break
+                if not in_flight:
+                    break
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(future.result(), db)
+                self._report_progress(start)
+            self._flush(db)
+
+        self._report(time.perf_counter() - start)
+
+    def _collect(self, parsed: ParsedBook, db: Session) -> None:
+        self.stage_ms.update(parsed.timings)
+        if parsed.error is not None:
+            self.counts["failed"] += 1
+            self.failures.append((parsed.path, parsed.error))
+            return
+        # Known before the run, or a duplicate file earlier in this run
+        if parsed.chapters is None or parsed.content_hash in self._seen_hashes:
+            self.counts["skipped"] += 1
+            return
+
+        # Caught before the batch is written, which would fail as a whole
+        if not self.copy and len(str(parsed.path.resolve())) > FILE_PATH_LENGTH:
+            self.counts["failed"] += 1
+            error = f"path is longer than {FILE_PATH_LENGTH} characters; use --copy"
+            self.failures.append((parsed.path, error))
+            return
+
+        self._seen_hashes.add(parsed.content_hash)
+        self._pending.append(parsed)
+        if len(self._pending) >= self.batch_size:
+            self._flush(db)
+
+    def _store_file(self, parsed: ParsedBook) -> Path:
+        if not self.copy:
+            return parsed.path.resolve()
+        file_path = UploadController.blob_path(
+            parsed.content_hash, parsed.path.suffix.lower()
+        )
+        if not file_path.exists():
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(parsed.path, file_path)
+        return file_path
+
+    def _save(self, parsed: ParsedBook, db: Session) -> None:
+        file_path = self._store_file(parsed)
+        if parsed.lazy:
+            UploadController.save_book_toc(
+                parsed.path.name,
+                parsed.chapters,
+                db,
+                file_path=file_path,
+                content_hash=parsed.content_hash,
+                commit=False,
+            )
+            return
+        UploadController.save_book_data(
+            parsed.path.name,
+            parsed.chapters,
+            db,
+            file_path=file_path,
+            content_hash=parsed.content_hash,
+            commit=False,
+            index=SimilarityController.INDEX_ON_SAVE,
+        )
+
+    def _flush(self, db: Session) -> None:
+        """Write the pending books in one transaction, one by one on failure"""
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        try:
+            for parsed in batch:
+                self._save(parsed, db)
+            db.commit()
+            self._count_imported(batch)
+        except Exception:
+            # Usually another importer or an upload added one of these books
+            # meanwhile; writing them one by one records whichever one failed
+            db.rollback()
+            for parsed in batch:
+                try:
+                    self._save(parsed, db)
+                    db.commit()
+                    self._count_imported([parsed])
+                except IntegrityError:
+                    db.rollback()
+                    self.counts["skipped"] += 1
+                except Exception as e:
+                    db.rollback()
+                    self.counts["failed"] += 1
+                    self.failures.append((parsed.path, f"{e!r}"))
+        finally:
+            self.stage_ms["persist"] += (time.perf_counter() - started) * 1000
+
+    def _count_imported(self, batch: list[ParsedBook]) -> None:
+        self.counts["imported"] += len(batch)
+        self.counts["chapters"] += sum(len(parsed.chapters) for parsed in batch)
+
+    def _report_progress(self, start: float) -> None:
+        processed = sum(self.counts[key] for key in ("skipped", "failed")) + (
+            self.counts["imported"] + len(self._pending)
+        )
+        if processed >= self._next_progress:
+            self._next_progress += PROGRESS_EVERY
+            elapsed = time.perf_counter() - start
+            print(
+                f"{processed}/{self.counts['found']} files "
+                f"({processed / elapsed:.1f}/s), {self.counts['failed']} failed"
+            )
+
+    def _report(self, elapsed: float) -> None:
+        imported = self.counts["imported"]
+        print(
+            f"Imported {imported} books ({self.counts['chapters']} chapters) in "
+            f"{elapsed:.1f}s, {imported / elapsed if elapsed else 0:.1f} books/s; "
+            f"{self.counts['skipped']} skipped, {self.counts['failed']} failed"
+        )
+        stages = ", ".join(
+            f"{name} {ms / 1000:.1f}s" for name, ms in self.stage_ms.items()
+        )
+        print(f"Stage totals (hash and parse summed over workers): {stages}")
+        for path, error in self.failures:
+            print(f"FAILED {path}: {error}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("library_dir", type=Path)
+    parser.add_argument("--workers", type=int, help="parser processes (default: CPUs)")
+    parser.add_argument("--batch-size", type=int, default=50, help="books per commit")
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="only read tables of contents; the API extracts chapters later",
+    )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="copy files into the upload store instead of referencing them in place",
+    )
+    args = parser.parse_args()
+
+    importer = LibraryImporter(args.workers, args.batch_size, args.lazy, args.copy)
+    importer.run(args.library_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+import asyncio
+import logging
+import os
+from collections.abc import AsyncIterator
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import Select, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from backend.core.cache import LRUCache
+from backend.core.compression import decompress_text
+from backend.core.http_cache import (
+    CachedResponse,
+    conditional_response,
+    has_validators,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+from backend.database import AsyncSessionLocal, read_session, reads_primary
+from backend.models.book import Book, Chapter, content_params, content_values
+from backend.schemas import ChapterContentResponse, ChapterResponse
+
+from .similarity_controller import SimilarityController
+from .upload_controller import UploadController
+
+logger = logging.getLogger(__name__)
+
+
+class ChapterController:
+    """Controller for reading chapter content"""
+
+    STREAM_CHUNK_SIZE = 64 * 1024  # characters
+    # Chapters extracted per archive open and transaction during a backfill
+    BACKFILL_BATCH_SIZE = int(os.getenv("LAZY_BACKFILL_BATCH_SIZE", "16"))
+
+    _backfills: dict[int, asyncio.Task] = {}
+    # Serialized read responses, keyed by ("content", chapter_id, offset, limit)
+    # or ("chapters", book_id). Disabled by default: entries are only
+    # invalidated in the process that changes a chapter, so with several
+    # workers a summary can be up to RESPONSE_CACHE_TTL seconds stale elsewhere
+    response_cache: LRUCache[CachedResponse] = LRUCache(
+        int(os.getenv("RESPONSE_CACHE_SIZE", "0")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "30")),
+    )
+    _chapter_list_adapter = TypeAdapter(list[ChapterResponse])
+
+    @classmethod
+    def invalidate_responses(
+        cls, chapter_id: int | None = None, book_id: int | None = None
+    ) -> None:
+        """Drop cached responses of a chapter's content and of a book's chapter list"""
+        for key in cls.response_cache.keys():
+            kind, resource_id = key[:2]
+            if (kind == "content" and resource_id == chapter_id) or (
+                kind == "chapters" and resource_id == book_id
+            ):
+                cls.response_cache.pop(key)
+
+    @staticmethod
+    def _pending_chapters() -> Select:
+        """Chapters registered from the TOC whose content is not extracted yet"""
+        return (
+            select(Chapter.id, Chapter.book_id, Chapter.source_href, Book.file_path)
+            .join(Book, Chapter.book_id == Book.id)
+            .where(
+                Chapter.content.is_(None),
+                Chapter.content_compressed.is_(None),
+                Chapter.source_href.is_not(None),
+            )
+        )
+
+    @staticmethod
+    async def _extract(file_path: str, hrefs: list[str]) -> list[str]:
+        return await asyncio.get_running_loop().run_in_executor(
+            UploadController.get_parse_executor(),
+            UploadController.extract_chapter_texts,
+            file_path,
+            hrefs,
+        )
+
+    @staticmethod
+    async def _store_content(chapter_id: int, content: str, db: AsyncSession) -> bool:
+        """Whether the content was stored, rather than extracted meanwhile"""
+        # A concurrent read or the backfill may have extracted it meanwhile
+        result = await db.execute(
+            update(Chapter)
+            .where(
+                Chapter.id == chapter_id,
+                Chapter.content.is_(None),
+                Chapter.content_compressed.is_(None),
+            )
+            .values(**content_values(Chapter.title)),
+            content_params(content),
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def _index_after_commit(
+        db: AsyncSession, chapter_ids: list[int], contents: list[str]
+    ) -> None:
+        # Extracted chapters are indexed like chapters saved with their content
+        if chapter_ids and SimilarityController.INDEX_ON_SAVE:
+            SimilarityController.schedule_after_commit(
+                db, SimilarityController.index_chapters, chapter_ids, contents
+            )
+
+    @classmethod
+    async def ensure_content(cls, chapter_id: int, db: AsyncSession) -> None:
+        """
+        Extract a lazily ingested chapter's content if that has not happened yet
+
+        Only the chapter's own zip member is read. Chapters that already have
+        content are left alone.
+        """
+        row = (
+            await db.execute(cls._pending_chapters().where(Chapter.id == chapter_id))
+        ).first()
+        if row is None:
+            return
+
+        [content] = await cls._extract(row.file_path, [row.source_href])
+        if await cls._store_content(chapter_id, content, db):
+            cls._index_after_commit(db, [chapter_id], [content])
+        await db.commit()
+        cls.invalidate_responses(book_id=row.book_id)
+
+    @classmethod
+    def schedule_backfill(cls, book_id: int) -> None:
+        """Extract a book's pending chapters in a background task"""
+        if book_id in cls._backfills:
+            return
+        task = asyncio.create_task(cls.backfill_book(book_id))
+        cls._backfills[book_id] = task
+        task.add_done_callback(lambda _: cls._backfills.pop(book_id, None))
+
+    @classmethod
+    async def backfill_book(cls, book_id: int) -> None:
+        """
+        Extract every pending chapter of a book, in reading order
+
+        Chapters are processed in batches of BACKFILL_BATCH_SIZE with one
+        archive open and one transaction per batch, so early chapters become
+        readable while the rest of the book is still being extracted.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (
+                    await db.execute(
+                        cls._pending_chapters()
+                        .where(Chapter.book_id == book_id)
+                        .order_by(Chapter.order)
+                    )
+                ).all()
+                # Release the connection while the first batch is parsed
+                await db.commit()
+
+                for start in range(0, len(rows), cls.BACKFILL_BATCH_SIZE):
+                    batch = rows[start : start + cls.BACKFILL_BATCH_SIZE]
+                    contents = await cls._extract(
+                        batch[0].file_path, [row.source_href for row in batch]
+                    )
+                    stored: list[tuple[int, str]] = []
+                    for row, content in zip(batch, contents, strict=True):
+                        if await cls._store_content(row.id, content, db):
+                            stored.append((row.id, content))
+                    cls._index_after_commit(
+                        db,
+                        [chapter_id for chapter_id, _ in stored],
+                        [content for _, content in stored],
+                    )
+                    await db.commit()
+                    cls.invalidate_responses(book_id=book_id)
+
+            if rows:
+                logger.info(f"Backfilled {len(rows)} chapters of book {book_id}")
+        except Exception:
+            logger.exception(f"Backfilling chapters of book {book_id} failed")
+
+    @classmethod
+    async def resume_backfills(cls) -> None:
+        """Schedule backfills for books whose extraction a restart interrupted"""
+        async with AsyncSessionLocal() as db:
+            pending = cls._pending_chapters().subquery()
+            book_ids = (await db.scalars(select(pending.c.book_id).distinct())).all()
+        for book_id in book_ids:
+            cls.schedule_backfill(book_id)
+
+    @classmethod
+    async def get_content(
+        cls,
+        chapter_id: int,
+        db: AsyncSession,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> ChapterContentResponse | None:
+        """
+        Get a chapter's content, or a character range of it, with its summary
+
+        Only the requested slice is sent from the database, except for
+        compressed content, which is decompressed and sliced here. Lazily
+        ingested chapters are extracted first.
+
+        Args:
+            chapter_id: ID of the chapter
+            db: Database session
+            offset: Index of the first character to return
+            limit: Maximum number of characters to return; None returns the rest
+
+        Returns:
+            ChapterContentResponse, or None if the chapter does not exist
+        """
+        await cls.ensure_content(chapter_id, db)
+
+        # SQL substr() is 1-based
+        content = (
+            func.substr(Chapter.content, offset + 1)
+            if limit is None
+            else func.substr(Chapter.content, offset + 1, limit)
+        )
+        row = (
+            await db.execute(
+                select(
+                    Chapter.id,
+                    Chapter.title,
+                    Chapter.summary,
+                    Chapter.updated_at,
+                    content.label("content"),
+                    func.length(Chapter.content).label("total_length"),
+                    Chapter.content_compressed,
+                ).where(Chapter.id == chapter_id)
+            )
+        ).first()
+        if row is None:
+            return None
+
+        page, total_length = row.content, row.total_length
+        if row.content_compressed is not None:
+            full_text = decompress_text(row.content_compressed)
+            end = None if limit is None else offset + limit
+            page, total_length = full_text[offset:end], len(full_text)
+
+        next_offset = None
+        if page is not None and offset + len(page) < total_length:
+            next_offset = offset + len(page)
+
+        return ChapterContentResponse(
+            id=row.id,
+            content=page,
+            summary=row.summary,
+            title=row.title,
+            offset=offset,
+            total_length=total_length,
+            next_offset=next_offset,
+            updated_at=row.updated_at,
+        )
+
+    @staticmethod
+    def _content_etag(chapter_id: int, updated_at: object) -> str:
+        return make_etag("content", chapter_id, updated_at)
+
+    @classmethod
+    async def content_response(
+        cls,
+        request: Request,
+        chapter_id: int,
+        db: AsyncSession,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Response | None:
+        """
+        Get chapter content as a JSON response with ETag and Last-Modified,
+        answering conditional requests with 304 Not Modified
+
+        Responses come from the in-process response cache when enabled, so
+        repeat reads do not touch the database. On a cache miss, a conditional
+        request is checked against updated_at alone before any content is read.
+
+        Returns:
+            The response, or None if the chapter does not exist
+        """
+        key = ("content", chapter_id, offset, limit)
+        # Clients that just wrote skip the cache, which a replica read may
+        # have filled with a stale response
+        cached = None if reads_primary(db) else cls.response_cache.get(key)
+        if cached is not None:
+            return conditional_response(request, cached)
+
+        if has_validators(request):
+            updated_at = await db.scalar(
+                select(Chapter.updated_at).where(Chapter.id == chapter_id)
+            )
+            if updated_at is None:
+                return None
+            etag = cls._content_etag(chapter_id, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+        chapter = await cls.get_content(chapter_id, db, offset, limit)
+        if chapter is None:
+            return None
+
+        cached = CachedResponse(
+            body=chapter.model_dump_json().encode("utf-8"),
+            etag=cls._content_etag(chapter_id, chapter.updated_at),
+            last_modified=chapter.updated_at,
+        )
+        cls.response_cache.set(key, cached)
+        return conditional_response(request, cached)
+
+    @classmethod
+    async def chapters_response(
+        cls, request: Request, book_id: int, db: AsyncSession
+    ) -> Response | None:
+        """
+        Get a book's chapter list as a JSON response with ETag and
+        Last-Modified, answering conditional requests with 304 Not Modified
+
+        The validators are derived from the chapter count and the latest
+        updated_at, so they change whenever a chapter is added, removed or
+        updated.
+
+        Returns:
+            The response, or None if the book has no chapters
+        """
+        key = ("chapters", book_id)
+        cached = None if reads_primary(db) else cls.response_cache.get(key)
+        if cached is not None:
+            return conditional_response(request, cached)
+
+        if has_validators(request):
+            count, updated_at = (
+                await db.execute(
+                    select(func.count(), func.max(Chapter.updated_at)).where(
+                        Chapter.book_id == book_id
+                    )
+                )
+            ).one()
+            if not count:
+                return None
+            etag = make_etag("chapters", book_id, count, updated_at)
+            if is_not_modified(request, etag, updated_at):
+                return not_modified_response(etag, updated_at)
+
+        # Only load the listed columns; content and summary can be hundreds of KB
+        chapters = (
+            await db.scalars(
+                select(Chapter)
+                .options(
+                    load_only(
+                        Chapter.id,
+                        Chapter.title,
+                        Chapter.order,
+                        Chapter.book_id,
+                        Chapter.created_at,
+                        Chapter.updated_at,
+                    )
+                )
+                .where(Chapter.book_id == book_id)
+                .order_by(Chapter.order)
+            )
+        ).all()
+        if not chapters:
+            return None
+
+        updated_at = max(chapter.updated_at for chapter in chapters)
+        cached = CachedResponse(
+            body=cls._chapter_list_adapter.dump_json(
+                cls._chapter_list_adapter.validate_python(
+                    chapters, from_attributes=True
+                )
+            ),
+            etag=make_etag("chapters", book_id, len(chapters), updated_at),
+            last_modified=updated_at,
+        )
+        cls.response_cache.set(key, cached)
+        return conditional_response(request, cached)
+
+    @classmethod
+    async def get_content_length(cls, chapter_id: int, db: AsyncSession) -> int | None:
+        """
+        Get the length of a chapter's content in characters, extracting a
+        lazily ingested chapter first
+
+        Returns:
+            The content length (0 if it has no content), or None if the chapter
+            does not exist
+        """
+        await cls.ensure_content(chapter_id, db)
+        row = (
+            await db.execute(
+                select(
+                    func.coalesce(func.length(Chapter.content), 0),
+                    Chapter.content_compressed,
+                ).where(Chapter.id == chapter_id)
+            )
+        ).first()
+        if row is None:
+            return None
+        if row.content_compressed is not None:
+            return len(decompress_text(row.content_compressed))
+        return row[0]
+
+    @classmethod
+    async def stream_content(
+        cls,
+        chapter_id: int,
+        total_length: int,
+        chunk_size: int | None = None,
+        primary_only: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Yield a chapter's content in chunks fetched from the database one at a time
+
+        Each chunk uses its own short-lived session, so a slow client does not
+        hold a pooled connection for the whole stream. Compressed content is
+        fetched and decompressed once, then sliced in memory.
+
+        Args:
+            chapter_id: ID of the chapter
+            total_length: Content length, from get_content_length
+            chunk_size: Characters per chunk
+            primary_only: Read from the primary even if a replica is configured
+        """
+        chunk_size = chunk_size or cls.STREAM_CHUNK_SIZE
+        async with read_session(primary_only) as db:
+            compressed = await db.scalar(
+                select(Chapter.content_compressed).where(Chapter.id == chapter_id)
+            )
+        if compressed is not None:
+            content = decompress_text(compressed)
+            for start in range(0, len(content), chunk_size):
+                yield content[start : start + chunk_size]
+            return
+
+        for start in range(0, total_length, chunk_size):
+            async with read_session(primary_only) as db:
+                chunk = await db.scalar(
+                    select(func.substr(Chapter.content, start + 1, chunk_size)).where(
+                        Chapter.id == chapter_id
+                    )
+                )
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,436 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from fastapi import UploadFile
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.core.compression import decompress_text, hash_text
+from backend.core.timing import StageTimer
+from backend.models.book import (
+    Book,
+    Chapter,
+    content_params,
+    content_values,
+    search_vector,
+)
+from backend.parsers.base import ParsedChapter
+from backend.parsers.registry import parser_for
+from backend.schemas import ChapterChange, ReingestResponse
+
+from .chapter_controller import ChapterController
+from .similarity_controller import SimilarityController
+from .upload_controller import UploadController
+
+logger = logging.getLogger(__name__)
+
+
+class StoredChapter(NamedTuple):
+    id: int
+    title: str
+    order: int
+    content_hash: str | None
+    has_summary: bool
+
+
+class EditionChapter(NamedTuple):
+    title: str
+    order: int
+    content: str
+    content_hash: str
+
+
+class EditionDiff(NamedTuple):
+    """How the chapters of a new edition map onto the stored ones"""
+
+    added: list[EditionChapter]
+    # (stored chapter, replacement) pairs
+    updated: list[tuple[StoredChapter, EditionChapter]]
+    moved: list[tuple[StoredChapter, EditionChapter]]
+    removed: list[StoredChapter]
+    unchanged: list[StoredChapter]
+
+
+class ReingestController:
+    """Controller for replacing a book with a new edition, chapter by chapter"""
+
+    @staticmethod
+    def diff_chapters(
+        stored: list[StoredChapter], edition: list[EditionChapter]
+    ) -> EditionDiff:
+        """
+        Match the chapters of a new edition to the stored chapters
+
+        Chapters are matched by content hash first, so identical text keeps its
+        row (and summary) even when it was retitled or moved. The remaining new
+        chapters are matched by title, in order, and count as updated; anything
+        left over is added or removed.
+
+        Args:
+            stored: The book's chapters, in order
+            edition: The new edition's chapters, in order
+
+        Returns:
+            EditionDiff describing the writes needed
+        """
+        by_hash: dict[str, list[StoredChapter]] = {}
+        for chapter in stored:
+            if chapter.content_hash is not None:
+                by_hash.setdefault(chapter.content_hash, []).append(chapter)
+
+        matched: set[int] = set()
+        unchanged, moved, unmatched = [], [], []
+        for chapter in edition:
+            candidates = by_hash.get(chapter.content_hash)
+            if not candidates:
+                unmatched.append(chapter)
+                continue
+            old = candidates.pop(0)
+            matched.add(old.id)
+            if (old.title, old.order) == (chapter.title, chapter.order):
+                unchanged.append(old)
+            else:
+                moved.append((old, chapter))
+
+        by_title: dict[str, list[StoredChapter]] = {}
+        for old in stored:
+            if old.id not in matched:
+                by_title.setdefault(old.title, []).append(old)
+
+        added, updated = [], []
+        for chapter in unmatched:
+            candidates = by_title.get(chapter.title)
+            if candidates:
+                old = candidates.pop(0)
+                matched.add(old.id)
+                updated.append((old, chapter))
+            else:
+                added.append(chapter)
+
+        removed = [old for old in stored if old.id not in matched]
+        return EditionDiff(added, updated, moved, removed, unchanged)
+
+    @staticmethod
+    def _stored_chapters(book_id: int, db: Session) -> list[StoredChapter]:
+        rows = db.execute(
+            select(
+                Chapter.id,
+                Chapter.title,
+                Chapter.order,
+                Chapter.content_hash,
+                Chapter.summary.is_not(None),
+            )
+            .where(Chapter.book_id == book_id)
+            .order_by(Chapter.order)
+        ).all()
+        chapters = [StoredChapter(*row) for row in rows]
+
+        # Compressed rows written before content hashes existed are hashed
+        # here; chapters not extracted yet (lazy ingestion) stay None
+        missing = [chapter.id for chapter in chapters if chapter.content_hash is None]
+        if not missing:
+            return chapters
+        hashes = {
+            chapter_id: hash_text(
+                decompress_text(compressed) if compressed is not None else content
+            )
+            for chapter_id, content, compressed in db.execute(
+                select(Chapter.id, Chapter.content, Chapter.content_compressed).where(
+                    Chapter.id.in_(missing),
+                    (Chapter.content.is_not(None))
+                    | (Chapter.content_compressed.is_not(None)),
+                )
+            )
+        }
+        return [
+            chapter._replace(content_hash=hashes.get(chapter.id, chapter.content_hash))
+            for chapter in chapters
+        ]
+
+    @classmethod
+    def apply_edition(
+        cls,
+        book_id: int,
+        chapters: list[ParsedChapter],
+        db: Session,
+        file_path: Path,
+        content_hash: str,
+    ) -> tuple[EditionDiff, dict[int, int]]:
+        """
+        Write only the chapters a new edition changed, in a single transaction
+
+        Args:
+            book_id: ID of the book being replaced
+            chapters: The new edition's (title, content) pairs, in order
+            db: Database session
+            file_path: Where the new edition is stored
+            content_hash: SHA-256 of the new edition's file
+
+        Returns:
+            Tuple of (the diff, IDs of the added chapters keyed by their order)
+        """
+        # Serialize concurrent re-ingestions of the same book
+        db.execute(select(Book.id).where(Book.id == book_id).with_for_update())
+        edition = [
+            EditionChapter(title, order, content, hash_text(content))
+            for order, (title, content) in enumerate(chapters, 1)
+        ]
+        diff = cls.diff_chapters(cls._stored_chapters(book_id, db), edition)
+        now = datetime.utcnow()
+
+        # Core statements rather than ORM bulk UPDATEs by primary key, which
+        # cannot compute the search vector
+        chapters_table = Chapter.__table__
+        by_id = chapters_table.c.id == bindparam("b_id")
+        if diff.moved:
+            # The text is unchanged, but a new title changes the search vector
+            db.execute(
+                update(chapters_table)
+                .where(by_id)
+                .values(
+                    title=bindparam("b_title"),
+                    search_vector=search_vector(
+                        bindparam("b_search_title"), bindparam("b_search_text")
+                    ),
+                ),
+                [
+                    {
+                        "b_id": old.id,
+                        "b_title": new.title,
+                        "b_search_title": new.title,
+                        "b_search_text": new.content,
+                        "order": new.order,
+                        "updated_at": now,
+                    }
+                    for old, new in diff.moved
+                ],
+            )
+        if diff.updated:
+            db.execute(
+                update(chapters_table).where(by_id).values(**content_values()),
+                [
+                    {
+                        "b_id": old.id,
+                        "order": new.order,
+                        **content_params(new.content, new.title),
+                        "summary": None,
+                        "source_href": None,
+                        "updated_at": now,
+                    }
+                    for old, new in diff.updated
+                ],
+            )
+        if diff.removed:
+            db.execute(
+                delete(Chapter).where(Chapter.id.in_([old.id for old in diff.removed]))
+            )
+        added_ids: dict[int, int] = {}
+        if diff.added:
+            added_ids = dict(
+                db.execute(
+                    insert(Chapter)
+                    .values(**content_values())
+                    .returning(Chapter.order, Chapter.id),
+                    [
+                        {
+                            "book_id": book_id,
+                            "order": new.order,
+                            **content_params(new.content, new.title),
+                        }
+                        for new in diff.added
+                    ],
+                ).all()
+            )
+
+        db.execute(
+            update(Book)
+            .where(Book.id == book_id)
+            .values(file_path=str(file_path), content_hash=content_hash, updated_at=now)
+        )
+        db.commit()
+        return diff, added_ids
+
+    @staticmethod
+    def update_similarity_index(diff: EditionDiff, added_ids: dict[int, int]) -> None:
+        if diff.removed:
+            SimilarityController.schedule(
+                SimilarityController.remove_chapters, [old.id for old in diff.removed]
+            )
+        if SimilarityController.INDEX_ON_SAVE and (diff.updated or diff.added):
+            rewritten = [(old.id, new) for old, new in diff.updated] + [
+                (added_ids[new.order], new) for new in diff.added
+            ]
+            SimilarityController.schedule(
+                SimilarityController.index_chapters,
+                [chapter_id for chapter_id, _ in rewritten],
+                [new.content for _, new in rewritten],
+            )
+
+    @staticmethod
+    def _response(
+        filename: str,
+        book_id: int,
+        diff: EditionDiff,
+        added_ids: dict[int, int],
+        timer: StageTimer,
+    ) -> ReingestResponse:
+        def change(chapter_id: int, title: str, order: int) -> ChapterChange:
+            return ChapterChange(chapter_id=chapter_id, title=title, order=order)
+
+        kept = [old for old, _ in diff.moved] + diff.unchanged
+        return ReingestResponse(
+            filename=filename,
+            success=True,
+            message="Book updated",
+            book_id=book_id,
+            added=[
+                change(added_ids[new.order], new.title, new.order) for new in diff.added
+            ],
+            updated=[change(old.id, new.title, new.order) for old, new in diff.updated],
+            moved=[change(old.id, new.title, new.order) for old, new in diff.moved],
+            removed=[change(old.id, old.title, old.order) for old in diff.removed],
+            unchanged=len(diff.unchanged),
+            summaries_kept=sum(old.has_summary for old in kept),
+            timings=timer.timings,
+        )
+
+    @staticmethod
+    async def _discard_blob(
+        file_path: Path, content_hash: str, db: AsyncSession
+    ) -> None:
+        """Delete a failed edition's file, unless a book was saved from it"""
+        if (
+            await db.scalar(select(Book.id).where(Book.content_hash == content_hash))
+            is None
+        ):
+            file_path.unlink(missing_ok=True)
+
+    @classmethod
+    async def handle_reingest(
+        cls, book_id: int, file: UploadFile, db: AsyncSession
+    ) -> ReingestResponse:
+        """
+        Replace a book's content with a new edition of its file
+
+        Instead of ingesting the edition as a new book, each chapter is
+        fingerprinted and only chapters whose content hash changed are
+        inserted, updated or deleted. Unchanged chapters keep their rows, IDs
+        and summaries, so a corrected edition does not need summarizing again.
+
+        Args:
+            book_id: ID of the book to update
+            file: The new edition
+            db: Database session
+
+        Returns:
+            ReingestResponse listing every chapter written
+
+        Raises:
+            ValueError: If the book does not exist
+        """
+        book = await db.get(Book, book_id)
+        if book is None:
+            raise ValueError("Book not found")
+        old_file_path = Path(book.file_path)
+        filename = file.filename or "unknown"
+        timer = StageTimer()
+
+        def failure(message: str) -> ReingestResponse:
+            return ReingestResponse(
+                filename=filename,
+                success=False,
+                message=message,
+                book_id=book_id,
+                timings=timer.timings,
+            )
+
+        parser = parser_for(filename, file.content_type)
+        if parser is None:
+            return failure(UploadController.unsupported_format_message())
+
+        UploadController.UPLOAD_DIR.mkdir(exist_ok=True)
+        tmp_path = UploadController.UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+        try:
+            with timer.stage("receive"):
+                _, content_hash = await UploadController.save_upload(file, tmp_path)
+            if content_hash == book.content_hash:
+                chapter_count = len(
+                    (
+                        await db.scalars(
+                            select(Chapter.id).where(Chapter.book_id == book_id)
+                        )
+                    ).all()
+                )
+                return ReingestResponse(
+                    filename=filename,
+                    success=True,
+                    message="Book is already this edition",
+                    book_id=book_id,
+                    unchanged=chapter_count,
+                    timings=timer.timings,
+                )
+            # Rejected before parsing; the hash can belong to one book only
+            if await db.run_sync(
+                lambda session: UploadController.find_ingested_book(
+                    content_hash, session
+                )
+            ):
+                return failure("This file is already ingested as another book")
+            file_path = UploadController.blob_path(content_hash, parser.extensions[0])
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.replace(file_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        try:
+            with timer.stage("parse"):
+                # Matching chapters against the stored ones needs the whole
+                # edition, so it is collected rather than streamed
+                chapters = await asyncio.get_running_loop().run_in_executor(
+                    UploadController.get_parse_executor(),
+                    lambda: list(
+                        UploadController.extract_chapters(
+                            file_path, fallback_title=Path(filename).stem
+                        )
+                    ),
+                )
+
+            with timer.stage("persist"):
+                diff, added_ids = await db.run_sync(
+                    lambda session: cls.apply_edition(
+                        book_id, chapters, session, file_path, content_hash
+                    )
+                )
+        except IntegrityError:
+            await db.rollback()
+            await cls._discard_blob(file_path, content_hash, db)
+            return failure("This file is already ingested as another book")
+        except Exception as e:
+            await db.rollback()
+            await cls._discard_blob(file_path, content_hash, db)
+            return failure(f"Error re-ingesting file: {str(e)}")
+
+        for old, _ in diff.updated + diff.moved:
+            ChapterController.invalidate_responses(old.id, book_id)
+        for old in diff.removed:
+            ChapterController.invalidate_responses(old.id, book_id)
+        ChapterController.invalidate_responses(book_id=book_id)
+        cls.update_similarity_index(diff, added_ids)
+        # No chapter reads from the previous edition any more
+        if old_file_path.parent.parent == UploadController.BLOB_DIR:
+            old_file_path.unlink(missing_ok=True)
+
+        logger.info(
+            f"Re-ingested {filename} into book {book_id}: {len(diff.added)} added, "
+            f"{len(diff.updated)} updated, {len(diff.moved)} moved, "
+            f"{len(diff.removed)} removed, {len(diff.unchanged)} unchanged "
+            f"timings_ms={timer.timings}",
+            extra={"timings": timer.timings},
+        )
+        return cls._response(filename, book_id, diff, added_ids, timer)
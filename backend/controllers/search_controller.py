@@ -0,0 +1,155 @@
+import os
+
+from sqlalchemy import (
+    ARRAY,
+    ColumnElement,
+    Integer,
+    Text,
+    bindparam,
+    func,
+    select,
+    text,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.compression import decompress_text
+from backend.database import REPLICA_SAFE
+from backend.models.book import SEARCH_CONFIG, Book, Chapter
+from backend.schemas import SearchHit, SearchResponse
+
+
+class SearchController:
+    """Controller for full-text search across chapters"""
+
+    TEXT_SEARCH_CONFIG = SEARCH_CONFIG
+    RANK_CANDIDATES = int(os.getenv("SEARCH_RANK_CANDIDATES", "1000"))
+    HEADLINE_OPTIONS = (
+        "MaxFragments=2, MinWords=8, MaxWords=30, FragmentDelimiter=' … '"
+    )
+
+    @classmethod
+    async def search(
+        cls, q: str, db: AsyncSession, limit: int = 20, offset: int = 0
+    ) -> SearchResponse:
+        """
+        Search chapter titles and content, best matches first
+
+        Matches come from the GIN-indexed search_vector column; snippets are
+        only built for the rows on the requested page.
+
+        Args:
+            q: Search query, in web search syntax ("quoted phrases", -exclusions, or)
+            db: Database session
+            limit: Page size
+            offset: Number of results to skip
+
+        Returns:
+            SearchResponse with ranked hits and the next page offset, if any
+        """
+        query = func.websearch_to_tsquery(cls.TEXT_SEARCH_CONFIG, q)
+
+        # Selectivity depends entirely on the query text, so a cached generic
+        # plan for these prepared statements is usually wrong. Marked safe for
+        # the replica, so the search is not pinned to the primary
+        await db.execute(
+            text("SET LOCAL plan_cache_mode = force_custom_plan").execution_options(
+                **{REPLICA_SAFE: True}
+            )
+        )
+
+        # Ranking reads every candidate's tsvector, so very broad queries are
+        # ranked among the first RANK_CANDIDATES matches only
+        candidates = select(Chapter.id, Chapter.search_vector).where(
+            Chapter.search_vector.bool_op("@@")(query)
+        )
+        if cls.RANK_CANDIDATES > 0:
+            candidates = candidates.limit(cls.RANK_CANDIDATES)
+        candidates = candidates.subquery()
+
+        # Rank and page first; fetch one extra row to know if there is a next page
+        rank = func.ts_rank_cd(candidates.c.search_vector, query)
+        page = (
+            await db.execute(
+                select(candidates.c.id, rank.label("rank"))
+                .order_by(rank.desc(), candidates.c.id)
+                .limit(limit + 1)
+                .offset(offset)
+            )
+        ).all()
+        ranks = {row.id: row.rank for row in page[:limit]}
+
+        # Snippets are only built for the chapters on this page
+        rows = (
+            await db.execute(
+                select(
+                    Chapter.id,
+                    Chapter.title,
+                    Chapter.book_id,
+                    Book.title.label("book_title"),
+                    func.ts_headline(
+                        cls.TEXT_SEARCH_CONFIG,
+                        Chapter.content,
+                        query,
+                        cls.HEADLINE_OPTIONS,
+                    ).label("snippet"),
+                    Chapter.content_compressed,
+                )
+                .join(Book, Book.id == Chapter.book_id)
+                .where(Chapter.id.in_(ranks))
+            )
+        ).all()
+        rows = sorted(rows, key=lambda row: (-ranks[row.id], row.id))
+        snippets = {row.id: row.snippet for row in rows}
+        compressed = {
+            row.id: decompress_text(row.content_compressed)
+            for row in rows
+            if row.content_compressed is not None
+        }
+        if compressed:
+            snippets |= await cls._headlines(compressed, query, db)
+
+        return SearchResponse(
+            query=q,
+            results=[
+                SearchHit(
+                    chapter_id=row.id,
+                    chapter_title=row.title,
+                    book_id=row.book_id,
+                    book_title=row.book_title,
+                    rank=ranks[row.id],
+                    snippet=snippets[row.id] or "",
+                )
+                for row in rows
+            ],
+            offset=offset,
+            limit=limit,
+            next_offset=offset + limit if len(page) > limit else None,
+        )
+
+    @classmethod
+    async def _headlines(
+        cls, texts: dict[int, str], query: ColumnElement, db: AsyncSession
+    ) -> dict[int, str]:
+        """
+        Snippets of compressed chapters, which PostgreSQL cannot read itself
+
+        Args:
+            texts: Decompressed content by chapter ID
+            query: The search's tsquery
+            db: Database session
+
+        Returns:
+            Snippet by chapter ID
+        """
+        chapters = (
+            func.unnest(
+                bindparam("ids", list(texts), type_=ARRAY(Integer)),
+                bindparam("texts", list(texts.values()), type_=ARRAY(Text)),
+            )
+            .table_valued("id", "content")
+            .render_derived()
+        )
+        headline = func.ts_headline(
+            cls.TEXT_SEARCH_CONFIG, chapters.c.content, query, cls.HEADLINE_OPTIONS
+        )
+        return dict((await db.execute(select(chapters.c.id, headline))).all())
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.models.book import Book, Chapter
+from backend.schemas import SimilarChapter
+
+# numpy is loaded with the index, on the first similarity lookup or save
+if TYPE_CHECKING:
+    from backend.core.embeddings import Embedder
+    from backend.core.similarity_index import SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+# Session.info key of the index updates waiting for the transaction to commit
+PENDING_UPDATES = "similarity_index_updates"
+
+
+class SimilarityController:
+    """Controller for the chapter similarity ("more like this") index"""
+
+    INDEX_DIR = Path(os.getenv("SIMILARITY_INDEX_DIR", "uploads/similarity"))
+    # Embed chapters as the API and backend.cli.import_library save books;
+    # otherwise only on first lookup and by backend.cli.build_similarity_index
+    INDEX_ON_SAVE = os.getenv("SIMILARITY_INDEX_ON_SAVE", "true").lower() == "true"
+    EMBED_BATCH_SIZE = 256
+
+    _embedder: "Embedder | None" = None
+    _index: "SimilarityIndex | None" = None
+    _index_executor: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def get_embedder(cls) -> "Embedder":
+        if cls._embedder is None:
+            from backend.core.embeddings import load_embedder
+
+            cls._embedder = load_embedder()
+        return cls._embedder
+
+    @classmethod
+    def get_index(cls) -> "SimilarityIndex":
+        if cls._index is None:
+            from backend.core.similarity_index import SimilarityIndex
+
+            embedder = cls.get_embedder()
+            cls._index = SimilarityIndex(cls.INDEX_DIR, embedder.dim, embedder.name)
+        return cls._index
+
+    @classmethod
+    def index_chapters(cls, chapter_ids: list[int], texts: list[str]) -> None:
+        """Embed chapters and add or replace them in the index"""
+        embedder, index = cls.get_embedder(), cls.get_index()
+        for start in range(0, len(chapter_ids), cls.EMBED_BATCH_SIZE):
+            end = start + cls.EMBED_BATCH_SIZE
+            index.upsert(chapter_ids[start:end], embedder.embed(texts[start:end]))
+
+    @classmethod
+    def remove_chapters(cls, chapter_ids: list[int]) -> None:
+        cls.get_index().remove(chapter_ids)
+
+    @classmethod
+    def _run_logged(cls, func: Callable[..., None], *args: Any) -> None:
+        try:
+            func(*args)
+        except Exception:
+            logger.exception(
+                f"Updating the similarity index with {func.__name__} failed"
+            )
+
+    @classmethod
+    def schedule(cls, func: Callable[..., None], *args: Any) -> None:
+        """
+        Apply an index update in the background, in submission order
+
+        Embedding is CPU work, so callers on the event loop (save_book_data runs
+        inside the request's session) hand it to a single worker thread.
+        """
+        if cls._index_executor is None:
+            cls._index_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="similarity-index"
+            )
+        cls._index_executor.submit(cls._run_logged, func, *args)
+
+    @classmethod
+    def wait(cls) -> None:
+        """Block until the index updates scheduled so far are applied"""
+        if cls._index_executor is not None:
+            cls._index_executor.submit(lambda: None).result()
+
+    @classmethod
+    def schedule_after_commit(
+        cls, db: Session | AsyncSession, func: Callable[..., None], *args: Any
+    ) -> None:
+        """
+        Schedule an index update once the session's transaction commits
+
+        Updates are dropped if it rolls back, so the index never holds
+        chapters whose rows were not saved.
+        """
+        db.info.setdefault(PENDING_UPDATES, []).append((func, args))
+
+    @classmethod
+    def _schedule_pending(cls, session: Session) -> None:
+        for func, args in session.info.pop(PENDING_UPDATES, ()):
+            cls.schedule(func, *args)
+
+    @staticmethod
+    def _drop_pending(session: Session) -> None:
+        session.info.pop(PENDING_UPDATES, None)
+
+    @classmethod
+    async def similar(
+        cls, chapter_id: int, db: AsyncSession, limit: int = 10
+    ) -> list[SimilarChapter] | None:
+        """
+        Find the chapters across the library most similar to a chapter
+
+        A chapter missing from the index (saved with indexing off, or before
+        its content was extracted) is embedded on the spot.
+
+        Args:
+            chapter_id: ID of the chapter
+            db: Database session
+            limit: Number of chapters to return
+
+        Returns:
+            Similar chapters, most similar first, or None if the chapter does
+            not exist
+        """
+        index = cls.get_index()
+        vector = index.vector(chapter_id)
+        if vector is None:
+            chapter = await db.get(Chapter, chapter_id)
+            if chapter is None:
+                return None
+            await asyncio.to_thread(
+                cls.index_chapters, [chapter_id], [chapter.text or ""]
+            )
+            vector = index.vector(chapter_id)
+
+        [hits] = await asyncio.to_thread(index.search, vector, limit, [chapter_id])
+        rows = await db.execute(
+            select(Chapter.id, Chapter.title, Chapter.book_id, Book.title)
+            .join(Book, Chapter.book_id == Book.id)
+            .where(Chapter.id.in_([hit_id for hit_id, _ in hits]))
+        )
+        chapters = {row[0]: row for row in rows}
+        # Chapters deleted after they were indexed are only removed from the
+        # index in the background
+        return [
+            SimilarChapter(
+                chapter_id=hit_id,
+                chapter_title=chapters[hit_id][1],
+                book_id=chapters[hit_id][2],
+                book_title=chapters[hit_id][3],
+                score=round(score, 4),
+            )
+            for hit_id, score in hits
+            if hit_id in chapters
+        ]
+
+
+# Every session, including the sync sessions behind AsyncSession
+event.listen(Session, "after_commit", SimilarityController._schedule_pending)
+event.listen(Session, "after_rollback", SimilarityController._drop_pending)
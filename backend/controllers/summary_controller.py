@@ -1,43 +1,334 @@
+import asyncio
+import hashlib
+import json
+import logging
 import os
+from collections.abc import AsyncIterator
 
-import groq
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.core.cache import LRUCache
+from backend.core.llm import LLMClient
+from backend.core.metrics import stage_timer, timed
+from backend.database import AsyncSessionLocal
 from backend.models.book import Chapter
+from backend.models.summary import SummaryCache
+
+from .chapter_controller import ChapterController
+
+logger = logging.getLogger(__name__)
+
+SummaryKey = tuple[str, str, str]
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """Format a server-sent event with a JSON payload"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """Please provide a concise summary of the following chapter text in 5-10 sentences:
+
+{text}
+
+Summary:"""
+
+CHUNK_SUMMARY_PROMPT = """Please provide a concise summary of the following excerpt from a chapter in 5-10 sentences:
+
+{text}
+
+Summary:"""
+
+COMBINE_SUMMARY_PROMPT = """The following are summaries of consecutive parts of one chapter. Combine them into a single concise summary of the chapter in 5-10 sentences:
+
+{text}
+
+Summary:"""
 
 
 class SummaryController:
     """Controller for handling chapter summaries"""
 
+    # Bump whenever the prompts change so cached summaries are regenerated
+    PROMPT_VERSION = "v2"
+    # Token budget for the text placed in a single prompt
+    CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "6000"))
+    SUMMARY_MAX_TOKENS = 1000
+    # Concurrent LLM calls per chapter; LLMClient also limits them process-wide
+    MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+    _memory_cache: LRUCache[str] = LRUCache(
+        int(os.getenv("SUMMARY_CACHE_SIZE", "1024"))
+    )
+    cache_stats: dict[str, int] = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
     @staticmethod
-    async def generate_summary(content: str) -> str:
-        """Generate a summary using Groq API"""
-        client = groq.AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    def llm_model() -> str:
+        return os.getenv("LLM_MODEL", "gemma2-9b-it")
 
-        prompt = f"""Please provide a concise summary of the following chapter text in 5-10 sentences:
+    @classmethod
+    def summary_key(cls, content: str) -> SummaryKey:
+        """Cache key of a summary: (content hash, model, prompt version)"""
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        return content_hash, cls.llm_model(), cls.PROMPT_VERSION
 
-{content}
+    @classmethod
+    async def get_cached_summary(cls, key: SummaryKey, db: AsyncSession) -> str | None:
+        """Look up a summary in the in-process LRU, then in the database"""
+        summary = cls._memory_cache.get(key)
+        if summary is not None:
+            cls.cache_stats["memory_hits"] += 1
+            return summary
 
-Summary:"""
+        content_hash, model, prompt_version = key
+        summary = await db.scalar(
+            select(SummaryCache.summary).where(
+                SummaryCache.content_hash == content_hash,
+                SummaryCache.model == model,
+                SummaryCache.prompt_version == prompt_version,
+            )
+        )
+        if summary is not None:
+            cls.cache_stats["db_hits"] += 1
+            cls._memory_cache.set(key, summary)
+            return summary
+
+        cls.cache_stats["misses"] += 1
+        return None
+
+    @classmethod
+    async def cache_summary(
+        cls, key: SummaryKey, summary: str, db: AsyncSession
+    ) -> None:
+        """Store a summary in both cache tiers, replacing any existing entry"""
+        content_hash, model, prompt_version = key
+        stmt = insert(SummaryCache).values(
+            content_hash=content_hash,
+            model=model,
+            prompt_version=prompt_version,
+            summary=summary,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_summary_cache_key",
+                set_={"summary": stmt.excluded.summary},
+            )
+        )
+        cls._memory_cache.set(key, summary)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count; close enough for budgeting prompt sizes"""
+        return len(text) // CHARS_PER_TOKEN + 1
 
-        chat_completion = await client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model=os.getenv("LLM_MODEL", "gemma2-9b-it"),
-            temperature=0,
-            max_tokens=1000,
+    @classmethod
+    def split_into_chunks(cls, content: str, max_tokens: int) -> list[str]:
+        """
+        Split text on paragraph boundaries into chunks under a token budget
+
+        Paragraphs longer than the budget are split at the last whitespace
+        that fits.
+
+        Args:
+            content: Text to split
+            max_tokens: Token budget per chunk
+
+        Returns:
+            List of chunks, in order
+        """
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        chunks: list[str] = []
+        current: list[str] = []
+        current_chars = 0
+
+        for paragraph in content.split("\n"):
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                paragraph_head, paragraph = paragraph[:cut], paragraph[cut:].lstrip()
+                if current:
+                    chunks.append("\n".join(current))
+                    current, current_chars = [], 0
+                chunks.append(paragraph_head)
+
+            if current and current_chars + len(paragraph) + 1 > max_chars:
+                chunks.append("\n".join(current))
+                current, current_chars = [], 0
+            current.append(paragraph)
+            current_chars += len(paragraph) + 1
+
+        if current:
+            chunks.append("\n".join(current))
+        return [chunk for chunk in chunks if chunk.strip()] or [content]
+
+    @classmethod
+    def group_summaries(cls, summaries: list[str], max_tokens: int) -> list[str]:
+        """
+        Join consecutive partial summaries into groups under a token budget
+
+        Every group holds at least two summaries, so each reduce round
+        shrinks the list.
+        """
+        groups: list[list[str]] = [[]]
+        group_tokens = 0
+        for summary in summaries:
+            tokens = cls.estimate_tokens(summary)
+            if len(groups[-1]) >= 2 and group_tokens + tokens > max_tokens:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(summary)
+            group_tokens += tokens
+        return ["\n\n".join(group) for group in groups]
+
+    @classmethod
+    async def _complete_all(cls, prompt_template: str, texts: list[str]) -> list[str]:
+        """Run one prompt per text concurrently, at most MAP_CONCURRENCY at once"""
+        semaphore = asyncio.Semaphore(cls.MAP_CONCURRENCY)
+        client = LLMClient.shared()
+
+        async def complete(text: str) -> str:
+            async with semaphore:
+                return await client.complete(
+                    prompt_template.format(text=text),
+                    model=cls.llm_model(),
+                    max_tokens=cls.SUMMARY_MAX_TOKENS,
+                )
+
+        return await asyncio.gather(*(complete(text) for text in texts))
+
+    @classmethod
+    async def build_final_prompt(cls, content: str) -> str:
+        """
+        Build the prompt whose completion is the chapter summary
+
+        Content that fits the chunk budget is summarized in a single call.
+        Longer content is map-reduced: paragraph-aligned chunks are summarized
+        concurrently, then the partial summaries are combined level by level
+        until one group remains, so latency grows with the depth of the tree
+        rather than the length.
+        """
+        chunks = cls.split_into_chunks(content, cls.CHUNK_TOKENS)
+        if len(chunks) == 1:
+            return SUMMARY_PROMPT.format(text=content)
+
+        summaries = await cls._complete_all(CHUNK_SUMMARY_PROMPT, chunks)
+        depth = 1
+        while len(groups := cls.group_summaries(summaries, cls.CHUNK_TOKENS)) > 1:
+            summaries = await cls._complete_all(COMBINE_SUMMARY_PROMPT, groups)
+            depth += 1
+
+        logger.info(f"Summarized {len(chunks)} chunks with a reduce depth of {depth}")
+        return COMBINE_SUMMARY_PROMPT.format(text=groups[0])
+
+    @classmethod
+    @timed("generate_summary")
+    async def generate_summary(cls, content: str) -> str:
+        """Generate a summary using the shared Groq client"""
+        prompt = await cls.build_final_prompt(content)
+        return await LLMClient.shared().complete(
+            prompt, model=cls.llm_model(), max_tokens=cls.SUMMARY_MAX_TOKENS
         )
 
-        return chat_completion.choices[0].message.content.strip()
+    @classmethod
+    async def generate_summary_stream(cls, content: str) -> AsyncIterator[str]:
+        """Generate a summary, yielding the final LLM call's tokens as they arrive"""
+        with stage_timer("generate_summary"):
+            prompt = await cls.build_final_prompt(content)
+            async for token in LLMClient.shared().stream(
+                prompt, model=cls.llm_model(), max_tokens=cls.SUMMARY_MAX_TOKENS
+            ):
+                yield token
 
     @classmethod
-    async def summarize_chapter(cls, chapter_id: int, db: Session) -> str:
-        """Generate and save summary for a chapter"""
-        chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
+    async def summarize_chapter(
+        cls, chapter_id: int, db: AsyncSession, force: bool = False
+    ) -> str:
+        """
+        Generate and save summary for a chapter
+
+        Summaries are cached by (content hash, model, prompt version), so
+        repeated requests and identical chapters in other books do not call
+        the LLM again.
+
+        Args:
+            chapter_id: ID of the chapter
+            db: Database session
+            force: Regenerate the summary even if a cached one exists
+        """
+        await ChapterController.ensure_content(chapter_id, db)
+        chapter = await db.get(Chapter, chapter_id)
         if not chapter:
             raise ValueError("Chapter not found")
 
-        summary = await cls.generate_summary(chapter.content)
+        content = chapter.text or ""
+        key = cls.summary_key(content)
+        summary = None if force else await cls.get_cached_summary(key, db)
+        if summary is None:
+            summary = await cls.generate_summary(content)
+            await cls.cache_summary(key, summary, db)
+            logger.info(f"Generated summary for chapter {chapter_id}")
+
         chapter.summary = summary
-        db.commit()
+        await db.commit()
+        ChapterController.invalidate_responses(chapter_id, chapter.book_id)
 
         return summary
+
+    @classmethod
+    async def stream_summary(
+        cls, chapter_id: int, force: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Summarize a chapter as a stream of server-sent events
+
+        Emits one ``data`` event per token, then a ``done`` event carrying the
+        full summary once it has been saved. Cached summaries are sent as a
+        single token. Database sessions are opened only around reads and the
+        final write, never held while the LLM streams.
+
+        Args:
+            chapter_id: ID of the chapter
+            force: Regenerate the summary even if a cached one exists
+        """
+        async with AsyncSessionLocal() as db:
+            await ChapterController.ensure_content(chapter_id, db)
+            chapter = await db.get(Chapter, chapter_id)
+            if not chapter:
+                yield sse_event({"detail": "Chapter not found"}, event="error")
+                return
+            content = chapter.text or ""
+            book_id = chapter.book_id
+            key = cls.summary_key(content)
+            summary = None if force else await cls.get_cached_summary(key, db)
+
+        try:
+            if summary is None:
+                tokens: list[str] = []
+                async for token in cls.generate_summary_stream(content):
+                    tokens.append(token)
+                    yield sse_event({"token": token})
+                summary = "".join(tokens).strip()
+                logger.info(f"Generated streamed summary for chapter {chapter_id}")
+            else:
+                yield sse_event({"token": summary})
+
+            async with AsyncSessionLocal() as db:
+                await cls.cache_summary(key, summary, db)
+                await db.execute(
+                    update(Chapter)
+                    .where(Chapter.id == chapter_id)
+                    .values(summary=summary)
+                )
+                await db.commit()
+            ChapterController.invalidate_responses(chapter_id, book_id)
+        except Exception as e:
+            logger.exception(f"Streaming summary for chapter {chapter_id} failed")
+            yield sse_event({"detail": str(e)}, event="error")
+            return
+
+        yield sse_event({"summary": summary}, event="done")
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncSessionLocal
+from backend.models.book import Chapter
+from backend.models.summary import SummaryJob
+
+from .summary_controller import SummaryController
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryJobController:
+    """
+    Controller for whole-book summarization jobs.
+
+    Jobs are rows in the summary_jobs table. Each API process runs up to
+    JOB_WORKERS worker tasks that claim queued jobs with
+    ``FOR UPDATE SKIP LOCKED``, so no external broker is needed and several
+    processes can share the queue.
+    """
+
+    JOB_WORKERS = int(os.getenv("SUMMARY_JOB_WORKERS", "2"))
+    CHAPTER_CONCURRENCY = int(os.getenv("SUMMARY_JOB_CHAPTER_CONCURRENCY", "4"))
+    # A running job's worker touches updated_at every LEASE_SECONDS / 3; a job
+    # not touched for LEASE_SECONDS was abandoned (crash, redeploy) and is
+    # claimed again
+    LEASE_SECONDS = float(os.getenv("SUMMARY_JOB_LEASE", "120"))
+
+    _workers: set[asyncio.Task] = set()
+    _wake_pending = False
+    _reclaimer: asyncio.Task | None = None
+
+    @classmethod
+    async def enqueue(
+        cls, book_id: int, db: AsyncSession, force: bool = False
+    ) -> SummaryJob:
+        """
+        Queue a job that summarizes every chapter of a book
+
+        Args:
+            book_id: ID of the book
+            db: Database session
+            force: Regenerate summaries that already exist
+
+        Returns:
+            The queued job
+        """
+        total_chapters = await db.scalar(
+            select(func.count()).select_from(Chapter).where(Chapter.book_id == book_id)
+        )
+        if not total_chapters:
+            raise ValueError("No chapters found for this book")
+
+        job = SummaryJob(book_id=book_id, force=force, total_chapters=total_chapters)
+        db.add(job)
+        await db.commit()
+
+        cls.wake()
+        return job
+
+    @classmethod
+    def start(cls) -> None:
+        """
+        Drain the queue now and look for abandoned jobs every LEASE_SECONDS
+
+        Jobs left running by a process that died are only claimable once their
+        lease expires, which may be after this process has gone idle.
+        """
+        cls.wake()
+        if cls._reclaimer is None:
+            cls._reclaimer = asyncio.create_task(cls._reclaim_abandoned())
+
+    @classmethod
+    async def _reclaim_abandoned(cls) -> None:
+        while True:
+            await asyncio.sleep(cls.LEASE_SECONDS)
+            cls.wake()
+
+    @classmethod
+    def wake(cls) -> None:
+        """Start worker tasks, up to JOB_WORKERS, to drain the queue"""
+        if len(cls._workers) >= cls.JOB_WORKERS:
+            # A busy worker will look for more jobs before it exits
+            cls._wake_pending = True
+            return
+        while len(cls._workers) < cls.JOB_WORKERS:
+            task = asyncio.create_task(cls._work())
+            cls._workers.add(task)
+
+    @classmethod
+    async def _work(cls) -> None:
+        task = asyncio.current_task()
+        try:
+            while True:
+                cls._wake_pending = False
+                job_id = await cls._claim_job()
+                if job_id is None and not cls._wake_pending:
+                    return
+                if job_id is not None:
+                    await cls.run_job(job_id)
+        except Exception:
+            logger.exception("Summary job worker stopped")
+        finally:
+            cls._workers.discard(task)
+
+    @classmethod
+    async def _claim_job(cls) -> int | None:
+        """
+        Atomically move the oldest queued job, or a running job whose lease
+        expired, to running and return its ID
+        """
+        lease_expired = datetime.utcnow() - timedelta(seconds=cls.LEASE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            next_job = (
+                select(SummaryJob.id)
+                .where(
+                    or_(
+                        SummaryJob.status == "queued",
+                        and_(
+                            SummaryJob.status == "running",
+                            SummaryJob.updated_at < lease_expired,
+                        ),
+                    )
+                )
+                .order_by(SummaryJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            job_id = await db.scalar(
+                update(SummaryJob)
+                .where(SummaryJob.id == next_job)
+                .values(status="running", updated_at=datetime.utcnow())
+                .returning(SummaryJob.id)
+            )
+            await db.commit()
+            return job_id
+
+    @classmethod
+    async def _heartbeat(cls, job_id: int) -> None:
+        """Renew a running job's lease until cancelled"""
+        while True:
+            await asyncio.sleep(cls.LEASE_SECONDS / 3)
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(SummaryJob)
+                    .where(SummaryJob.id == job_id)
+                    .values(updated_at=datetime.utcnow())
+                )
+                await db.commit()
+
+    @classmethod
+    async def run_job(cls, job_id: int) -> None:
+        """
+        Summarize a job's chapters concurrently, recording progress as each finishes
+
+        The job ends completed if every chapter was summarized, partial if some
+        failed and failed if none succeeded. A reclaimed job starts over on the
+        chapters still without a summary.
+        """
+        async with AsyncSessionLocal() as db:
+            job = await db.get(SummaryJob, job_id)
+            if job is None:
+                return
+            query = select(Chapter.id).where(Chapter.book_id == job.book_id)
+            if not job.force:
+                query = query.where(Chapter.summary.is_(None))
+            chapter_ids = (await db.scalars(query.order_by(Chapter.order))).all()
+
+            # Chapters that already have a summary count as done
+            job.completed_chapters = job.total_chapters - len(chapter_ids)
+            job.failed_chapters = 0
+            await db.commit()
+            force = job.force
+
+        semaphore = asyncio.Semaphore(cls.CHAPTER_CONCURRENCY)
+
+        async def summarize(chapter_id: int) -> None:
+            async with semaphore, AsyncSessionLocal() as db:
+                try:
+                    await SummaryController.summarize_chapter(chapter_id, db, force)
+                    progress = {"completed_chapters": SummaryJob.completed_chapters + 1}
+                except Exception as e:
+                    await db.rollback()
+                    logger.warning(f"Job {job_id}: chapter {chapter_id} failed: {e}")
+                    progress = {"failed_chapters": SummaryJob.failed_chapters + 1}
+                await db.execute(
+                    update(SummaryJob).where(SummaryJob.id == job_id).values(**progress)
+                )
+                await db.commit()
+
+        status, error = "completed", None
+        heartbeat = asyncio.create_task(cls._heartbeat(job_id))
+        try:
+            await asyncio.gather(*(summarize(chapter_id) for chapter_id in chapter_ids))
+        except Exception as e:
+            logger.exception(f"Summary job {job_id} failed")
+            status, error = "failed", str(e)
+        finally:
+            heartbeat.cancel()
+
+        async with AsyncSessionLocal() as db:
+            failed = await db.scalar(
+                select(SummaryJob.failed_chapters).where(SummaryJob.id == job_id)
+            )
+            if status == "completed" and failed:
+                if failed == len(chapter_ids):
+                    status, error = "failed", f"All {failed} chapters failed"
+                else:
+                    status = "partial"
+                    error = f"{failed} of {len(chapter_ids)} chapters failed"
+            await db.execute(
+                update(SummaryJob)
+                .where(SummaryJob.id == job_id)
+                .values(status=status, error=error)
+            )
+            await db.commit()
+        logger.info(f"Summary job {job_id} {status}")
+
+    @staticmethod
+    async def get_job(job_id: int, db: AsyncSession) -> SummaryJob | None:
+        return await db.get(SummaryJob, job_id)
@@ -1,13 +1,32 @@
 import asyncio
+import contextlib
+import hashlib
 import logging
+import os
+import time
+import uuid
+import zipfile
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import BinaryIO
 
-from bs4 import BeautifulSoup
-from ebooklib import epub
 from fastapi import UploadFile
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.models.book import Book, Chapter
+from backend.core.epub_toc import SpineItem, read_spine
+from backend.core.html_text import extract_title_and_text
+from backend.core.metrics import record_stage, timed
+from backend.core.timing import StageTimer
+from backend.models.book import Book, Chapter, content_params, content_values
+from backend.parsers.base import ParsedChapter
+from backend.parsers.registry import parser_for, supported_extensions
+from backend.schemas import UploadResponse
+
+from .similarity_controller import SimilarityController
 
 logger = logging.getLogger(__name__)
 
@@ -16,169 +35,532 @@ class UploadController:
     """Controller for handling file uploads"""
 
     UPLOAD_DIR = Path("uploads")
-    ALLOWED_EXTENSION = ".epub"
+    BLOB_DIR = UPLOAD_DIR / "blobs"
+    CHUNK_SIZE = 1024 * 1024  # 1MB
+    PARSE_WORKERS = int(os.getenv("UPLOAD_PARSE_WORKERS", "2"))
+    # Chapters are inserted as they are parsed, in batches bounded by count
+    # and by content size, so memory use does not grow with the book
+    INSERT_BATCH_CHAPTERS = int(os.getenv("INGEST_BATCH_CHAPTERS", "64"))
+    INSERT_BATCH_BYTES = int(os.getenv("INGEST_BATCH_BYTES", str(8 * 2**20)))
+    # Register chapters from the table of contents only and extract their
+    # bodies on first read or in a background backfill
+    LAZY_PARSE = os.getenv("UPLOAD_LAZY_PARSE", "false").lower() == "true"
+
+    _parse_executor: ThreadPoolExecutor | None = None
+
+    @classmethod
+    def get_parse_executor(cls) -> ThreadPoolExecutor:
+        """
+        Get the shared worker pool used for parsing uploads.
+
+        The pool size bounds how many uploads are processed at once; additional
+        uploads wait in the pool's queue instead of running on the event loop.
+        """
+        if cls._parse_executor is None:
+            cls._parse_executor = ThreadPoolExecutor(
+                max_workers=cls.PARSE_WORKERS, thread_name_prefix="book-parse"
+            )
+        return cls._parse_executor
+
+    @classmethod
+    async def save_upload(cls, file: UploadFile, file_path: Path) -> tuple[int, str]:
+        """
+        Stream an uploaded file to disk in chunks without blocking the event loop,
+        hashing it on the way
+
+        Args:
+            file: The uploaded file
+            file_path: Destination path
+
+        Returns:
+            Tuple of (bytes written, SHA-256 hex digest)
+        """
+        size = 0
+        digest = hashlib.sha256()
+        # Opening and closing (which flushes) touch the disk too
+        f = await asyncio.to_thread(open, file_path, "wb")
+        try:
+            while chunk := await file.read(cls.CHUNK_SIZE):
+                await asyncio.to_thread(cls._write_chunk, f, digest, chunk)
+                size += len(chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def _write_chunk(f: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+        digest.update(chunk)
+        f.write(chunk)
+
+    @classmethod
+    def blob_path(cls, content_hash: str, suffix: str) -> Path:
+        """Content-addressed location of an uploaded book"""
+        return cls.BLOB_DIR / content_hash[:2] / f"{content_hash}{suffix}"
+
+    @staticmethod
+    def unsupported_format_message() -> str:
+        return (
+            f"Invalid file type. Supported formats: {', '.join(supported_extensions())}"
+        )
 
     @staticmethod
-    async def extract_chapter_names(epub_path: Path) -> list[str]:
+    def find_ingested_book(
+        content_hash: str, db: Session
+    ) -> tuple[int, list[str]] | None:
         """
-        Extract chapter names from an EPUB file using the table of contents asynchronously
+        Look up a book that was already ingested from identical file contents
 
         Args:
-            epub_path: Path to the EPUB file
+            content_hash: SHA-256 hex digest of the uploaded file
+            db: Database session
 
         Returns:
-            List of chapter names
+            Tuple of (book_id, chapter titles in order), or None if not ingested
         """
+        book_id = db.scalar(select(Book.id).where(Book.content_hash == content_hash))
+        if book_id is None:
+            return None
 
-        def _extract_chapters() -> list[str]:
-            book = epub.read_epub(str(epub_path))
-            chapters: list[str] = []
+        titles = db.scalars(
+            select(Chapter.title)
+            .where(Chapter.book_id == book_id)
+            .order_by(Chapter.order)
+        ).all()
+        return book_id, list(titles)
 
-            # Extract chapters from table of contents
-            for item in book.toc:
-                title: str | None = None
-                if isinstance(item, tuple):
-                    title = item[0].title
-                else:
-                    title = item.title
+    @staticmethod
+    def extract_chapters(
+        path: Path, parallel: bool = True, fallback_title: str | None = None
+    ) -> Iterator[ParsedChapter]:
+        """
+        Extract chapter titles and content from a book, one chapter at a time
+
+        The parser is chosen by file extension from backend.parsers.registry.
+        Chapters without text are skipped.
+
+        Args:
+            path: Path to the book file
+            parallel: Allow fanning out to a process pool; pass False when
+                already running in a worker process
+            fallback_title: Title for text before the first heading; defaults
+                to the stored file's name
 
-                if title and title.strip():
-                    chapters.append(title.strip())
+        Yields:
+            (title, content) per chapter, in reading order
 
-            # If TOC is empty, fall back to scanning epub items
-            if not chapters:
-                for item in book.get_items():
-                    if isinstance(item, epub.EpubHtml):
-                        soup = BeautifulSoup(item.get_body_content(), "html.parser")
-                        for heading in soup.find_all(["h1", "h2", "h3"]):
-                            heading_text = heading.text
-                            if heading_text and heading_text.strip():
-                                chapters.append(heading_text.strip())
+        Raises:
+            ValueError: If the format is not supported
+        """
+        parser = parser_for(path.name)
+        if parser is None:
+            raise ValueError(f"Unsupported book format: {path.suffix or path.name}")
+        for title, content in parser.iter_chapters(path, parallel, fallback_title):
+            if content:
+                logger.debug(
+                    f"Extracted chapter '{title}' with {len(content)} characters"
+                )
+                yield title, content
 
-            return chapters
+    @classmethod
+    def take_batch(cls, chapters: Iterator[ParsedChapter]) -> list[ParsedChapter]:
+        """
+        Pull the next insert batch from a chapter iterator
 
-        # Run CPU-intensive work in a thread pool and await the result
-        return await asyncio.to_thread(_extract_chapters)
+        Returns:
+            Up to INSERT_BATCH_CHAPTERS chapters, fewer once their content
+            reaches INSERT_BATCH_BYTES; empty when the iterator is exhausted
+        """
+        batch: list[ParsedChapter] = []
+        size = 0
+        for chapter in chapters:
+            batch.append(chapter)
+            size += len(chapter[1])
+            if (
+                len(batch) >= cls.INSERT_BATCH_CHAPTERS
+                or size >= cls.INSERT_BATCH_BYTES
+            ):
+                break
+        return batch
 
     @staticmethod
-    def extract_chapters(epub_path: Path) -> dict[str, str]:
+    def extract_chapter_texts(epub_path: Path | str, hrefs: list[str]) -> list[str]:
         """
-        Extract chapter titles and content from an EPUB file
+        Extract the text of individual chapters, reading only their zip members
 
         Args:
             epub_path: Path to the EPUB file
+            hrefs: Zip member names of the chapters
 
         Returns:
-            Dictionary mapping chapter titles to their content
-        """
-        book = epub.read_epub(str(epub_path), {"ignore_ncx": True})
-        chapters: dict[str, str] = {}
-
-        for item in book.get_items():
-            if isinstance(item, epub.EpubHtml):
-                soup = BeautifulSoup(item.get_body_content(), "html.parser")
-
-                # Extract title from headings
-                title = None
-                for heading in soup.find_all(["h1", "h2", "h3"]):
-                    if heading.text.strip():
-                        title = heading.text.strip()
-                        # Remove the heading from the soup so it's not included in content
-                        heading.decompose()
-                        break
-
-                # If no heading found, use item ID as title
-                if not title:
-                    title = item.id
-
-                # Extract and clean content, excluding the title
-                content = soup.get_text().strip()
-
-                # Only add if we have actual content
-                if content:
-                    logger.debug(
-                        f"Extracted chapter '{title}' with {len(content)} characters"
-                    )
-                    chapters[title] = content
-
-        return chapters
+            Chapter contents, in the order of ``hrefs``
+        """
+        with zipfile.ZipFile(epub_path) as archive:
+            return [
+                extract_title_and_text(archive.read(href), href)[1] for href in hrefs
+            ]
 
     @staticmethod
-    def save_book_data(filename: str, chapters: dict[str, str], db: Session) -> Book:
-        """Save book and chapter data to database"""
+    def _create_book(
+        filename: str, db: Session, file_path: Path | None, content_hash: str | None
+    ) -> Book:
         book = Book(
             title=filename,
-            file_path=str(UploadController.UPLOAD_DIR / filename),
+            file_path=str(file_path or UploadController.UPLOAD_DIR / filename),
+            content_hash=content_hash,
         )
         db.add(book)
         db.flush()
+        return book
 
-        # Create chapter records with content
-        for index, (chapter_title, chapter_content) in enumerate(chapters.items(), 1):
-            print(f"Chapter Length: {len(chapter_content)}")
-            chapter = Chapter(
-                book_id=book.id,
-                title=chapter_title,
-                content=chapter_content,
-                order=index,
+    @staticmethod
+    def save_chapters(
+        book_id: int,
+        chapters: list[ParsedChapter],
+        first_order: int,
+        db: Session,
+        compress: bool | None = None,
+        index: bool = False,
+    ) -> None:
+        """
+        Insert a batch of a book's chapters with one bulk INSERT
+
+        Args:
+            book_id: ID of the book
+            chapters: (title, content) pairs, in reading order
+            first_order: Position of the first chapter in the book, from 1
+            db: Database session
+            compress: Override CHAPTER_CONTENT_COMPRESSION
+            index: Embed the batch into the similarity index in the
+                background once the transaction commits. Only for the app's
+                own database: the index is keyed by chapter ID
+        """
+        rows = [
+            {
+                "book_id": book_id,
+                "order": order,
+                # Titles are bounded by the column; headings can be arbitrarily long
+                **content_params(content, title[:255], compress),
+            }
+            for order, (title, content) in enumerate(chapters, first_order)
+        ]
+        chapter_ids = db.scalars(
+            insert(Chapter)
+            .values(**content_values())
+            .returning(Chapter.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        if index:
+            SimilarityController.schedule_after_commit(
+                db,
+                SimilarityController.index_chapters,
+                list(chapter_ids),
+                [content for _, content in chapters],
             )
-            db.add(chapter)
 
-        db.commit()
-        logger.info(f"Book and chapters saved for {filename}")
+    @classmethod
+    @timed("save_book_data")
+    def save_book_data(
+        cls,
+        filename: str,
+        chapters: Mapping[str, str] | Iterable[ParsedChapter],
+        db: Session,
+        file_path: Path | None = None,
+        content_hash: str | None = None,
+        compress: bool | None = None,
+        commit: bool = True,
+        index: bool = False,
+    ) -> Book:
+        """
+        Save book and chapter data to database in a single transaction
+
+        Chapters are consumed from the iterable in batches (see take_batch), each
+        written with one bulk INSERT (batched by SQLAlchemy's insertmanyvalues)
+        instead of one ORM object per row, so a generator from extract_chapters
+        is persisted without holding the whole book. Content is stored
+        compressed when CHAPTER_CONTENT_COMPRESSION=zlib, unless ``compress``
+        overrides it. Pass ``commit=False`` to batch several books into the
+        caller's transaction, and ``index=True`` to add the chapters to the
+        similarity index (see save_chapters).
+        """
+        if isinstance(chapters, Mapping):
+            chapters = chapters.items()
+        chapters = iter(chapters)
+        book = cls._create_book(filename, db, file_path, content_hash)
+        saved = 0
+        while batch := cls.take_batch(chapters):
+            cls.save_chapters(book.id, batch, saved + 1, db, compress, index)
+            saved += len(batch)
+
+        if commit:
+            db.commit()
+        logger.info(f"Book and {saved} chapters saved for {filename}")
         return book
 
     @classmethod
-    async def handle_epub_upload(
-        cls, file: UploadFile, db: Session
-    ) -> tuple[bool, str, str | None, list[str], int | None]:
+    @timed("save_book_toc")
+    def save_book_toc(
+        cls,
+        filename: str,
+        spine: list[SpineItem],
+        db: Session,
+        file_path: Path | None = None,
+        content_hash: str | None = None,
+        commit: bool = True,
+    ) -> Book:
         """
-        Handle the upload of an EPUB file and extract chapter data
+        Save a book and its chapters without content, in a single transaction
+
+        Each chapter records the zip member it is read from; its content columns
+        stay NULL until ChapterController extracts it.
+        """
+        book = cls._create_book(filename, db, file_path, content_hash)
+        if spine:
+            db.execute(
+                # Indexes the titles until the content is extracted
+                insert(Chapter).values(**content_values()),
+                [
+                    # Titles are bounded by the column; TOC labels can be
+                    # arbitrarily long
+                    {
+                        "book_id": book.id,
+                        "source_href": item.href,
+                        "order": index,
+                        **content_params(None, item.title[:255]),
+                    }
+                    for index, item in enumerate(spine, 1)
+                ],
+            )
+
+        if commit:
+            db.commit()
+        logger.info(f"Book and {len(spine)} chapters saved for {filename}")
+        return book
+
+    @classmethod
+    async def stream_book_data(
+        cls,
+        filename: str,
+        file_path: Path,
+        content_hash: str,
+        db: AsyncSession,
+        timer: StageTimer,
+    ) -> tuple[Book, list[str]]:
+        """
+        Parse a stored book and persist its chapters as they are produced
+
+        The parser runs in the shared parse pool a batch at a time, reading the
+        next batch while the current one is inserted through the async
+        session, so at most two batches of chapters are in memory whatever the
+        size of the book. Everything is committed in one transaction.
+
+        Args:
+            filename: Name of the uploaded file, used as the book title
+            file_path: Where the book is stored
+            content_hash: SHA-256 of the file
+            db: Database session
+            timer: Collects the time spent waiting on the parser ("parse") and
+                on the database ("persist")
+
+        Returns:
+            Tuple of (the book, chapter titles in order)
+
+        Raises:
+            IntegrityError: If a book with this content hash was saved meanwhile
+        """
+        loop = asyncio.get_running_loop()
+        executor = cls.get_parse_executor()
+        chapters = cls.extract_chapters(file_path, fallback_title=Path(filename).stem)
+        titles: list[str] = []
+        parse_seconds = 0.0
+        pending = loop.run_in_executor(executor, cls.take_batch, chapters)
+        try:
+            with timer.stage("persist"):
+                book = await db.run_sync(
+                    lambda session: cls._create_book(
+                        filename, session, file_path, content_hash
+                    )
+                )
+            while True:
+                start = time.perf_counter()
+                with timer.stage("parse"):
+                    batch = await pending
+                parse_seconds += time.perf_counter() - start
+                if not batch:
+                    break
+                # Parse the next batch while this one is written
+                pending = loop.run_in_executor(executor, cls.take_batch, chapters)
+                first_order = len(titles) + 1
+                with timer.stage("persist"):
+                    await db.run_sync(
+                        lambda session, batch=batch, first=first_order: (
+                            cls.save_chapters(
+                                book.id,
+                                batch,
+                                first,
+                                session,
+                                index=SimilarityController.INDEX_ON_SAVE,
+                            )
+                        )
+                    )
+                titles.extend(title for title, _ in batch)
+            with timer.stage("persist"):
+                await db.commit()
+        finally:
+            # The generator cannot be closed while a pool thread is running it
+            with contextlib.suppress(Exception):
+                await pending
+            chapters.close()
+        record_stage("extract_chapters", parse_seconds)
+        logger.info(f"Book and {len(titles)} chapters saved for {filename}")
+        return book, titles
+
+    @staticmethod
+    def _deduplicated_response(
+        filename: str, existing: tuple[int, list[str]], timer: StageTimer
+    ) -> UploadResponse:
+        book_id, chapter_titles = existing
+        logger.info(
+            f"Upload of {filename} matches book {book_id}, skipping ingestion "
+            f"timings_ms={timer.timings}"
+        )
+        return UploadResponse(
+            filename=filename,
+            success=True,
+            message="File uploaded successfully",
+            chapters=chapter_titles,
+            book_id=book_id,
+            deduplicated=True,
+            timings=timer.timings,
+        )
+
+    @classmethod
+    async def handle_upload(
+        cls, file: UploadFile, db: AsyncSession, lazy: bool | None = None
+    ) -> UploadResponse:
+        """
+        Handle the upload of a book and extract chapter data
+
+        The format is picked from the file extension, or else the content type,
+        by backend.parsers.registry. The file is streamed to disk and hashed,
+        then parsed in the shared parse pool while its chapters are persisted
+        through the async session, so the event loop stays free to serve other
+        requests and memory use does not grow with the book.
+        Files are stored content-addressed by SHA-256; re-uploading a file that
+        was already ingested returns the existing book without parsing it again.
+
+        In lazy mode (EPUB only) only the package document and nav/NCX are
+        read, so the upload returns after parsing the table of contents;
+        chapter bodies are extracted on first read and by a background backfill.
 
         Args:
             file: The uploaded file
             db: Database session
+            lazy: Use lazy ingestion; defaults to UPLOAD_LAZY_PARSE
 
         Returns:
-            tuple: (success status, filename, optional error message, chapter titles, book_id)
+            UploadResponse with chapter titles, book_id and per-stage timings (ms)
         """
+        filename = file.filename or "unknown"
+        timer = StageTimer()
         try:
             if file.filename is None:
-                return False, "unknown", "No filename provided", [], None
+                return UploadResponse(
+                    filename=filename, success=False, message="No filename provided"
+                )
 
             # Create upload directory if it doesn't exist
             cls.UPLOAD_DIR.mkdir(exist_ok=True)
 
-            # Validate file extension
-            if not file.filename.lower().endswith(cls.ALLOWED_EXTENSION):
-                return (
-                    False,
-                    file.filename,
-                    "Invalid file type. Only EPUB files are allowed.",
-                    [],
-                    None,
+            parser = parser_for(file.filename, file.content_type)
+            if parser is None:
+                return UploadResponse(
+                    filename=filename,
+                    success=False,
+                    message=cls.unsupported_format_message(),
                 )
 
-            # Save the file
-            file_path = cls.UPLOAD_DIR / file.filename
-            content = await file.read()  # Use async read for UploadFile
-
-            with open(file_path, "wb") as f:
-                f.write(content)
+            # Save the file under a temporary name while it is hashed
+            tmp_path = cls.UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+            try:
+                with timer.stage("receive"):
+                    size, content_hash = await cls.save_upload(file, tmp_path)
 
-            # Extract chapter data
-            chapters = cls.extract_chapters(file_path)
-
-            # Save to database
-            book = cls.save_book_data(file.filename, chapters, db)
-
-            return True, file.filename, None, list(chapters.keys()), book.id
+                # Identical file already ingested: skip parsing and DB writes
+                existing = await db.run_sync(
+                    lambda session: cls.find_ingested_book(content_hash, session)
+                )
+                if existing:
+                    return cls._deduplicated_response(filename, existing, timer)
+
+                # Stored under the parser's extension, which selects it again
+                file_path = cls.blob_path(content_hash, parser.extensions[0])
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.replace(file_path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+            lazy = (cls.LAZY_PARSE if lazy is None else lazy) and parser.supports_lazy
+            try:
+                if lazy:
+                    book, titles = await cls._save_toc(
+                        file.filename, file_path, content_hash, db, timer
+                    )
+                else:
+                    book, titles = await cls.stream_book_data(
+                        file.filename, file_path, content_hash, db, timer
+                    )
+            except IntegrityError:
+                # A concurrent upload of the same file won the race
+                await db.rollback()
+                existing = await db.run_sync(
+                    lambda session: cls.find_ingested_book(content_hash, session)
+                )
+                if not existing:
+                    raise
+                return cls._deduplicated_response(filename, existing, timer)
+
+            logger.info(
+                f"Ingested {filename} ({size} bytes, {len(titles)} chapters, "
+                f"format={parser.name}, lazy={lazy}) timings_ms={timer.timings}",
+                extra={"timings": timer.timings},
+            )
+            return UploadResponse(
+                filename=filename,
+                success=True,
+                message="File uploaded successfully",
+                chapters=titles,
+                book_id=book.id,
+                lazy=lazy,
+                timings=timer.timings,
+            )
 
         except Exception as e:
-            return (
-                False,
-                str(file.filename or "unknown"),
-                f"Error uploading file: {str(e)}",
-                [],
-                None,
+            return UploadResponse(
+                filename=filename,
+                success=False,
+                message=f"Error uploading file: {str(e)}",
+                timings=timer.timings,
+            )
+
+    @classmethod
+    async def _save_toc(
+        cls,
+        filename: str,
+        file_path: Path,
+        content_hash: str,
+        db: AsyncSession,
+        timer: StageTimer,
+    ) -> tuple[Book, list[str]]:
+        """Register an EPUB's chapters from its table of contents only"""
+        with timer.stage("parse"):
+            spine = await asyncio.get_running_loop().run_in_executor(
+                cls.get_parse_executor(), read_spine, file_path
+            )
+        # SQL runs on the async driver, not a thread
+        with timer.stage("persist"):
+            book = await db.run_sync(
+                lambda session: cls.save_book_toc(
+                    filename, spine, session, file_path, content_hash
+                )
             )
+        return book, [item.title for item in spine]
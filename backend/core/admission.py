@@ -0,0 +1,230 @@
+import asyncio
+import math
+import os
+import re
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.metrics import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUED,
+    ADMISSION_REJECTED,
+)
+
+# Largest request body accepted by the upload endpoints; 0 disables the check
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 2**20)))
+# Bounds for the Retry-After estimate, in seconds
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 300
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded wait queue for one kind of request
+
+    Up to ``max_concurrency`` requests run at once and up to ``max_queue`` more
+    wait, each for at most ``queue_timeout`` seconds, for a slot. Anything
+    beyond that is rejected straight away, so a burst cannot pile up work (and
+    memory) without bound. Limits are per worker process.
+    """
+
+    def __init__(
+        self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float
+    ) -> None:
+        """
+        Args:
+            name: Operation name, used as the metrics label
+            max_concurrency: Requests handled at once; 0 or less disables the limit
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait before it is rejected
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        # Moving average of how long a request holds its slot
+        self.service_time = 1.0
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        ADMISSION_IN_FLIGHT.set(0, operation=name)
+        ADMISSION_QUEUED.set(0, operation=name)
+
+    @classmethod
+    def from_env(
+        cls, name: str, max_concurrency: int, max_queue: int
+    ) -> "AdmissionLimiter":
+        """Read the limits from <NAME>_MAX_CONCURRENCY, _MAX_QUEUE and _QUEUE_TIMEOUT"""
+        prefix = name.upper()
+        return cls(
+            name,
+            max_concurrency=int(
+                os.getenv(f"{prefix}_MAX_CONCURRENCY", str(max_concurrency))
+            ),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", str(max_queue))),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", "10")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot
+
+        Returns:
+            False if the queue is full or the wait timed out
+        """
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            return False
+        self.queued += 1
+        ADMISSION_QUEUED.inc(operation=self.name)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except TimeoutError:
+            return False
+        finally:
+            self.queued -= 1
+            ADMISSION_QUEUED.dec(operation=self.name)
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.inc(operation=self.name)
+        return True
+
+    def release(self, held: float) -> None:
+        """Free a slot held for ``held`` seconds"""
+        self.service_time = 0.8 * self.service_time + 0.2 * held
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec(operation=self.name)
+        self._semaphore.release()
+
+    def retry_after(self) -> int:
+        """Seconds until the work ahead of a new request has likely drained"""
+        waves = (self.queued + self.in_flight) / max(self.max_concurrency, 1)
+        estimate = math.ceil(self.service_time * max(waves, 1))
+        return min(max(estimate, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+
+UPLOAD_LIMITER = AdmissionLimiter.from_env("upload", max_concurrency=4, max_queue=8)
+SUMMARIZE_LIMITER = AdmissionLimiter.from_env(
+    "summarize", max_concurrency=16, max_queue=32
+)
+
+# Expensive operations, by method and path; everything else is never limited,
+# so chapter reads stay fast while uploads or summaries are saturated
+LIMITED_ROUTES = [
+    ("POST", re.compile(r"/upload"), UPLOAD_LIMITER),
+    ("POST", re.compile(r"/books/\d+/reingest"), UPLOAD_LIMITER),
+    ("POST", re.compile(r"/chapters/\d+/summarize(/stream)?"), SUMMARIZE_LIMITER),
+]
+
+
+def limiter_for(method: str, path: str) -> AdmissionLimiter | None:
+    for route_method, pattern, limiter in LIMITED_ROUTES:
+        if method == route_method and pattern.fullmatch(path):
+            return limiter
+    return None
+
+
+def too_large_response() -> JSONResponse:
+    return JSONResponse(
+        {"detail": f"Upload exceeds the maximum size of {MAX_UPLOAD_BYTES} bytes"},
+        status_code=413,
+    )
+
+
+class BodyLimit:
+    """
+    Per-request receive/send wrappers that cut an upload off at MAX_UPLOAD_BYTES
+
+    Once the streamed body passes the limit the 413 is sent right away and the
+    app sees a client disconnect, which ends its body parsing; whatever it
+    sends afterwards is dropped.
+    """
+
+    def __init__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.received = 0
+        self.exceeded = False
+
+    async def receive(self) -> Message:
+        if self.exceeded:
+            return {"type": "http.disconnect"}
+        message = await self._receive()
+        if message["type"] == "http.request":
+            self.received += len(message.get("body", b""))
+            if self.received > MAX_UPLOAD_BYTES:
+                self.exceeded = True
+                ADMISSION_REJECTED.inc(operation="upload", reason="too_large")
+                await too_large_response()(self.scope, self._receive, self._send)
+                return {"type": "http.disconnect"}
+        return message
+
+    async def send(self, message: Message) -> None:
+        if not self.exceeded:
+            await self._send(message)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying admission control to expensive operations
+
+    Requests over capacity get a 503 with a Retry-After header instead of
+    queueing without bound. Upload bodies larger than MAX_UPLOAD_BYTES are
+    refused with a 413, from Content-Length when the client sends it and
+    otherwise as soon as the streamed body passes the limit. Slots are held
+    until the response, streamed or not, is complete.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter = None
+        if scope["type"] == "http":
+            limiter = limiter_for(scope["method"], scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        body_limit = None
+        if limiter is UPLOAD_LIMITER and MAX_UPLOAD_BYTES > 0:
+            content_length = dict(scope["headers"]).get(b"content-length", b"")
+            if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES:
+                ADMISSION_REJECTED.inc(operation=limiter.name, reason="too_large")
+                await too_large_response()(scope, receive, send)
+                return
+            body_limit = BodyLimit(scope, receive, send)
+            receive, send = body_limit.receive, body_limit.send
+
+        if not limiter.enabled:
+            await self._call_app(scope, receive, send, body_limit)
+            return
+        if not await limiter.acquire():
+            ADMISSION_REJECTED.inc(operation=limiter.name, reason="overloaded")
+            response = JSONResponse(
+                {"detail": f"Too many {limiter.name} requests, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(limiter.retry_after())},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self._call_app(scope, receive, send, body_limit)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+    async def _call_app(
+        self, scope: Scope, receive: Receive, send: Send, body_limit: BodyLimit | None
+    ) -> None:
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            # Parsing fails on the disconnect that stopped an oversized upload
+            if body_limit is None or not body_limit.exceeded:
+                raise
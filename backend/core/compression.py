@@ -0,0 +1,45 @@
+import hashlib
+import os
+import zlib
+
+# "zlib" stores new chapter content compressed in chapters.content_compressed;
+# "none" keeps it as plain text in chapters.content
+CONTENT_COMPRESSION = os.getenv("CHAPTER_CONTENT_COMPRESSION", "none").lower()
+ZLIB_LEVEL = int(os.getenv("CHAPTER_CONTENT_ZLIB_LEVEL", "6"))
+
+
+def compress_text(text: str, level: int = ZLIB_LEVEL) -> bytes:
+    return zlib.compress(text.encode("utf-8"), level)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of chapter content, used to tell which chapters an edition changed"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_columns(text: str | None, compress: bool | None = None) -> dict:
+    """
+    Column values that store chapter content in the configured format
+
+    Args:
+        text: Chapter content
+        compress: Override CHAPTER_CONTENT_COMPRESSION
+
+    Returns:
+        Dict with ``content`` and ``content_compressed``, exactly one of them
+        set (both None when ``text`` is None), and the text's ``content_hash``
+    """
+    if compress is None:
+        compress = CONTENT_COMPRESSION == "zlib"
+    content_hash = None if text is None else hash_text(text)
+    if compress and text is not None:
+        return {
+            "content": None,
+            "content_compressed": compress_text(text),
+            "content_hash": content_hash,
+        }
+    return {"content": text, "content_compressed": None, "content_hash": content_hash}
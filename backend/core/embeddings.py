@@ -0,0 +1,83 @@
+import importlib
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+
+# "module:Class" of the embedder used for the similarity index
+EMBEDDER = os.getenv("SIMILARITY_EMBEDDER", "backend.core.embeddings:HashingEmbedder")
+EMBEDDING_DIM = int(os.getenv("SIMILARITY_DIM", "384"))
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]{3,}")
+STOP_WORDS = frozenset(
+    "the and for that with was his her she they them this from have had not but "
+    "are were you your all one would there their what which when who will been "
+    "has him out into said could than then its our can did about over more only "
+    "some very just like upon".split()
+)
+
+
+class Embedder(Protocol):
+    """Turns chapter texts into fixed-size vectors for the similarity index"""
+
+    # Recorded with the index; changing it requires a rebuild
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """
+        Args:
+            texts: Chapter contents
+
+        Returns:
+            float32 array of shape (len(texts), dim) with L2-normalized rows, so
+            dot products are cosine similarities
+        """
+        ...
+
+
+@lru_cache(maxsize=1 << 17)
+def _bucket(token: str, dim: int) -> tuple[int, float]:
+    # crc32 is stable across processes, unlike hash()
+    digest = zlib.crc32(token.encode("utf-8"))
+    return digest % dim, 1.0 if digest & 0x80000000 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Local bag-of-words embedder using the hashing trick
+
+    Each word (lowercased, three letters or more, minus stop words) is hashed to
+    one of ``dim`` signed buckets and weighted by 1 + log(term frequency), which
+    damps words a chapter repeats. No vocabulary or network access is needed.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(
+                token
+                for token in TOKEN_PATTERN.findall(text.lower())
+                if token not in STOP_WORDS
+            )
+            for token, count in counts.items():
+                bucket, sign = _bucket(token, self.dim)
+                vectors[row, bucket] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def load_embedder(spec: str = EMBEDDER) -> Embedder:
+    """Instantiate the embedder named by a "module:Class" string"""
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
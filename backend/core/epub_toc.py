@@ -0,0 +1,148 @@
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import unquote, urldefrag
+from xml.etree import ElementTree
+
+CONTAINER_PATH = "META-INF/container.xml"
+NCX_MEDIA_TYPE = "application/x-dtbncx+xml"
+HTML_MEDIA_TYPES = frozenset({"application/xhtml+xml", "text/html"})
+
+
+class SpineItem(NamedTuple):
+    """A readable document of an EPUB, in reading order"""
+
+    item_id: str
+    # Zip member name of the document
+    href: str
+    # Title from the nav document or NCX, or the item id when it is not listed
+    title: str
+
+
+def _local_name(tag: str) -> str:
+    """Tag name without its ``{namespace}`` prefix"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _iter_local(element: ElementTree.Element, name: str):
+    return (el for el in element.iter() if _local_name(el.tag) == name)
+
+
+def _resolve(base_dir: str, href: str) -> str:
+    """Zip member name of a manifest href, relative to the referencing file"""
+    path, _ = urldefrag(href)
+    return posixpath.normpath(posixpath.join(base_dir, unquote(path)))
+
+
+def _opf_path(archive: zipfile.ZipFile) -> str:
+    container = ElementTree.fromstring(archive.read(CONTAINER_PATH))
+    for rootfile in _iter_local(container, "rootfile"):
+        if rootfile.get("full-path"):
+            return rootfile.get("full-path")
+    raise ValueError("EPUB container does not reference a package document")
+
+
+def _nav_titles(archive: zipfile.ZipFile, nav_path: str) -> dict[str, str]:
+    """Map document paths to titles from an EPUB 3 nav document's toc"""
+    nav_doc = ElementTree.fromstring(archive.read(nav_path))
+    navs = list(_iter_local(nav_doc, "nav"))
+    toc = next(
+        (
+            nav
+            for nav in navs
+            if any(
+                _local_name(key) == "type" and "toc" in value.split()
+                for key, value in nav.attrib.items()
+            )
+        ),
+        navs[0] if navs else None,
+    )
+    titles: dict[str, str] = {}
+    if toc is None:
+        return titles
+
+    base_dir = posixpath.dirname(nav_path)
+    for link in _iter_local(toc, "a"):
+        href = link.get("href")
+        title = " ".join("".join(link.itertext()).split())
+        if href and title:
+            titles.setdefault(_resolve(base_dir, href), title)
+    return titles
+
+
+def _ncx_titles(archive: zipfile.ZipFile, ncx_path: str) -> dict[str, str]:
+    """Map document paths to titles from an EPUB 2 NCX navMap"""
+    ncx = ElementTree.fromstring(archive.read(ncx_path))
+    base_dir = posixpath.dirname(ncx_path)
+    titles: dict[str, str] = {}
+    for nav_point in _iter_local(ncx, "navPoint"):
+        content = next(_iter_local(nav_point, "content"), None)
+        label = next(_iter_local(nav_point, "text"), None)
+        if content is None or label is None or not content.get("src"):
+            continue
+        title = " ".join("".join(label.itertext()).split())
+        if title:
+            titles.setdefault(_resolve(base_dir, content.get("src")), title)
+    return titles
+
+
+def read_spine(epub_path: Path) -> list[SpineItem]:
+    """
+    Read an EPUB's reading order and chapter titles without parsing any chapter
+
+    Only the container, the package document (OPF) and the nav document or
+    NCX are read from the archive.
+
+    Args:
+        epub_path: Path to the EPUB file
+
+    Returns:
+        HTML documents of the spine, in reading order
+    """
+    with zipfile.ZipFile(epub_path) as archive:
+        opf_path = _opf_path(archive)
+        opf_dir = posixpath.dirname(opf_path)
+        package = ElementTree.fromstring(archive.read(opf_path))
+
+        manifest: dict[str, tuple[str, str, str]] = {}
+        nav_path = ncx_path = None
+        for item in _iter_local(package, "item"):
+            item_id, href = item.get("id"), item.get("href")
+            if not item_id or not href:
+                continue
+            path = _resolve(opf_dir, href)
+            media_type = item.get("media-type", "")
+            manifest[item_id] = (path, media_type, item.get("properties", ""))
+            if "nav" in item.get("properties", "").split():
+                nav_path = path
+            elif media_type == NCX_MEDIA_TYPE:
+                ncx_path = path
+
+        spine = next(_iter_local(package, "spine"), None)
+        if spine is None:
+            raise ValueError("EPUB package document has no spine")
+        if spine.get("toc") in manifest:
+            ncx_path = manifest[spine.get("toc")][0]
+
+        titles: dict[str, str] = {}
+        members = set(archive.namelist())
+        for toc_path, read_titles in ((nav_path, _nav_titles), (ncx_path, _ncx_titles)):
+            if toc_path in members:
+                try:
+                    titles = read_titles(archive, toc_path)
+                except ElementTree.ParseError:
+                    continue
+                if titles:
+                    break
+
+    items: list[SpineItem] = []
+    for itemref in _iter_local(spine, "itemref"):
+        item_id = itemref.get("idref")
+        if item_id not in manifest:
+            continue
+        path, media_type, properties = manifest[item_id]
+        if media_type not in HTML_MEDIA_TYPES or "nav" in properties.split():
+            continue
+        items.append(SpineItem(item_id, path, titles.get(path, item_id)))
+    return items
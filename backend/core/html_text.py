@@ -0,0 +1,132 @@
+from html.parser import HTMLParser
+
+HEADING_TAGS = frozenset({"h1", "h2", "h3"})
+# Text inside these elements is not part of the readable chapter text; <head>
+# only appears when a whole XHTML document is parsed rather than its body
+SKIPPED_TAGS = frozenset({"head", "script", "style", "template"})
+PRESERVE_WHITESPACE_TAGS = frozenset({"pre", "textarea"})
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+
+class ChapterTextParser(HTMLParser):
+    """
+    Single-pass HTML tokenizer that finds the chapter title and collects its text.
+
+    Unlike BeautifulSoup, no DOM is built: text is appended as it is tokenized.
+    The first h1/h2/h3 with non-blank text becomes the title and, unless
+    ``keep_title`` is set, its text is left out of the content.
+    """
+
+    def __init__(self, keep_title: bool = False) -> None:
+        super().__init__(convert_charrefs=True)
+        self.keep_title = keep_title
+        self.title: str | None = None
+        self._parts: list[str] = []
+        self._heading_parts: list[str] | None = None
+        self._heading_tag: str | None = None
+        self._heading_depth = 0
+        self._skip_depth = 0
+        self._preserve_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == self._heading_tag:
+            self._heading_depth += 1
+        elif self.title is None and self._heading_tag is None and tag in HEADING_TAGS:
+            self._heading_tag = tag
+            self._heading_depth = 1
+            self._heading_parts = []
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        # Self-closing tags (<br/>, <img/>) carry no text
+        pass
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth = max(self._preserve_depth - 1, 0)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == self._heading_tag:
+            self._heading_depth -= 1
+            if self._heading_depth == 0:
+                self._close_heading()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        # Collapse whitespace-only runs between tags the way BeautifulSoup does
+        if not self._preserve_depth and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        if self._heading_parts is not None:
+            self._heading_parts.append(data)
+        else:
+            self._parts.append(data)
+
+    def unknown_decl(self, data: str) -> None:
+        # CDATA sections are readable text; other declarations are not
+        if data.startswith("CDATA["):
+            self.handle_data(data[len("CDATA[") :])
+
+    def _close_heading(self) -> None:
+        heading_parts = self._heading_parts or []
+        heading_text = "".join(heading_parts).strip()
+        if heading_text:
+            self.title = heading_text
+            if self.keep_title:
+                self._parts.extend(heading_parts)
+        else:
+            # Blank headings stay in the content, like any other element
+            self._parts.extend(heading_parts)
+        self._heading_parts = None
+        self._heading_tag = None
+        self._heading_depth = 0
+
+    def close(self) -> None:
+        super().close()
+        if self._heading_parts is not None:
+            self._close_heading()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts).strip()
+
+
+def extract_title_and_text(
+    html: bytes | str, fallback_title: str, keep_title: bool = False
+) -> tuple[str, str]:
+    """
+    Extract the chapter title and plain-text content from an HTML document
+
+    Args:
+        html: HTML markup (bytes are decoded as UTF-8)
+        fallback_title: Title used when the document has no non-blank heading
+        keep_title: Keep the heading text in the content instead of removing it
+
+    Returns:
+        Tuple of (title, content)
+    """
+    if isinstance(html, bytes):
+        html = html.decode("utf-8", errors="replace")
+
+    parser = ChapterTextParser(keep_title=keep_title)
+    parser.feed(html)
+    parser.close()
+    return parser.title or fallback_title, parser.text
+
+
+def parse_chapter_item(item: tuple[str, bytes]) -> tuple[str, str]:
+    """
+    Process pool entry point: parse one ``(fallback_title, html)`` pair
+
+    Args:
+        item: Tuple of the title to use when the document has no heading (its
+            table of contents entry or item id) and the document's HTML
+
+    Returns:
+        Tuple of (title, content)
+    """
+    fallback_title, html = item
+    return extract_title_and_text(html, fallback_title)
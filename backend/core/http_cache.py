@@ -0,0 +1,87 @@
+import hashlib
+import os
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple
+
+from fastapi import Request, Response
+
+# max-age for cacheable reads; 0 makes clients revalidate every time, which
+# costs a 304 instead of a full body
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+
+class CachedResponse(NamedTuple):
+    """A serialized JSON response body with its validators"""
+
+    body: bytes
+    etag: str
+    last_modified: datetime | None
+
+
+def make_etag(*parts: object) -> str:
+    """Strong ETag derived from the values that determine a representation"""
+    digest = hashlib.sha256(":".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Timestamps are stored naive, in UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.replace(microsecond=0)
+
+
+def cache_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": (
+            f"public, max-age={MAX_AGE}, must-revalidate" if MAX_AGE > 0 else "no-cache"
+        ),
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def has_validators(request: Request) -> bool:
+    """Whether the request is conditional (If-None-Match or If-Modified-Since)"""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: datetime | None
+) -> bool:
+    """
+    Evaluate a GET request's conditional headers against the current validators
+
+    If-None-Match takes precedence; If-Modified-Since is only used without it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified) <= _as_utc(since)
+    return False
+
+
+def not_modified_response(etag: str, last_modified: datetime | None) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+
+def conditional_response(request: Request, cached: CachedResponse) -> Response:
+    """A 304 if the client's copy is current, else the cached JSON body"""
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(cached.etag, cached.last_modified)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers=cache_headers(cached.etag, cached.last_modified),
+    )
@@ -0,0 +1,112 @@
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.logging_config import json_logs_enabled
+from backend.core.metrics import (
+    DB_QUERIES,
+    DB_QUERIES_PER_REQUEST,
+    DB_QUERY_DURATION,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    RequestStats,
+    current_request,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Count and time every SQL statement run through the engine
+
+    Pass ``async_engine.sync_engine`` for async engines. Statements run while
+    a request is being handled are also added to that request's stats.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERIES.inc()
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts and latency
+
+    Latency covers the whole response, including streamed bodies. Routes are
+    labelled by their path template (``/chapters/{chapter_id}/content``) so
+    the number of series stays bounded. With LOG_FORMAT=json each request is
+    also logged with its SQL and stage timings.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            current_request.reset(token)
+            # Set on the scope by the router once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status))
+            HTTP_REQUEST_DURATION.observe(duration, method=method, route=route)
+            DB_QUERIES_PER_REQUEST.observe(stats.db_queries, route=route)
+            if json_logs_enabled():
+                logger.info(
+                    f"{method} {route} {status}",
+                    extra={
+                        "method": method,
+                        "path": scope["path"],
+                        "route": route,
+                        "status": status,
+                        "duration_ms": round(duration * 1000, 2),
+                        "db_queries": stats.db_queries,
+                        "db_time_ms": round(stats.db_time * 1000, 2),
+                        "timings": stats.timings,
+                    },
+                )
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from collections.abc import AsyncIterator
+from typing import TYPE_CHECKING
+
+from backend.core.metrics import timed
+
+# groq (with httpx and pydantic models for the whole API) is imported on first
+# use: it is a large share of the app's import time and most processes, like
+# workers that never summarize and the CLIs, do not need it
+if TYPE_CHECKING:
+    import groq
+
+logger = logging.getLogger(__name__)
+
+
+def retryable_errors() -> tuple[type[Exception], ...]:
+    """Errors worth retrying: rate limits, provider 5xx and network failures"""
+    import groq
+
+    return (
+        groq.RateLimitError,
+        groq.InternalServerError,
+        groq.APIConnectionError,
+    )
+
+
+class TokenBucket:
+    """Token-bucket rate limiter for async callers"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Args:
+            rate: Tokens added per second; 0 or less disables limiting
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it"""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class LLMClient:
+    """
+    Process-wide Groq client with connection pooling, a concurrency limit,
+    a request rate limit and retries with jittered exponential backoff.
+
+    Point GROQ_BASE_URL at a local fake server to test or benchmark it.
+    """
+
+    _shared: "LLMClient | None" = None
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: float = 0,
+        burst: float = 1,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout: float = 60.0,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = TokenBucket(requests_per_second, burst)
+        self._client: groq.AsyncGroq | None = None
+
+    @classmethod
+    def from_env(cls) -> "LLMClient":
+        return cls(
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            requests_per_second=float(os.getenv("LLM_REQUESTS_PER_SECOND", "0")),
+            burst=float(os.getenv("LLM_RATE_BURST", "1")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", "30")),
+            timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+        )
+
+    @classmethod
+    def shared(cls) -> "LLMClient":
+        """Get the process-wide client, creating it from env vars on first use"""
+        if cls._shared is None:
+            cls._shared = cls.from_env()
+        return cls._shared
+
+    @property
+    def client(self) -> "groq.AsyncGroq":
+        if self._client is None:
+            import groq
+            import httpx
+
+            limits = httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            )
+            self._client = groq.AsyncGroq(
+                api_key=os.getenv("GROQ_API_KEY"),
+                # Retries are handled here so they respect the limits above
+                max_retries=0,
+                timeout=self.timeout,
+                http_client=groq.DefaultAsyncHttpxClient(limits=limits),
+            )
+        return self._client
+
+    def backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Seconds to wait before retry ``attempt`` (0-based)"""
+        import groq
+
+        if isinstance(error, groq.APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        # Full jitter keeps retrying clients from synchronizing
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @timed("llm_complete")
+    async def complete(self, prompt: str, model: str, max_tokens: int = 1000) -> str:
+        """
+        Send a single-message chat completion and return the reply text
+
+        Args:
+            prompt: User message
+            model: Model name
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            The stripped completion text
+        """
+        attempt = 0
+        while True:
+            await self._rate_limiter.acquire()
+            try:
+                async with self._semaphore:
+                    chat_completion = await self.client.chat.completions.create(
+                        messages=[{"role": "user", "content": prompt}],
+                        model=model,
+                        temperature=0,
+                        max_tokens=max_tokens,
+                    )
+                return chat_completion.choices[0].message.content.strip()
+            except retryable_errors() as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logger.warning(
+                    f"LLM request failed ({e.__class__.__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def stream(
+        self, prompt: str, model: str, max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """
+        Stream a single-message chat completion, yielding text as it arrives
+
+        Failures are retried only until the first token has been yielded.
+
+        Args:
+            prompt: User message
+            model: Model name
+            max_tokens: Maximum tokens to generate
+        """
+        attempt = 0
+        started = False
+        while True:
+            await self._rate_limiter.acquire()
+            try:
+                async with self._semaphore:
+                    response = await self.client.chat.completions.create(
+                        messages=[{"role": "user", "content": prompt}],
+                        model=model,
+                        temperature=0,
+                        max_tokens=max_tokens,
+                        stream=True,
+                    )
+                    async for chunk in response:
+                        delta = (
+                            chunk.choices[0].delta.content if chunk.choices else None
+                        )
+                        if delta:
+                            started = True
+                            yield delta
+                return
+            except retryable_errors() as e:
+                if started or attempt == self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt, e)
+                logger.warning(
+                    f"LLM stream failed ({e.__class__.__name__}), "
+                    f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
@@ -1,9 +1,38 @@
+import json
 import logging
 import logging.config
+import os
 import sys
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def json_logs_enabled() -> bool:
+    """Whether LOG_FORMAT=json selects one JSON object per log line"""
+    return os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON, including fields passed through ``extra``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
 
 def setup_logging(log_file: Path | None = None) -> None:
     """
@@ -11,12 +40,16 @@ def setup_logging(log_file: Path | None = None) -> None:
 
     Args:
         log_file: Optional path to log file. If provided, logs will be written to file as well.
+
+    With LOG_FORMAT=json every line is a JSON object, and fields passed through
+    ``extra`` (such as request and stage timings) are included.
     """
+    formatter = "json" if json_logs_enabled() else "default"
     handlers: dict[str, Any] = {
         "console": {
             "class": "logging.StreamHandler",
             "stream": sys.stdout,
-            "formatter": "default",
+            "formatter": formatter,
             "level": "INFO",
         },
     }
@@ -27,7 +60,7 @@ def setup_logging(log_file: Path | None = None) -> None:
             "filename": str(log_file),
             "maxBytes": 10485760,  # 10MB
             "backupCount": 5,
-            "formatter": "default",
+            "formatter": formatter,
             "level": "DEBUG",
         }
 
@@ -39,6 +72,7 @@ def setup_logging(log_file: Path | None = None) -> None:
                 "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
             },
+            "json": {"()": JsonFormatter},
             "detailed": {
                 "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s - [%(pathname)s:%(lineno)d]",
                 "datefmt": "%Y-%m-%d %H:%M:%S",
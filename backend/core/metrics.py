@@ -0,0 +1,277 @@
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Parsing, persistence and LLM calls take far longer than an HTTP round trip
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(labelnames, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last is +Inf)], sum
+        self._values: dict[tuple[str, ...], tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._values.items()
+            }
+        labelnames = (*self.labelnames, "le")
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                le = bound if isinstance(bound, str) else repr(float(bound))
+                yield (
+                    f"{self.name}_bucket{_format_labels(labelnames, (*key, le))} "
+                    f"{cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+@dataclass
+class RequestStats:
+    """Work attributed to the HTTP request being handled"""
+
+    db_queries: int = 0
+    db_time: float = 0.0
+    # Stage name -> milliseconds
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+# Set by the metrics middleware for the duration of each request
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+HTTP_REQUESTS = Counter(
+    "tsundoku_http_requests_total",
+    "HTTP requests handled",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "tsundoku_http_request_duration_seconds",
+    "Time to handle an HTTP request, including streaming the response body",
+    ("method", "route"),
+)
+DB_QUERIES = Counter("tsundoku_db_queries_total", "SQL statements executed")
+DB_QUERY_DURATION = Histogram(
+    "tsundoku_db_query_duration_seconds", "Time spent executing a SQL statement"
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "tsundoku_db_queries_per_request",
+    "SQL statements executed while handling one HTTP request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "tsundoku_db_pool_connections",
+    "API connection pool connections, sampled when /metrics is scraped",
+    ("state",),
+)
+DB_ROUTED_STATEMENTS = Counter(
+    "tsundoku_db_routed_statements_total",
+    "SQL statements of read-routed sessions, by the database that ran them",
+    ("target",),
+)
+DB_REPLICA_HEALTHY = Gauge(
+    "tsundoku_db_replica_healthy", "1 while reads may go to the read replica"
+)
+DB_REPLICA_LAG = Gauge(
+    "tsundoku_db_replica_lag_seconds", "Replication lag at the last replica check"
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "tsundoku_admission_in_flight",
+    "Requests of a rate-limited operation currently being handled",
+    ("operation",),
+)
+ADMISSION_QUEUED = Gauge(
+    "tsundoku_admission_queued",
+    "Requests of a rate-limited operation waiting for a free slot",
+    ("operation",),
+)
+ADMISSION_REJECTED = Counter(
+    "tsundoku_admission_rejected_total",
+    "Requests turned away by admission control",
+    ("operation", "reason"),
+)
+STAGE_DURATION = Histogram(
+    "tsundoku_stage_duration_seconds",
+    "Time spent in instrumented stages (parsing, persistence, LLM calls)",
+    ("stage",),
+    buckets=STAGE_BUCKETS,
+)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    STAGE_DURATION.observe(seconds, stage=stage)
+    stats = current_request.get()
+    if stats is not None:
+        stats.timings[stage] = round(stats.timings.get(stage, 0) + seconds * 1000, 2)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the wrapped block into tsundoku_stage_duration_seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """
+    Decorator form of stage_timer, for both plain and async functions
+
+    Calls made in worker threads or processes are recorded in the histogram but,
+    lacking the request context, not in the request's timings.
+    """
+
+    def decorator(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with stage_timer(stage):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.core.metrics import DB_REPLICA_HEALTHY, DB_REPLICA_LAG
+
+logger = logging.getLogger(__name__)
+
+# Set on responses to writes; while it is fresh, the client's reads go to the
+# primary so they see what it just wrote
+RECENT_WRITE_COOKIE = "tsundoku_recent_write"
+# Should exceed REPLICA_MAX_LAG + REPLICA_CHECK_INTERVAL, the most a healthy
+# replica can be behind
+READ_YOUR_WRITES_SECONDS = float(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", "10"))
+
+# (in recovery, lag in seconds). A standby that has replayed everything it
+# received is not lagging, however old its last replayed transaction is: an
+# idle primary sends nothing.
+LAG_QUERY = """
+SELECT pg_is_in_recovery(),
+       CASE
+           WHEN NOT pg_is_in_recovery()
+                OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+           ELSE COALESCE(
+               EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+           )
+       END
+"""
+
+
+def mark_recent_write(response: Response) -> None:
+    """Send subsequent reads from this client to the primary for a while"""
+    response.set_cookie(
+        RECENT_WRITE_COOKIE,
+        str(int(time.time())),
+        max_age=int(READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client wrote within the last READ_YOUR_WRITES_SECONDS"""
+    try:
+        written_at = float(request.cookies[RECENT_WRITE_COOKIE])
+    except (KeyError, ValueError):
+        return False
+    return time.time() - written_at < READ_YOUR_WRITES_SECONDS
+
+
+class ReplicaMonitor:
+    """
+    Tracks whether the read replica may serve reads
+
+    The replica is checked every CHECK_INTERVAL seconds and is healthy while
+    it answers within the interval and is at most MAX_LAG seconds behind the
+    primary. A failed connection marks it down straight away, until the next
+    check succeeds. Reads go to the primary while the replica is down.
+    """
+
+    CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "2"))
+    MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))
+
+    def __init__(self, check: Callable[[], Awaitable[tuple[bool, float]]]) -> None:
+        """
+        Args:
+            check: Runs LAG_QUERY on the replica and returns its row
+        """
+        self._check = check
+        # False until the first check, so no read hits an unverified replica
+        self.healthy = False
+        # Last state logged; None until the first check
+        self._reported: bool | None = None
+        self._warned_not_standby = False
+        self._task: asyncio.Task | None = None
+        DB_REPLICA_HEALTHY.set(0)
+
+    async def check(self) -> bool:
+        """Check the replica once and update its health"""
+        try:
+            in_recovery, lag = await asyncio.wait_for(
+                self._check(), self.CHECK_INTERVAL
+            )
+        except Exception as e:
+            self._set_healthy(False, f"check failed: {e!r}")
+            return False
+
+        lag = float(lag)
+        DB_REPLICA_LAG.set(lag)
+        if not in_recovery and not self._warned_not_standby:
+            self._warned_not_standby = True
+            logger.warning(
+                "Read replica is not a standby server; reads sent to it will "
+                "not see writes made on the primary unless it is kept in sync"
+            )
+        self._set_healthy(lag <= self.MAX_LAG, f"lag {lag:.1f}s")
+        return self.healthy
+
+    def mark_down(self, reason: str) -> None:
+        """Send reads to the primary until the next successful check"""
+        self._set_healthy(False, reason)
+
+    def _set_healthy(self, healthy: bool, reason: str) -> None:
+        if healthy != self._reported:
+            self._reported = healthy
+            if healthy:
+                logger.info(f"Read replica is healthy ({reason}), routing reads to it")
+            else:
+                logger.warning(
+                    f"Read replica is unhealthy ({reason}), routing reads to primary"
+                )
+        self.healthy = healthy
+        DB_REPLICA_HEALTHY.set(int(healthy))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.CHECK_INTERVAL)
+            await self.check()
+
+    async def start(self) -> None:
+        """Check the replica, then keep checking it in a background task"""
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,222 @@
+import fcntl
+import json
+import os
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+IDS_FILE = "ids.i64"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+MIN_CAPACITY = 1024
+
+
+class SimilarityIndex:
+    """
+    Chapter vectors in a memory-mapped float32 matrix, searched by dot product
+
+    Rows are stored contiguously in ``vectors.f32`` with the chapter ID of each
+    row in ``ids.i64``; ``meta.json`` records the row count. Both files grow by
+    doubling, and deleted chapters leave a zeroed row whose ID is -1. Writers
+    take an exclusive file lock, and readers in other processes pick up new rows
+    when ``meta.json`` changes, so API workers and CLIs can share one index.
+    """
+
+    # Rows scored per matrix product; bounds the temporary score array
+    QUERY_BATCH_ROWS = 65536
+
+    def __init__(self, directory: Path, dim: int, embedder_name: str) -> None:
+        """
+        Args:
+            directory: Where the index files live; created if missing
+            dim: Vector dimension
+            embedder_name: Name of the embedder the vectors come from
+
+        Raises:
+            ValueError: If the stored index was built with another embedder
+        """
+        self.directory = directory
+        self.dim = dim
+        self.embedder_name = embedder_name
+        self._lock = threading.RLock()
+        self._meta_mtime: int | None = None
+        self._count = 0
+        self._capacity = 0
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._rows: dict[int, int] = {}
+        directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _map(self, capacity: int) -> None:
+        if capacity == 0:
+            return
+        self._vectors = np.memmap(
+            self._path(VECTORS_FILE), np.float32, "r+", shape=(capacity, self.dim)
+        )
+        self._ids = np.memmap(self._path(IDS_FILE), np.int64, "r+", shape=(capacity,))
+
+    def _load(self) -> None:
+        meta_path = self._path(META_FILE)
+        with self._lock:
+            if not meta_path.exists():
+                return
+            meta = json.loads(meta_path.read_text())
+            if (meta["embedder"], meta["dim"]) != (self.embedder_name, self.dim):
+                raise ValueError(
+                    f"Index in {self.directory} was built with {meta['embedder']}; "
+                    "rebuild it with python -m backend.cli.build_similarity_index"
+                )
+            self._count = meta["count"]
+            self._capacity = meta["capacity"]
+            self._map(self._capacity)
+            self._rows = {
+                int(chapter_id): row
+                for row, chapter_id in enumerate(self._ids[: self._count])
+                if chapter_id >= 0
+            }
+            self._meta_mtime = meta_path.stat().st_mtime_ns
+
+    def _refresh(self) -> None:
+        """Reload if another process has written to the index"""
+        try:
+            mtime = self._path(META_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._meta_mtime:
+            self._load()
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._lock, open(self._path(LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+                if self._capacity:
+                    self._vectors.flush()
+                    self._ids.flush()
+                self._write_meta()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_meta(self) -> None:
+        meta = {
+            "embedder": self.embedder_name,
+            "dim": self.dim,
+            "count": self._count,
+            "capacity": self._capacity,
+        }
+        tmp_path = self._path(f"{META_FILE}.tmp")
+        tmp_path.write_text(json.dumps(meta))
+        os.replace(tmp_path, self._path(META_FILE))
+        self._meta_mtime = self._path(META_FILE).stat().st_mtime_ns
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        capacity = max(rows, self._capacity * 2, MIN_CAPACITY)
+        # Extending a file fills it with zeros; existing maps stay valid
+        for name, row_bytes in ((VECTORS_FILE, self.dim * 4), (IDS_FILE, 8)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * row_bytes)
+        self._capacity = capacity
+        self._map(capacity)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, chapter_id: int) -> bool:
+        self._refresh()
+        return chapter_id in self._rows
+
+    def upsert(self, chapter_ids: list[int], vectors: np.ndarray) -> None:
+        """Add chapters, replacing the vectors of chapters already indexed"""
+        with self._write_lock():
+            new_ids = [
+                cid for cid in dict.fromkeys(chapter_ids) if cid not in self._rows
+            ]
+            self._ensure_capacity(self._count + len(new_ids))
+            for chapter_id in new_ids:
+                self._rows[chapter_id] = self._count
+                self._ids[self._count] = chapter_id
+                self._count += 1
+            rows = [self._rows[chapter_id] for chapter_id in chapter_ids]
+            self._vectors[rows] = vectors
+
+    def remove(self, chapter_ids: list[int]) -> None:
+        with self._write_lock():
+            rows = [self._rows.pop(cid) for cid in chapter_ids if cid in self._rows]
+            if rows:
+                self._vectors[rows] = 0
+                self._ids[rows] = -1
+
+    def clear(self) -> None:
+        with self._write_lock():
+            self._count = 0
+            self._rows = {}
+
+    def vector(self, chapter_id: int) -> np.ndarray | None:
+        self._refresh()
+        row = self._rows.get(chapter_id)
+        return None if row is None else np.array(self._vectors[row])
+
+    def search(
+        self, queries: np.ndarray, k: int, exclude: list[int | None] | None = None
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Find the k most similar chapters for each query vector
+
+        The matrix is scored QUERY_BATCH_ROWS rows at a time against all queries
+        in one product; argpartition keeps each block's top candidates, which
+        are then merged.
+
+        Args:
+            queries: float32 array of shape (n, dim) or (dim,)
+            k: Results per query
+            exclude: Per query, a chapter ID to leave out (usually itself)
+
+        Returns:
+            Per query, (chapter_id, cosine similarity) pairs, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        exclude = exclude or [None] * len(queries)
+        with self._lock:
+            self._refresh()
+            count, vectors, ids = self._count, self._vectors, self._ids
+        if count == 0 or k <= 0:
+            return [[] for _ in queries]
+
+        # One extra candidate per block in case the excluded chapter is in it
+        take = k + 1
+        candidate_rows, candidate_scores = [], []
+        for start in range(0, count, self.QUERY_BATCH_ROWS):
+            scores = (
+                vectors[start : min(start + self.QUERY_BATCH_ROWS, count)] @ queries.T
+            )
+            n = min(take, len(scores))
+            top = np.argpartition(scores, -n, axis=0)[-n:]
+            candidate_rows.append(top + start)
+            candidate_scores.append(np.take_along_axis(scores, top, axis=0))
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+
+        results = []
+        for query in range(len(queries)):
+            hits: list[tuple[int, float]] = []
+            for index in np.argsort(-scores[:, query]):
+                chapter_id = int(ids[rows[index, query]])
+                if chapter_id < 0 or chapter_id == exclude[query]:
+                    continue
+                hits.append((chapter_id, float(scores[index, query])))
+                if len(hits) == k:
+                    break
+            results.append(hits)
+        return results
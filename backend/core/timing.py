@@ -0,0 +1,28 @@
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """Collect wall-clock timings for the named stages of a request"""
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the wrapped block and record the duration under the given stage name
+
+        A stage entered more than once, like the interleaved parse and persist
+        batches of an upload, accumulates its durations.
+
+        Args:
+            name: Stage name used as the key in ``timings``
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.timings[name] = round(self.timings.get(name, 0) + elapsed_ms, 2)
@@ -1,24 +1,282 @@
 import os
+import threading
+from collections.abc import AsyncIterator
+from typing import Any
 
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from sqlalchemy import create_engine
+from fastapi import Request, Response
+from sqlalchemy import (
+    Connection,
+    Engine,
+    Executable,
+    Select,
+    create_engine,
+    event,
+    text,
+)
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.core.instrumentation import instrument_engine
+from backend.core.metrics import DB_ROUTED_STATEMENTS
+from backend.core.replica import (
+    LAG_QUERY,
+    ReplicaMonitor,
+    mark_recent_write,
+    wrote_recently,
+)
+
+DATABASE_LOCATION = f"{os.getenv('POSTGRES_USERNAME')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DATABASE')}"
+SQLALCHEMY_DATABASE_URL = (
+    f"postgresql://{DATABASE_LOCATION}?options=-csearch_path%3Dpublic"
+)
+ASYNC_SQLALCHEMY_DATABASE_URL = f"postgresql+asyncpg://{DATABASE_LOCATION}"
+
+# Optional streaming replica for read-only routes; same credentials and database
+REPLICA_HOST = os.getenv("POSTGRES_REPLICA_HOST")
+REPLICA_SQLALCHEMY_DATABASE_URL = (
+    f"postgresql+asyncpg://{os.getenv('POSTGRES_USERNAME')}:{os.getenv('POSTGRES_PASSWORD')}@{REPLICA_HOST}:{os.getenv('POSTGRES_REPLICA_PORT', os.getenv('POSTGRES_PORT'))}/{os.getenv('POSTGRES_DATABASE')}"
+    if REPLICA_HOST
+    else None
+)
+# Seconds to wait for a replica connection before falling back to the primary
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+
+
+def pool_options() -> dict[str, Any]:
+    """Connection pool settings, configurable through DB_POOL_* env vars"""
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        # Recycle connections before server or proxy idle timeouts close them
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+    }
+
+
+class _Sessionmaker(sessionmaker):
+    """sessionmaker that creates the engines on first use"""
+
+    def __call__(self, **local_kw: Any) -> Session:
+        init_engines()
+        return super().__call__(**local_kw)
+
+
+class _AsyncSessionmaker(async_sessionmaker):
+    """async_sessionmaker that creates the engines on first use"""
+
+    def __call__(self, **local_kw: Any) -> AsyncSession:
+        init_engines()
+        return super().__call__(**local_kw)
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to the read replica and everything else
+    to the primary
+
+    Other statements that are safe on a replica, such as SET LOCAL, can be
+    marked with the REPLICA_SAFE execution option. Once the session has
+    written, or if it was opened with PRIMARY_ONLY set in its info, all of its
+    statements go to the primary, so it reads its own writes. Reads also go to
+    the primary while the replica is unhealthy.
+    """
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kw: Any) -> Engine:
+        is_read = (isinstance(clause, Select) and clause._for_update_arg is None) or (
+            isinstance(clause, Executable)
+            and clause.get_execution_options().get(REPLICA_SAFE, False)
+        )
+        if self._flushing or not is_read:
+            self.info[PRIMARY_ONLY] = True
+        if (
+            self.info.get(PRIMARY_ONLY)
+            or replica_monitor is None
+            or not replica_monitor.healthy
+        ):
+            DB_ROUTED_STATEMENTS.inc(target="primary")
+            return async_engine.sync_engine
+        DB_ROUTED_STATEMENTS.inc(target="replica")
+        return replica_engine.sync_engine
+
+    def _connection_for_bind(
+        self, engine: Engine, execution_options: Any = None, **kw: Any
+    ) -> Connection:
+        # When the replica cannot be connected to, the statement runs on the
+        # primary instead, so the request that notices an outage does not fail
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except (DBAPIError, OSError) as e:
+            if replica_engine is None or engine is not replica_engine.sync_engine:
+                raise
+            replica_monitor.mark_down(repr(e))
+            return super()._connection_for_bind(
+                async_engine.sync_engine, execution_options, **kw
+            )
+
+
+# Synchronous engine for scripts, the shell and other non-request code, and the
+# async engine used by the API so queries never block the event loop. Both are
+# created by init_engines(), not at import, so a server that imports the app
+# before forking workers does not share connection pools between them.
+engine: Engine | None = None
+async_engine: AsyncEngine | None = None
+# Read replica, when POSTGRES_REPLICA_HOST is set
+replica_engine: AsyncEngine | None = None
+replica_monitor: ReplicaMonitor | None = None
+_engines_lock = threading.Lock()
+
+# Session info key pinning a RoutingSession to the primary
+PRIMARY_ONLY = "primary_only"
+# Statement execution option letting a RoutingSession run a statement that is
+# not a plain SELECT on the replica
+REPLICA_SAFE = "replica_safe"
+
+SessionLocal = _Sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = _AsyncSessionmaker(autoflush=False, expire_on_commit=False)
+# For read-only routes; binds per statement, see RoutingSession
+AsyncReadSessionLocal = _AsyncSessionmaker(
+    sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+
+
+def init_engines() -> None:
+    """
+    Create the engines and bind the session factories, once per process
+
+    Called from the app's lifespan; scripts get the engines on their first
+    session.
+    """
+    global engine, async_engine, replica_engine, replica_monitor
+    if async_engine is not None:
+        return
+    with _engines_lock:
+        if async_engine is not None:
+            return
+        engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options())
+        new_async_engine = create_async_engine(
+            ASYNC_SQLALCHEMY_DATABASE_URL,
+            connect_args={"server_settings": {"search_path": "public"}},
+            **pool_options(),
+        )
+        # Count and time every statement for the /metrics endpoint
+        instrument_engine(engine)
+        instrument_engine(new_async_engine.sync_engine)
+        SessionLocal.configure(bind=engine)
+        AsyncSessionLocal.configure(bind=new_async_engine)
+        if REPLICA_SQLALCHEMY_DATABASE_URL:
+            replica_engine = create_async_engine(
+                REPLICA_SQLALCHEMY_DATABASE_URL,
+                connect_args={
+                    "server_settings": {"search_path": "public"},
+                    "timeout": REPLICA_CONNECT_TIMEOUT,
+                },
+                **pool_options(),
+            )
+            instrument_engine(replica_engine.sync_engine)
+            replica_monitor = ReplicaMonitor(_check_replica)
+
+            @event.listens_for(replica_engine.sync_engine, "handle_error")
+            def on_replica_error(context: Any) -> None:
+                # Lost or refused connections; not errors in the statement itself
+                if context.is_disconnect or context.connection is None:
+                    replica_monitor.mark_down(repr(context.original_exception))
+
+        async_engine = new_async_engine
+
+
+def get_async_engine() -> AsyncEngine:
+    init_engines()
+    return async_engine
+
+
+async def _check_replica() -> tuple[bool, float]:
+    async with replica_engine.connect() as conn:
+        return tuple((await conn.execute(text(LAG_QUERY))).one())
+
+
+async def start_replica_monitor() -> None:
+    """Start checking the read replica's health, if one is configured"""
+    init_engines()
+    if replica_monitor is not None:
+        await replica_monitor.start()
+
+
+async def dispose_engines() -> None:
+    """Close all pooled connections, e.g. when a worker shuts down"""
+    if replica_monitor is not None:
+        await replica_monitor.stop()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
 
-SQLALCHEMY_DATABASE_URL = f"postgresql://{os.getenv('POSTGRES_USERNAME')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DATABASE')}?options=-csearch_path%3Dpublic"
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_write_db(response: Response) -> AsyncIterator[AsyncSession]:
+    """
+    Primary session for routes that write
+
+    With a read replica configured, the response also marks the client as a
+    recent writer, so its reads go to the primary until the replica has
+    caught up (read-your-writes).
+    """
+    mark_write(response)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def mark_write(response: Response) -> None:
+    """
+    Send the client's reads to the primary for a while, if a replica is
+    configured. For routes that return a Response themselves, which does not
+    carry the cookie get_write_db sets.
+    """
+    if replica_monitor is not None:
+        mark_recent_write(response)
+
+
+def read_session(primary_only: bool = False) -> AsyncSession:
+    """
+    Session that reads from the replica when it is configured and healthy
+
+    Args:
+        primary_only: Send everything to the primary, e.g. for a client that
+            has just written
+    """
+    if replica_monitor is None:
+        return AsyncSessionLocal()
+    return AsyncReadSessionLocal(info={PRIMARY_ONLY: primary_only})
+
+
+def reads_primary(db: AsyncSession) -> bool:
+    """Whether a session was opened to read from the primary only"""
+    return bool(db.info.get(PRIMARY_ONLY))
+
+
+async def get_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Session for read-only routes, reading from the replica where possible
+
+    Clients that wrote recently (see get_write_db) read from the primary.
+    Statements that write, such as extracting a lazily ingested chapter, still
+    go to the primary.
+    """
+    async with read_session(wrote_recently(request)) as db:
         yield db
-    finally:
-        db.close()
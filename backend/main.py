@@ -1,15 +1,40 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.core.admission import AdmissionMiddleware
+from backend.core.instrumentation import MetricsMiddleware
 from backend.core.logging_config import setup_logging
+from backend.database import dispose_engines, init_engines, start_replica_monitor
 
+from .controllers.chapter_controller import ChapterController
+from .controllers.summary_job_controller import SummaryJobController
 from .routes import router as upload_router
 
 # Setup logging before creating the FastAPI app
 setup_logging()
 
-app = FastAPI(title="EPUB Upload Service")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connection pools are created per worker, after any fork
+    init_engines()
+    # Reads go to the replica, if configured, once it has been checked
+    await start_replica_monitor()
+    # Pick up summary jobs queued before this process started, and jobs a
+    # crashed or redeployed process left running
+    SummaryJobController.start()
+    # Finish extracting lazily ingested books interrupted by a restart
+    await ChapterController.resume_backfills()
+    yield
+    await dispose_engines()
+
+
+app = FastAPI(title="EPUB Upload Service", lifespan=lifespan)
+
+# Innermost, so rejections still get CORS headers and show up in the metrics
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],
@@ -17,6 +42,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
 
 # Include routes
 app.include_router(upload_router)
@@ -1,10 +1,31 @@
 from datetime import datetime
+from typing import Any
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    String,
+    Text,
+    bindparam,
+    event,
+    func,
+    inspect,
+    literal_column,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from backend.core.compression import content_columns, decompress_text
 from backend.database import Base
 
+SEARCH_CONFIG = "english"
+# Content lexemes are taken from this many characters at most, to stay under
+# PostgreSQL's 1MB tsvector limit
+SEARCH_CONTENT_CHARS = 1_000_000
+
 
 class Book(Base):
     """Model representing a book in the system"""
@@ -16,6 +37,10 @@ class Book(Base):
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     author: Mapped[str] = mapped_column(String(255), nullable=True)
     file_path: Mapped[str] = mapped_column(String(255), nullable=False)
+    # SHA-256 of the uploaded file, used to deduplicate re-uploads
+    content_hash: Mapped[str] = mapped_column(
+        String(64), nullable=True, unique=True, index=True
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow
     )
@@ -33,14 +58,32 @@ class Chapter(Base):
     """Model representing a chapter in a book"""
 
     __tablename__ = "chapters"
-    __table_args__ = {"schema": "public"}
+    __table_args__ = (
+        # Serves the per-book table of contents query in chapter order
+        Index("ix_chapters_book_id_order", "book_id", "order"),
+        Index("ix_chapters_search_vector", "search_vector", postgresql_using="gin"),
+        {"schema": "public"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     book_id: Mapped[int] = mapped_column(ForeignKey("public.books.id"), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=True)
+    # zlib-compressed content, set instead of content when
+    # CHAPTER_CONTENT_COMPRESSION=zlib; read both through Chapter.text
+    content_compressed: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    # SHA-256 of the text, whichever column holds it; NULL until extracted
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)
     summary: Mapped[str] = mapped_column(Text, nullable=True)
     order: Mapped[int] = mapped_column(nullable=False)  # To maintain chapter order
+    # Zip member the chapter is read from. While both content columns are NULL
+    # the body has not been extracted yet (lazy ingestion)
+    source_href: Mapped[str] = mapped_column(String(1024), nullable=True)
+    # Weighted title + content lexemes for full-text search (see
+    # search_vector). Written with the text rather than generated from the
+    # columns, as PostgreSQL cannot read compressed content. Deferred: never
+    # needed in Python.
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, nullable=True, deferred=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, nullable=False, default=datetime.utcnow
     )
@@ -50,3 +93,106 @@ class Chapter(Base):
 
     # Relationships
     book: Mapped["Book"] = relationship("Book", back_populates="chapters")
+
+    @property
+    def text(self) -> str | None:
+        """Chapter content, decompressed if it is stored compressed"""
+        if self.content_compressed is not None:
+            return decompress_text(self.content_compressed)
+        return self.content
+
+    @text.setter
+    def text(self, value: str | None) -> None:
+        for column, column_value in content_columns(value).items():
+            setattr(self, column, column_value)
+
+
+@event.listens_for(Chapter, "before_insert")
+@event.listens_for(Chapter, "before_update")
+def _set_search_vector(mapper: Any, connection: Any, chapter: Chapter) -> None:
+    # Bulk statements bypass this; they set the vector through content_values
+    state = inspect(chapter)
+    if state.has_identity and not any(
+        state.attrs[name].history.has_changes()
+        for name in ("title", "content", "content_compressed")
+    ):
+        return
+    chapter.search_vector = search_vector(chapter.title, chapter.text)
+
+
+def search_vector(title: Any, text: Any) -> ColumnElement:
+    """
+    Chapter.search_vector of a title and content
+
+    Args:
+        title: Chapter title, as a value or SQL expression
+        text: Chapter content, as a value or SQL expression; None while a
+            lazily ingested chapter has not been extracted
+
+    Returns:
+        SQL expression weighting title lexemes A and content lexemes B
+    """
+
+    # Constants are inlined rather than bound, as bulk INSERTs bind every
+    # parameter once per row
+    def weighted(value: Any, weight: str) -> ColumnElement:
+        vector = func.to_tsvector(
+            literal_column(f"'{SEARCH_CONFIG}'"),
+            func.coalesce(value, literal_column("''")),
+        )
+        return func.setweight(vector, literal_column(f"'{weight}'"), type_=TSVECTOR)
+
+    body = func.substr(
+        text, literal_column("1"), literal_column(str(SEARCH_CONTENT_CHARS))
+    )
+    return weighted(title, "A").op("||", return_type=TSVECTOR)(weighted(body, "B"))
+
+
+def content_params(
+    text: str | None, title: str | None = None, compress: bool | None = None
+) -> dict[str, Any]:
+    """
+    Parameters of a statement built with content_values
+
+    Args:
+        text: Chapter content; None while it has not been extracted
+        title: Chapter title, unless the statement indexes the stored one
+        compress: Override CHAPTER_CONTENT_COMPRESSION
+
+    Returns:
+        Dict of bind and column values for one chapter
+    """
+    columns = content_columns(text, compress)
+    params = {} if title is None else {"b_title": title, "b_search_title": title}
+    return params | {
+        "b_content": columns["content"],
+        "b_search_text": text,
+        "content_compressed": columns["content_compressed"],
+        "content_hash": columns["content_hash"],
+    }
+
+
+def content_values(title: ColumnElement | None = None) -> dict[str, Any]:
+    """
+    INSERT or UPDATE values writing chapter text and its search vector
+
+    Executed with content_params, e.g. as a bulk INSERT. Bind names differ
+    from the column names, which SQLAlchemy reserves for its own parameters,
+    and no bind is used twice: batched INSERT ... RETURNING statements
+    miscount repeated asyncpg parameters.
+
+    Args:
+        title: Title to index when the statement does not write one, such as
+            Chapter.title; by default the title is written from content_params
+
+    Returns:
+        Dict for the statement's ``values()``
+    """
+    values: dict[str, Any] = {"content": bindparam("b_content", type_=Text)}
+    if title is None:
+        values["title"] = bindparam("b_title", type_=String)
+        title = bindparam("b_search_title", type_=String)
+    values["search_vector"] = search_vector(
+        title, bindparam("b_search_text", type_=Text)
+    )
+    return values
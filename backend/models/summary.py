@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database import Base
+
+
+class SummaryCache(Base):
+    """Generated summary keyed by the content it summarizes and how it was produced"""
+
+    __tablename__ = "summary_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "content_hash", "model", "prompt_version", name="uq_summary_cache_key"
+        ),
+        {"schema": "public"},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    model: Mapped[str] = mapped_column(String(255), nullable=False)
+    prompt_version: Mapped[str] = mapped_column(String(32), nullable=False)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+
+
+class SummaryJob(Base):
+    """Background job that summarizes every chapter of a book"""
+
+    __tablename__ = "summary_jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job
+        Index(
+            "ix_summary_jobs_queued", "id", postgresql_where=text("status = 'queued'")
+        ),
+        {"schema": "public"},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    book_id: Mapped[int] = mapped_column(
+        ForeignKey("public.books.id"), nullable=False, index=True
+    )
+    # queued -> running -> completed | partial | failed. updated_at doubles as
+    # the running job's lease heartbeat
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    force: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    total_chapters: Mapped[int] = mapped_column(nullable=False, default=0)
+    completed_chapters: Mapped[int] = mapped_column(nullable=False, default=0)
+    failed_chapters: Mapped[int] = mapped_column(nullable=False, default=0)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,36 @@
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Protocol
+
+# (title, content) of one chapter, in reading order
+ParsedChapter = tuple[str, str]
+
+
+class BookParser(Protocol):
+    """Reads the chapters of one book format, one chapter at a time"""
+
+    name: str
+    # Lowercase file suffixes, with the dot
+    extensions: tuple[str, ...]
+    media_types: tuple[str, ...]
+    # Whether the format has a table of contents that chapters can be
+    # registered from before their content is extracted (lazy ingestion)
+    supports_lazy: bool
+
+    def iter_chapters(
+        self, path: Path, parallel: bool = False, fallback_title: str | None = None
+    ) -> Iterator[ParsedChapter]:
+        """
+        Args:
+            path: Path to the book file
+            parallel: Allow fanning out to a process pool, where the parser
+                supports it; pass False when already running in a worker process
+            fallback_title: Title for text that has no heading of its own,
+                such as front matter; defaults to the file name without suffix.
+                Stored uploads are named by hash, so callers pass the original
+
+        Yields:
+            (title, content) per chapter, in reading order. Only the chapter
+            being yielded (or a bounded window of them) is held in memory.
+        """
+        ...
@@ -0,0 +1,55 @@
+import re
+from collections.abc import Iterator
+from pathlib import Path
+
+from backend.core.html_text import extract_title_and_text
+
+from .base import ParsedChapter
+
+# Chapters of a single-file book start at its top-level headings
+CHAPTER_START = re.compile(rb"<h[12][\s>/]", re.IGNORECASE)
+READ_SIZE = 1024 * 1024
+
+
+class HtmlParser:
+    """
+    Single-file HTML books, split into chapters at each <h1> and <h2>
+
+    The file is read in blocks and each chapter's markup is parsed as soon as
+    the next heading is found, so only one chapter is held at a time. Markup
+    before the first heading (front matter) becomes a chapter titled after the
+    file, when it has any text.
+    """
+
+    name = "html"
+    extensions = (".html", ".htm", ".xhtml")
+    media_types = ("text/html", "application/xhtml+xml")
+    supports_lazy = False
+
+    def iter_chapters(
+        self, path: Path, parallel: bool = False, fallback_title: str | None = None
+    ) -> Iterator[ParsedChapter]:
+        fallback_title = fallback_title or path.stem
+        # The current chapter's markup starts at buffer[start]
+        buffer, start = b"", 0
+        with open(path, "rb") as f:
+            while block := f.read(READ_SIZE):
+                # Search from just before the new block so a heading tag split
+                # across blocks is still found
+                search_from = max(len(buffer) - 4, 1)
+                buffer += block
+                while match := CHAPTER_START.search(buffer, search_from):
+                    chapter = self._parse(buffer[start : match.start()], fallback_title)
+                    if chapter is not None:
+                        yield chapter
+                    start = match.start()
+                    search_from = start + 1
+                buffer, start = buffer[start:], 0
+        chapter = self._parse(buffer, fallback_title)
+        if chapter is not None:
+            yield chapter
+
+    @staticmethod
+    def _parse(markup: bytes, fallback_title: str) -> ParsedChapter | None:
+        title, content = extract_title_and_text(markup, fallback_title)
+        return (title, content) if content else None
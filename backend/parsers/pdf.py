@@ -0,0 +1,78 @@
+import logging
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .base import ParsedChapter
+
+# pypdf is imported on first use, like the other format libraries
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+
+class PdfParser:
+    """
+    PDF books, using pypdf for text extraction
+
+    Chapters start at the pages the top-level outline (bookmarks) points to;
+    pages before the first entry become a chapter titled after the file. PDFs
+    without an outline are split every PAGES_PER_CHAPTER pages. Text is
+    extracted page by page, so only the current chapter is held in memory.
+    """
+
+    name = "pdf"
+    extensions = (".pdf",)
+    media_types = ("application/pdf",)
+    supports_lazy = False
+
+    PAGES_PER_CHAPTER = int(os.getenv("PDF_PAGES_PER_CHAPTER", "10"))
+
+    @staticmethod
+    def _chapter_starts(reader: "PdfReader", fallback_title: str) -> dict[int, str]:
+        """Map the first page of each chapter to its title"""
+        starts: dict[int, str] = {}
+        try:
+            outline: list[Any] = reader.outline
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable outline of {fallback_title}: {e}")
+            outline = []
+        # Nested lists hold sub-entries; only top-level entries start chapters
+        for entry in outline:
+            if isinstance(entry, list):
+                continue
+            page = reader.get_destination_page_number(entry)
+            title = " ".join(str(entry.title or "").split())
+            if page is not None and page >= 0 and title:
+                starts.setdefault(page, title)
+
+        if not starts:
+            page_count = len(reader.pages)
+            for first in range(0, page_count, PdfParser.PAGES_PER_CHAPTER):
+                last = min(first + PdfParser.PAGES_PER_CHAPTER, page_count)
+                starts[first] = f"Pages {first + 1}-{last}"
+        return starts
+
+    def iter_chapters(
+        self, path: Path, parallel: bool = False, fallback_title: str | None = None
+    ) -> Iterator[ParsedChapter]:
+        from pypdf import PdfReader
+
+        fallback_title = fallback_title or path.stem
+        with open(path, "rb") as f:
+            reader = PdfReader(f)
+            starts = self._chapter_starts(reader, fallback_title)
+            title = fallback_title
+            pages: list[str] = []
+            for number, page in enumerate(reader.pages):
+                if number in starts:
+                    content = "\n".join(pages).strip()
+                    if content:
+                        yield title, content
+                    title, pages = starts[number], []
+                pages.append(page.extract_text() or "")
+            content = "\n".join(pages).strip()
+            if content:
+                yield title, content
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from .base import BookParser
+from .epub import EpubParser
+from .html import HtmlParser
+from .pdf import PdfParser
+from .text import TextParser
+
+_parsers: list[BookParser] = []
+
+
+def register(parser: BookParser) -> None:
+    """Add a parser; later registrations take precedence for their extensions"""
+    _parsers.insert(0, parser)
+
+
+def parser_for(filename: str, media_type: str | None = None) -> BookParser | None:
+    """
+    Find the parser for a file, by extension and otherwise by MIME type
+
+    Args:
+        filename: File name or path
+        media_type: Content type the client sent, if any
+
+    Returns:
+        The parser, or None if the format is not supported
+    """
+    suffix = Path(filename).suffix.lower()
+    for parser in _parsers:
+        if suffix in parser.extensions:
+            return parser
+    if media_type:
+        media_type = media_type.split(";")[0].strip().lower()
+        for parser in _parsers:
+            if media_type in parser.media_types:
+                return parser
+    return None
+
+
+def supported_extensions() -> list[str]:
+    return sorted({extension for parser in _parsers for extension in parser.extensions})
+
+
+for _parser in (PdfParser(), HtmlParser(), TextParser(), EpubParser()):
+    register(_parser)
@@ -0,0 +1,75 @@
+import re
+from collections.abc import Iterator
+from pathlib import Path
+
+from .base import ParsedChapter
+
+_NUMBER_WORDS = (
+    "one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|"
+    "fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|"
+    "fifty|sixty|seventy|eighty|ninety|hundred|"
+    "first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|last"
+)
+# "12", "XII", "Two", "Twenty-One"
+_NUMBER = rf"(?:\d{{1,4}}|[ivxlc]{{1,8}}|(?:{_NUMBER_WORDS})(?:-(?:{_NUMBER_WORDS}))?)"
+# ". The Storm", ": Into the Woods", " - Coda"
+_TITLE = r"(?:\s*[.:\-\u2013\u2014]\s*.{0,60})?"
+
+# A heading is a line of its own between blank lines: "Chapter 12", "CHAPTER
+# XII. The Storm", "Part Two", "Prologue", or a bare upper-case roman numeral.
+# A keyword must be followed by a number, so prose such as "Part of the
+# problem was..." is not a heading.
+HEADING_PATTERN = re.compile(
+    rf"(?:(?:chapter|part|book)\s+{_NUMBER}{_TITLE}"
+    rf"|(?:prologue|epilogue|preface|introduction){_TITLE}"
+    r"|(?-i:[IVXLC]{1,8})\.?)",
+    re.IGNORECASE,
+)
+
+
+class TextParser:
+    """
+    Plain-text books, split into chapters at heading lines
+
+    The file is read line by line. Text before the first heading becomes a
+    chapter titled after the file; a file without headings is one chapter.
+    A line is only a heading when blank lines surround it.
+    """
+
+    name = "text"
+    extensions = (".txt", ".text")
+    media_types = ("text/plain",)
+    supports_lazy = False
+
+    def iter_chapters(
+        self, path: Path, parallel: bool = False, fallback_title: str | None = None
+    ) -> Iterator[ParsedChapter]:
+        title = fallback_title or path.stem
+        lines: list[str] = []
+        # Line that looks like a heading, until the next line shows whether a
+        # blank line follows it
+        candidate: str | None = None
+        previous_blank = True
+        # utf-8-sig drops a byte order mark; invalid bytes are replaced
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            for line in f:
+                stripped = line.strip()
+                if candidate is not None:
+                    if stripped:
+                        lines.append(candidate)
+                    else:
+                        content = "".join(lines).strip()
+                        if content:
+                            yield title, content
+                        title, lines = candidate.strip(), []
+                    candidate = None
+                if previous_blank and HEADING_PATTERN.fullmatch(stripped):
+                    candidate = line
+                else:
+                    lines.append(line)
+                previous_blank = not stripped
+        if candidate is not None:
+            lines.append(candidate)
+        content = "".join(lines).strip()
+        if content:
+            yield title, content
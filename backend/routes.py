@@ -1,76 +1,225 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.database import get_db
+from backend.core.metrics import DB_POOL_CONNECTIONS, render_metrics
+from backend.database import (
+    get_async_engine,
+    get_read_db,
+    get_write_db,
+    mark_write,
+    reads_primary,
+)
 from backend.models.book import Chapter
-from backend.schemas import ChapterContentResponse, ChapterResponse
+from backend.schemas import (
+    ChapterContentResponse,
+    ChapterResponse,
+    ReingestResponse,
+    SearchResponse,
+    SimilarChapter,
+    SummaryJobResponse,
+    UploadResponse,
+)
 
+from .controllers.chapter_controller import ChapterController
+from .controllers.reingest_controller import ReingestController
+from .controllers.search_controller import SearchController
+from .controllers.similarity_controller import SimilarityController
 from .controllers.summary_controller import SummaryController
+from .controllers.summary_job_controller import SummaryJobController
 from .controllers.upload_controller import UploadController
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-@router.post("/upload")
-async def upload_file(file: UploadFile, db: Session = Depends(get_db)) -> dict:
-    (
-        success,
-        filename,
-        error,
-        chapters,
-        book_id,
-    ) = await UploadController.handle_epub_upload(file, db)
-    if not success:
-        raise HTTPException(status_code=400, detail=error)
-    return {
-        "message": "File uploaded successfully",
-        "filename": filename,
-        "chapters": chapters,
-        "book_id": book_id,
-    }
+@router.post("/upload", response_model=UploadResponse)
+async def upload_file(
+    file: UploadFile, lazy: bool | None = None, db: AsyncSession = Depends(get_write_db)
+):
+    """
+    Upload a book (EPUB, PDF, HTML or plain text) and ingest its chapters.
 
+    With lazy ingestion of an EPUB only the table of contents is parsed before
+    returning; chapter content is extracted on first read and in the background.
+    """
+    result = await UploadController.handle_upload(file, db, lazy)
+    if not result.success:
+        raise HTTPException(status_code=400, detail=result.message)
+    if result.lazy:
+        ChapterController.schedule_backfill(result.book_id)
+    return result
+
+
+@router.post("/books/{book_id}/reingest", response_model=ReingestResponse)
+async def reingest_book(
+    book_id: int, file: UploadFile, db: AsyncSession = Depends(get_write_db)
+):
+    """
+    Update a book from a new edition of its file, in any supported format.
+
+    Only chapters whose content changed are written; unchanged chapters keep
+    their IDs and summaries. The response lists every chapter touched.
+    """
+    try:
+        result = await ReingestController.handle_reingest(book_id, file, db)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not result.success:
+        raise HTTPException(status_code=400, detail=result.message)
+    return result
 
-@router.get("/books/{book_id}/chapters", response_model=list[ChapterResponse])
-async def get_book_chapters(book_id: int, db: Session = Depends(get_db)):
-    """Get all chapters for a specific book."""
-    chapters = (
-        db.query(Chapter)
-        .filter(Chapter.book_id == book_id)
-        .order_by(Chapter.order)
-        .all()
-    )
 
-    if not chapters:
+@router.get("/books/{book_id}/chapters", response_model=list[ChapterResponse])
+async def get_book_chapters(
+    book_id: int, request: Request, db: AsyncSession = Depends(get_read_db)
+):
+    """Get all chapters for a specific book. Supports ETag/If-None-Match."""
+    response = await ChapterController.chapters_response(request, book_id, db)
+    if response is None:
         raise HTTPException(status_code=404, detail="No chapters found for this book")
 
-    return chapters
+    return response
 
 
 @router.get("/chapters/{chapter_id}/content", response_model=ChapterContentResponse)
-async def get_chapter_content(chapter_id: int, db: Session = Depends(get_db)):
-    """Get chapter content and its summary from the database."""
-    chapter = db.query(Chapter).filter(Chapter.id == chapter_id).first()
-    if not chapter:
+async def get_chapter_content(
+    chapter_id: int,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(None, ge=1),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get chapter content and its summary from the database.
+
+    Pass offset/limit (in characters) to page through long chapters; the
+    response's next_offset is set while more content remains. Responses carry
+    ETag and Last-Modified; conditional requests get 304 Not Modified.
+    """
+    response = await ChapterController.content_response(
+        request, chapter_id, db, offset, limit
+    )
+    if response is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+
+    return response
+
+
+@router.get("/chapters/{chapter_id}/similar", response_model=list[SimilarChapter])
+async def get_similar_chapters(
+    chapter_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Chapters across the library most similar to this one ("more like this")"""
+    await ChapterController.ensure_content(chapter_id, db)
+    similar = await SimilarityController.similar(chapter_id, db, limit)
+    if similar is None:
         raise HTTPException(status_code=404, detail="Chapter not found")
+    return similar
 
-    return ChapterContentResponse(
-        id=chapter.id,
-        content=chapter.content,
-        summary=chapter.summary,
-        title=chapter.title,
+
+@router.get("/chapters/{chapter_id}/content/stream")
+async def stream_chapter_content(
+    chapter_id: int,
+    chunk_size: int = Query(ChapterController.STREAM_CHUNK_SIZE, ge=1024),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Stream chapter content as plain text, fetched from the database in chunks."""
+    total_length = await ChapterController.get_content_length(chapter_id, db)
+    if total_length is None:
+        raise HTTPException(status_code=404, detail="Chapter not found")
+
+    return StreamingResponse(
+        ChapterController.stream_content(
+            chapter_id, total_length, chunk_size, primary_only=reads_primary(db)
+        ),
+        media_type="text/plain; charset=utf-8",
     )
 
 
 @router.post("/chapters/{chapter_id}/summarize")
-async def summarize_chapter(chapter_id: int, db: Session = Depends(get_db)):
-    """Generate a summary for the chapter"""
+async def summarize_chapter(
+    chapter_id: int, force: bool = False, db: AsyncSession = Depends(get_write_db)
+):
+    """Generate a summary for the chapter, reusing a cached one unless forced"""
     try:
-        summary = await SummaryController.summarize_chapter(chapter_id, db)
+        summary = await SummaryController.summarize_chapter(chapter_id, db, force)
         return {"summary": summary}
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/chapters/{chapter_id}/summarize/stream")
+async def stream_chapter_summary(
+    chapter_id: int, force: bool = False, db: AsyncSession = Depends(get_write_db)
+):
+    """Generate a summary for the chapter, streamed as server-sent events"""
+    if not await db.scalar(select(Chapter.id).where(Chapter.id == chapter_id)):
+        raise HTTPException(status_code=404, detail="Chapter not found")
+
+    response = StreamingResponse(
+        SummaryController.stream_summary(chapter_id, force),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # The summary is saved as the stream ends; the done event carries it, and
+    # reads made afterwards go to the primary for a while
+    mark_write(response)
+    return response
+
+
+@router.post(
+    "/books/{book_id}/summarize", response_model=SummaryJobResponse, status_code=202
+)
+async def summarize_book(
+    book_id: int, force: bool = False, db: AsyncSession = Depends(get_write_db)
+):
+    """Queue a background job that summarizes every chapter of the book"""
+    try:
+        return await SummaryJobController.enqueue(book_id, db, force)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/summary-jobs/{job_id}", response_model=SummaryJobResponse)
+async def get_summary_job(job_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Get the status and progress of a summarization job"""
+    job = await SummaryJobController.get_job(job_id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Summary job not found")
+    return job
+
+
+@router.get("/summaries/cache/stats")
+async def get_summary_cache_stats() -> dict[str, int]:
+    """Hit/miss counters of the summary cache in this process"""
+    return SummaryController.cache_stats
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_chapters(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Full-text search across all chapters, ranked, with highlighted snippets"""
+    return await SearchController.search(q, db, limit, offset)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Request, SQL and stage metrics in the Prometheus text format"""
+    pool = get_async_engine().pool
+    DB_POOL_CONNECTIONS.set(pool.checkedout(), state="checked_out")
+    DB_POOL_CONNECTIONS.set(pool.checkedin(), state="idle")
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -10,7 +10,39 @@ class UploadResponse(BaseModel):
     success: bool
     message: str | None = None
     chapters: list[str] = []
+    book_id: int | None = None
+    deduplicated: bool = False
+    # Chapter content is extracted on first read or by a background backfill
+    lazy: bool = False
+    timings: dict[str, float] = {}
+
+
+class ChapterChange(BaseModel):
+    """A chapter written by a re-ingestion, with its position in the new edition"""
+
+    chapter_id: int
+    title: str
+    order: int
+
+
+class ReingestResponse(BaseModel):
+    """Response schema for re-ingesting a new edition of an existing book"""
+
+    filename: str
+    success: bool
+    message: str | None = None
     book_id: int
+    # Inserted chapters
+    added: list[ChapterChange] = []
+    # Content changed; the summary is cleared
+    updated: list[ChapterChange] = []
+    # Same content under a new title or position; the summary is kept
+    moved: list[ChapterChange] = []
+    # Deleted chapters, at their old position
+    removed: list[ChapterChange] = []
+    unchanged: int = 0
+    summaries_kept: int = 0
+    timings: dict[str, float] = {}
 
 
 class ChapterResponse(BaseModel):
@@ -32,3 +64,55 @@ class ChapterContentResponse(BaseModel):
     content: str | None
     summary: str | None
     title: str
+    offset: int = 0
+    total_length: int | None = None
+    next_offset: int | None = None
+    updated_at: datetime | None = None
+
+
+class SummaryJobResponse(BaseModel):
+    """Response schema for a whole-book summarization job"""
+
+    id: int
+    book_id: int
+    status: str
+    total_chapters: int
+    completed_chapters: int
+    failed_chapters: int
+    error: str | None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SearchHit(BaseModel):
+    """A chapter matching a full-text search"""
+
+    chapter_id: int
+    chapter_title: str
+    book_id: int
+    book_title: str
+    rank: float
+    snippet: str
+
+
+class SimilarChapter(BaseModel):
+    """A chapter similar to the requested one, by cosine similarity of embeddings"""
+
+    chapter_id: int
+    chapter_title: str
+    book_id: int
+    book_title: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    """Response schema for a page of full-text search results"""
+
+    query: str
+    results: list[SearchHit]
+    offset: int
+    limit: int
+    next_offset: int | None = None
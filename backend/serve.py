@@ -0,0 +1,153 @@
+"""
+Serve the API with one or more uvicorn workers
+
+With --preload the app and the modules it loads on first use (groq, pypdf,
+numpy, the database drivers) are imported once in the master process, which
+then binds the socket and forks the workers. Workers share those pages copy on
+write and are ready as soon as their lifespan hook has created the database
+engines, so scaling out or replacing a crashed worker costs a fork instead of a
+fresh interpreter. Without it each worker imports the app itself, as with
+``uvicorn --workers``.
+
+Usage:
+    python -m backend.serve [--host 0.0.0.0] [--port 8000] [--workers 4] [--preload]
+"""
+
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+APP = "backend.main:app"
+# Imported lazily by the app; loading them before forking shares them
+PRELOAD_MODULES = [
+    "groq",
+    "pypdf",
+    "backend.core.embeddings",
+    "backend.core.similarity_index",
+    "sqlalchemy.dialects.postgresql.asyncpg",
+    "sqlalchemy.dialects.postgresql.psycopg2",
+]
+# A worker exiting sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME = 1.0
+
+
+def preload() -> None:
+    """Import the app and the modules its workers would import on first use"""
+    start = time.perf_counter()
+    importlib.import_module("backend.main")
+    for module in PRELOAD_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Not preloading {module}: {e}")
+    # Keep the preloaded objects out of the collector's generations, so
+    # collections in the workers do not touch (and copy) their pages
+    gc.freeze()
+    logger.info(f"Preloaded the app in {time.perf_counter() - start:.2f}s")
+
+
+def run_worker(config: uvicorn.Config, sock: socket.socket) -> None:
+    """Run a uvicorn server on an inherited socket; never returns"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    status = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception(f"Worker {os.getpid()} failed")
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def serve_preloaded(host: str, port: int, workers: int) -> None:
+    """
+    Fork ``workers`` servers from a master that has preloaded the app
+
+    The master restarts workers that exit and forwards SIGTERM and SIGINT to
+    them as SIGTERM, so each finishes its in-flight requests before exiting.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind
+        workers: Number of worker processes
+    """
+    preload()
+    from backend.main import app
+
+    config = uvicorn.Config(app, host=host, port=port, lifespan="on")
+    sock = config.bind_socket()
+    children: dict[int, float] = {}
+    stopping = False
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            run_worker(config, sock)
+        children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def stop(signum: int, frame: object) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(
+            f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}"
+        )
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            time.sleep(MIN_WORKER_UPTIME)
+        if not stopping:
+            spawn()
+    sock.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        default=os.getenv("SERVE_PRELOAD", "false").lower() == "true",
+        help="Import the app once and fork the workers from it",
+    )
+    args = parser.parse_args()
+
+    if args.preload:
+        serve_preloaded(args.host, args.port, args.workers)
+    else:
+        uvicorn.run(APP, host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compare on-disk size and read latency of plain vs zlib-compressed chapter content.
+
+Loads a throwaway library, either the EPUBs given with --epub or synthetic
+chapters, measures the stored size of the content column and GET
+/chapters/{id}/content-style reads through ChapterController, converts the
+library with backend.cli.compress_content and measures again, then deletes
+it. Synthetic text draws on a tiny vocabulary and compresses far better than
+real prose; pass real books for representative ratios.
+
+Usage: python -m benchmarks.bench_compression --epub book1.epub book2.epub
+       python -m benchmarks.bench_compression --chapters 500 --chapter-kb 64
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+
+from backend.cli.compress_content import convert_content
+from backend.controllers.chapter_controller import ChapterController
+from backend.controllers.upload_controller import UploadController
+from backend.database import AsyncSessionLocal, SessionLocal
+from backend.models.book import Book, Chapter
+from benchmarks.synthetic import make_paragraphs
+
+PAGE_CHARS = 4096
+
+
+def load_library(epubs: list[Path], chapters: int, chapter_kb: int) -> list[int]:
+    if epubs:
+        books = {
+            path.name: dict(UploadController.extract_chapters(path)) for path in epubs
+        }
+    else:
+        books = {
+            "bench-compression.epub": {
+                f"Chapter {index}": "\n".join(make_paragraphs(chapter_kb, index))
+                for index in range(1, chapters + 1)
+            }
+        }
+
+    with SessionLocal() as db:
+        return [
+            UploadController.save_book_data(name, book_chapters, db, compress=False).id
+            for name, book_chapters in books.items()
+        ]
+
+
+def stored_size(book_ids: list[int]) -> tuple[int, int]:
+    """(bytes of text, bytes stored) of the library's content columns"""
+    with SessionLocal() as db:
+        text_bytes, stored_bytes = db.execute(
+            select(
+                func.coalesce(func.sum(func.octet_length(Chapter.content)), 0),
+                func.coalesce(func.sum(func.pg_column_size(Chapter.content)), 0)
+                + func.coalesce(
+                    func.sum(func.pg_column_size(Chapter.content_compressed)), 0
+                ),
+            ).where(Chapter.book_id.in_(book_ids))
+        ).one()
+    return text_bytes, stored_bytes
+
+
+async def read_latencies(chapter_ids: list[int], limit: int | None) -> list[float]:
+    latencies = []
+    async with AsyncSessionLocal() as db:
+        for chapter_id in chapter_ids:
+            start = time.perf_counter()
+            await ChapterController.get_content(chapter_id, db, limit=limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def report(label: str, stored_bytes: int, chapter_ids: list[int]) -> None:
+    for read, limit in (("full", None), (f"first {PAGE_CHARS}", PAGE_CHARS)):
+        latencies = await read_latencies(chapter_ids, limit)
+        quantiles = statistics.quantiles(latencies, n=20)
+        print(
+            f"{label:<12} {stored_bytes / 1024**2:>10.1f} {read:<12} "
+            f"{quantiles[9]:>8.2f} {quantiles[18]:>8.2f}"
+        )
+
+
+async def run(book_ids: list[int], reads: int) -> None:
+    # Sync setup and conversion block the loop; harmless in a benchmark
+    with SessionLocal() as db:
+        all_ids = db.scalars(
+            select(Chapter.id).where(Chapter.book_id.in_(book_ids))
+        ).all()
+    sample = random.Random(0).choices(all_ids, k=reads)
+
+    text_bytes, plain_bytes = stored_size(book_ids)
+    print(f"{len(all_ids)} chapters, {text_bytes / 1024**2:.1f} MB of text")
+    print(f"{'storage':<12} {'stored MB':>10} {'read':<12} {'p50 ms':>8} {'p95 ms':>8}")
+    await report("text (TOAST)", plain_bytes, sample)
+
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        for book_id in book_ids:
+            convert_content(db, book_id=book_id)
+        convert_seconds = time.perf_counter() - start
+    _, compressed_bytes = stored_size(book_ids)
+    await report("zlib", compressed_bytes, sample)
+    print(
+        f"conversion took {convert_seconds:.1f}s; zlib stores "
+        f"{compressed_bytes / plain_bytes:.0%} of the TOAST-compressed size"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--epub", type=Path, nargs="*", default=[])
+    parser.add_argument("--chapters", type=int, default=500)
+    parser.add_argument("--chapter-kb", type=int, default=64)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    book_ids = load_library(args.epub, args.chapters, args.chapter_kb)
+    try:
+        asyncio.run(run(book_ids, args.reads))
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Chapter).where(Chapter.book_id.in_(book_ids)))
+            db.execute(delete(Book).where(Book.id.in_(book_ids)))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
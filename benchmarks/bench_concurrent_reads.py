@@ -0,0 +1,63 @@
+"""
+Fire concurrent GET /chapters/{id}/content requests at the ASGI app and report
+throughput and latency percentiles.
+
+Run it with different DB_POOL_SIZE values to see throughput follow the pool.
+
+Usage: python -m benchmarks.bench_concurrent_reads --chapter-id 1 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from backend.main import app
+
+
+async def timed_get(client: httpx.AsyncClient, url: str) -> float:
+    start = time.perf_counter()
+    response = await client.get(url)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(chapter_id: int, concurrency: int, requests: int) -> None:
+    url = f"/chapters/{chapter_id}/content"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await timed_get(client, url)  # warm up the pool
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one() -> float:
+            async with semaphore:
+                return await timed_get(client, url)
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{requests} requests, concurrency {concurrency}: "
+        f"{requests / elapsed:.0f} req/s, "
+        f"p50 {quantiles[49] * 1000:.1f}ms, p99 {quantiles[98] * 1000:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chapter-id", type=int, required=True)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.chapter_id, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare chapter extraction throughput (items/sec) of the BeautifulSoup
+implementation against the single-pass tokenizer, serially and in the process pool.
+
+Usage: python -m benchmarks.bench_extraction --items 1000 --chapter-kb 8
+"""
+
+import argparse
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from ebooklib import epub
+
+from backend.controllers.upload_controller import UploadController
+from backend.parsers.epub import EpubParser
+from benchmarks.synthetic import write_synthetic_epub
+
+
+def extract_chapters_bs4(epub_path: Path) -> dict[str, str]:
+    """The original BeautifulSoup-based extraction, kept as the baseline"""
+    book = epub.read_epub(str(epub_path), {"ignore_ncx": True})
+    chapters: dict[str, str] = {}
+
+    for item in book.get_items():
+        if isinstance(item, epub.EpubHtml):
+            soup = BeautifulSoup(item.get_body_content(), "html.parser")
+
+            title = None
+            for heading in soup.find_all(["h1", "h2", "h3"]):
+                if heading.text.strip():
+                    title = heading.text.strip()
+                    heading.decompose()
+                    break
+
+            if not title:
+                title = item.id
+
+            content = soup.get_text().strip()
+            if content:
+                chapters[title] = content
+
+    return chapters
+
+
+def extract_chapters(epub_path: Path) -> dict[str, str]:
+    return dict(UploadController.extract_chapters(epub_path))
+
+
+def run(
+    name: str, extract: Callable[[Path], dict[str, str]], path: Path, items: int
+) -> dict[str, str]:
+    start = time.perf_counter()
+    chapters = extract(path)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed:8.3f}s {items / elapsed:10.1f} items/sec")
+    return chapters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--chapter-kb", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_synthetic_epub(
+            Path(tmp) / "bench.epub", args.items, args.chapter_kb
+        )
+        # The baseline also parses the generated nav document, which is an HTML
+        # item but not part of the spine
+        baseline = run(
+            "beautifulsoup (baseline)", extract_chapters_bs4, path, args.items + 1
+        )
+
+        EpubParser.PARALLEL_MIN_ITEMS = args.items + 1
+        serial = run("tokenizer, serial", extract_chapters, path, args.items)
+
+        EpubParser.PARALLEL_MIN_ITEMS = 0
+        # Warm up the pool so process startup is not counted
+        extract_chapters(path)
+        parallel = run(
+            f"tokenizer, {EpubParser.PROCESSES} processes",
+            extract_chapters,
+            path,
+            args.items,
+        )
+
+    assert len(serial) == args.items, "spine chapters missing"
+    # Drop the nav document, titled after the book
+    baseline = {title: baseline[title] for title in serial if title in baseline}
+    assert serial == baseline, "serial tokenizer output differs from baseline"
+    assert parallel == baseline, "parallel tokenizer output differs from baseline"
+    print("Output identical to baseline")
+
+
+if __name__ == "__main__":
+    main()
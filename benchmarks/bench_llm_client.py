@@ -0,0 +1,64 @@
+"""
+Measure LLMClient throughput and tail latency against a fake LLM server.
+
+Start the server first, then point the client at it:
+    python -m benchmarks.fake_llm_server --port 9000 --error-rate 0.05 &
+    GROQ_BASE_URL=http://127.0.0.1:9000 GROQ_API_KEY=fake \\
+        python -m benchmarks.bench_llm_client --requests 500 --max-concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.core.llm import LLMClient
+
+
+async def run(client: LLMClient, requests: int) -> None:
+    async def one() -> float | None:
+        start = time.perf_counter()
+        try:
+            await client.complete("Summarize this chapter. " * 50, model="fake")
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [result for result in results if result is not None]
+    failures = requests - len(latencies)
+    print(
+        f"{requests} requests in {elapsed:.2f}s: {len(latencies) / elapsed:.1f} req/s"
+    )
+    print(f"failures after retries: {failures}")
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"p50 {quantiles[49] * 1000:.0f}ms, p95 {quantiles[94] * 1000:.0f}ms, "
+            f"p99 {quantiles[98] * 1000:.0f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--requests-per-second", type=float, default=0)
+    parser.add_argument("--burst", type=float, default=1)
+    parser.add_argument("--max-retries", type=int, default=4)
+    args = parser.parse_args()
+
+    client = LLMClient(
+        max_concurrency=args.max_concurrency,
+        requests_per_second=args.requests_per_second,
+        burst=args.burst,
+        max_retries=args.max_retries,
+    )
+    asyncio.run(run(client, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare chapter persistence throughput (rows/sec) of per-row ORM adds against
+the bulk INSERT used by UploadController.save_book_data.
+
+Runs against the database configured by the POSTGRES_* environment variables;
+every book written by the benchmark is deleted afterwards.
+
+Usage: python -m benchmarks.bench_persistence --sizes 10 100 2000 --chapter-kb 4
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from backend.controllers.upload_controller import UploadController
+from backend.database import SessionLocal
+from backend.models.book import Book, Chapter
+from benchmarks.synthetic import make_paragraphs
+
+
+def save_book_data_orm(filename: str, chapters: dict[str, str], db: Session) -> Book:
+    """The original per-row ORM implementation, kept as the baseline"""
+    book = Book(
+        title=filename,
+        file_path=str(UploadController.UPLOAD_DIR / filename),
+    )
+    db.add(book)
+    db.flush()
+
+    for index, (chapter_title, chapter_content) in enumerate(chapters.items(), 1):
+        db.add(
+            Chapter(
+                book_id=book.id,
+                title=chapter_title,
+                content=chapter_content,
+                order=index,
+            )
+        )
+
+    db.commit()
+    return book
+
+
+def make_chapters(count: int, chapter_kb: int) -> dict[str, str]:
+    return {
+        f"Chapter {index}": "\n".join(make_paragraphs(chapter_kb, index))
+        for index in range(1, count + 1)
+    }
+
+
+def run(
+    name: str,
+    save: Callable[[str, dict[str, str], Session], Book],
+    chapters: dict[str, str],
+    repeat: int,
+) -> float:
+    book_ids: list[int] = []
+    elapsed = 0.0
+    with SessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            book = save(f"bench-{name}.epub", chapters, db)
+            elapsed += time.perf_counter() - start
+            book_ids.append(book.id)
+
+        db.execute(delete(Chapter).where(Chapter.book_id.in_(book_ids)))
+        db.execute(delete(Book).where(Book.id.in_(book_ids)))
+        db.commit()
+
+    return len(chapters) * repeat / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 2000])
+    parser.add_argument("--chapter-kb", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'chapters':>8} {'orm rows/sec':>14} {'bulk rows/sec':>14} {'speedup':>8}")
+    for size in args.sizes:
+        chapters = make_chapters(size, args.chapter_kb)
+        orm = run("orm", save_book_data_orm, chapters, args.repeat)
+        bulk = run("bulk", UploadController.save_book_data, chapters, args.repeat)
+        print(f"{size:>8} {orm:>14.0f} {bulk:>14.0f} {bulk / orm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
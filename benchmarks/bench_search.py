@@ -0,0 +1,127 @@
+"""
+Measure GET /search-style query latency over a synthetic corpus.
+
+Seeds a throwaway book with --chapters chapters (a few containing rare
+words), checks that searching each rare word finds every chapter containing
+it, with a snippet, runs each query --repeat times through SearchController
+and prints latency percentiles, then deletes the corpus. --compress stores the
+corpus zlib-compressed, as CHAPTER_CONTENT_COMPRESSION=zlib does.
+
+Usage: python -m benchmarks.bench_search --chapters 5000 --chapter-kb 4 [--compress]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import delete, text
+
+from backend.controllers.search_controller import SearchController
+from backend.controllers.upload_controller import UploadController
+from backend.database import AsyncSessionLocal, SessionLocal
+from backend.models.book import Book, Chapter
+from benchmarks.synthetic import make_paragraphs
+
+RARE_WORDS = ["quasar", "nebula", "obsidian"]
+QUERIES = [
+    "river",  # matches every chapter
+    "quick brown fox",
+    '"lazy dog"',
+    "quasar",  # matches ~1% of chapters
+    "nebula or obsidian",
+    "mountain -river",
+]
+
+
+def seed(chapters: int, chapter_kb: int, compress: bool) -> tuple[int, dict[str, int]]:
+    """Returns the book ID and how many chapters contain each rare word"""
+    rng = random.Random(0)
+    corpus: dict[str, str] = {}
+    rare_counts = dict.fromkeys(RARE_WORDS, 0)
+    for index in range(1, chapters + 1):
+        paragraphs = make_paragraphs(chapter_kb, index)
+        if rng.random() < 0.01:
+            word = rng.choice(RARE_WORDS)
+            paragraphs.insert(rng.randrange(len(paragraphs)), word)
+            rare_counts[word] += 1
+        corpus[f"Chapter {index}"] = "\n".join(paragraphs)
+
+    with SessionLocal() as db:
+        book = UploadController.save_book_data(
+            "bench-search.epub", corpus, db, compress=compress
+        )
+        # Refresh planner statistics, as autovacuum would after a bulk load
+        db.execute(text("ANALYZE chapters"))
+        db.commit()
+        return book.id, rare_counts
+
+
+async def check(rare_counts: dict[str, int]) -> list[str]:
+    """Words appearing only in chapter bodies must be found, with snippets"""
+    problems = []
+    async with AsyncSessionLocal() as db:
+        for word, expected in rare_counts.items():
+            response = await SearchController.search(word, db, limit=expected + 1)
+            if len(response.results) != expected:
+                problems.append(
+                    f"{word!r}: {len(response.results)} hits, expected {expected}"
+                )
+            if any(word not in hit.snippet for hit in response.results):
+                problems.append(f"{word!r}: snippet without the word")
+    return problems
+
+
+def cleanup(book_id: int) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(Chapter).where(Chapter.book_id == book_id))
+        db.execute(delete(Book).where(Book.id == book_id))
+        db.commit()
+
+
+async def run(repeat: int, rare_counts: dict[str, int]) -> list[str]:
+    problems = await check(rare_counts)
+    for problem in problems:
+        print(f"Search check failed: {problem}")
+
+    print(f"{'query':<22} {'hits':>5} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    async with AsyncSessionLocal() as db:
+        for q in QUERIES:
+            latencies = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = await SearchController.search(q, db, limit=20)
+                latencies.append((time.perf_counter() - start) * 1000)
+            quantiles = statistics.quantiles(latencies, n=20)
+            print(
+                f"{q:<22} {len(response.results):>5} {quantiles[9]:>8.1f} "
+                f"{quantiles[18]:>8.1f} {max(latencies):>8.1f}"
+            )
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chapters", type=int, default=5000)
+    parser.add_argument("--chapter-kb", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--compress", action="store_true", help="store the corpus compressed"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    book_id, rare_counts = seed(args.chapters, args.chapter_kb, args.compress)
+    print(f"Seeded {args.chapters} chapters in {time.perf_counter() - start:.1f}s")
+    try:
+        problems = asyncio.run(run(args.repeat, rare_counts))
+    finally:
+        cleanup(book_id)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Build a chapter similarity index of --chapters synthetic chapters and measure
+"more like this" query latency, for single lookups and batched queries.
+
+The index is written to a temporary directory, so no database is needed. Build
+time is dominated by the embedder; query time by one float32 matrix-vector
+product over the memory-mapped index.
+
+Usage: python -m benchmarks.bench_similarity --chapters 100000 --chapter-kb 2
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.core.embeddings import HashingEmbedder
+from backend.core.similarity_index import SimilarityIndex
+from benchmarks.synthetic import WORDS, make_paragraphs
+
+# Extra topic words, so chapters differ by more than word order
+TOPICS = [
+    f"{word}{suffix}" for word in WORDS for suffix in ("ing", "er", "ness", "ful")
+]
+
+
+def chapter_text(index: int, chapter_kb: int) -> str:
+    rng = random.Random(index)
+    topic = " ".join(rng.choices(TOPICS, k=40))
+    return topic + "\n" + "\n".join(make_paragraphs(chapter_kb, index))
+
+
+def build(
+    index: SimilarityIndex, embedder: HashingEmbedder, args: argparse.Namespace
+) -> float:
+    start = time.perf_counter()
+    for first in range(0, args.chapters, args.batch_size):
+        ids = list(range(first + 1, min(first + args.batch_size, args.chapters) + 1))
+        index.upsert(
+            ids, embedder.embed([chapter_text(i, args.chapter_kb) for i in ids])
+        )
+    return time.perf_counter() - start
+
+
+def report(label: str, latencies: list[float], per: int = 1) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label}: p50 {quantiles[49] * 1000:.2f}ms, p99 {quantiles[98] * 1000:.2f}ms"
+        f" ({per / statistics.mean(latencies):.0f} queries/s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chapters", type=int, default=100_000)
+    parser.add_argument("--chapter-kb", type=int, default=2)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-batch", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(args.dim)
+    with tempfile.TemporaryDirectory(prefix="similarity-bench-") as directory:
+        index = SimilarityIndex(Path(directory), embedder.dim, embedder.name)
+        elapsed = build(index, embedder, args)
+        size_mb = args.chapters * args.dim * 4 / 2**20
+        print(
+            f"Indexed {args.chapters} chapters ({size_mb:.0f}MB of vectors) in "
+            f"{elapsed:.1f}s, {args.chapters / elapsed:.0f} chapters/s"
+        )
+
+        # A fresh instance reads the matrix through the page cache, like a
+        # newly started API worker
+        index = SimilarityIndex(Path(directory), embedder.dim, embedder.name)
+        rng = random.Random(0)
+        chapter_ids = [rng.randint(1, args.chapters) for _ in range(args.queries)]
+        vectors = np.stack([index.vector(chapter_id) for chapter_id in chapter_ids])
+        index.search(vectors[0], args.k)  # fault the pages in
+
+        latencies = []
+        for chapter_id, vector in zip(chapter_ids, vectors, strict=True):
+            start = time.perf_counter()
+            index.search(vector, args.k, [chapter_id])
+            latencies.append(time.perf_counter() - start)
+        report(f"single query, k={args.k}", latencies)
+
+        latencies = []
+        for first in range(0, args.queries, args.query_batch):
+            batch = slice(first, first + args.query_batch)
+            start = time.perf_counter()
+            index.search(vectors[batch], args.k, chapter_ids[batch])
+            latencies.append(time.perf_counter() - start)
+        report(f"batches of {args.query_batch}", latencies, args.query_batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Break down the API's cold start with ``python -X importtime`` and time how long
+workers take to serve their first request.
+
+Each run imports backend.main in a fresh interpreter; the report shows the
+median total import time, the top-level packages that account for it, and
+which heavy modules the import pulled in. With --compare REF the same
+measurement runs against a git ref checked out into a temporary worktree.
+With --serve, backend.serve is started in each mode and timed until it answers
+/metrics (this needs the database).
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--compare HEAD~1] [--serve]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules the app should only import on first use
+HEAVY_MODULES = [
+    "groq",
+    "httpx",
+    "ebooklib",
+    "lxml",
+    "pypdf",
+    "numpy",
+    "asyncpg",
+    "psycopg2",
+]
+CHECK_MODULES = (
+    "import sys, backend.main; "
+    f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def import_profile(cwd: Path) -> tuple[int, dict[str, int], list[str]]:
+    """
+    Import backend.main under -X importtime in a fresh interpreter
+
+    Returns:
+        Total microseconds, microseconds spent in each top-level package's own
+        modules, and the heavy modules that were imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHECK_MODULES],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": str(cwd)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0
+    packages: dict[str, int] = defaultdict(int)
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        total += int(self_us)
+        # Self time, so a package is not also charged for what it imports
+        packages[name.strip().split(".")[0]] += int(self_us)
+    # The app logs to stdout too
+    [modules] = [
+        line[len("loaded:") :]
+        for line in result.stdout.splitlines()
+        if line.startswith("loaded:")
+    ]
+    loaded = [m for m in modules.split(",") if m]
+    return total, packages, loaded
+
+
+def report_imports(label: str, cwd: Path, runs: int, top: int) -> float:
+    profiles = [import_profile(cwd) for _ in range(runs)]
+    total = statistics.median(total for total, _, _ in profiles) / 1000
+    packages: dict[str, list[int]] = defaultdict(list)
+    for _, run_packages, _ in profiles:
+        for name, cumulative in run_packages.items():
+            packages[name].append(cumulative)
+    ranked = sorted(
+        ((statistics.median(times) / 1000, name) for name, times in packages.items()),
+        reverse=True,
+    )
+    print(f"{label}: import backend.main {total:.0f}ms (median of {runs})")
+    for ms, name in ranked[:top]:
+        print(f"  {name:<24} {ms:7.1f}ms")
+    print(f"  heavy modules loaded: {', '.join(profiles[0][2]) or 'none'}")
+    return total
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_response(extra_args: list[str], timeout: float = 60) -> float:
+    """Start backend.serve and time it until /metrics answers"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.serve", "--host", "127.0.0.1"]
+        + ["--port", str(port), *extra_args],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1)
+                return time.perf_counter() - start
+            except httpx.TransportError:
+                time.sleep(0.01)
+        raise TimeoutError(f"backend.serve {' '.join(extra_args)} did not start")
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def report_serving(workers: int, runs: int) -> None:
+    modes = {
+        "1 worker": [],
+        f"{workers} workers": ["--workers", str(workers)],
+        f"{workers} workers, preloaded": ["--workers", str(workers), "--preload"],
+    }
+    for label, extra_args in modes.items():
+        times = [time_to_first_response(extra_args) for _ in range(runs)]
+        print(f"{label}: first response after {statistics.median(times) * 1000:.0f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--compare", metavar="REF", help="Git ref to compare with")
+    parser.add_argument("--serve", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    total = report_imports("working tree", ROOT, args.runs, args.top)
+    if args.compare:
+        with tempfile.TemporaryDirectory(prefix="startup-bench-") as directory:
+            worktree = Path(directory) / "tree"
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", str(worktree), args.compare],
+                cwd=ROOT,
+                capture_output=True,
+                check=True,
+            )
+            try:
+                before = report_imports(args.compare, worktree, args.runs, args.top)
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", str(worktree)],
+                    cwd=ROOT,
+                    check=True,
+                )
+        print(f"Change: {total - before:+.0f}ms ({(total / before - 1) * 100:+.0f}%)")
+    if args.serve:
+        report_serving(args.workers, args.runs)
+
+
+if __name__ == "__main__":
+    main()
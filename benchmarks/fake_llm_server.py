@@ -0,0 +1,118 @@
+"""
+Local stand-in for the Groq chat completions API with configurable latency and
+failure rate, for testing and benchmarking LLMClient without network access.
+
+Usage:
+    python -m benchmarks.fake_llm_server --port 9000 --latency-ms 300 --error-rate 0.05
+    GROQ_BASE_URL=http://localhost:9000 GROQ_API_KEY=fake uvicorn backend.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+async def stream_chunks(text: str, model: str, token_ms: float) -> AsyncIterator[str]:
+    """Yield ``text`` word by word as OpenAI-style chat completion chunks"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    words = text.split(" ")
+    for index, word in enumerate(words):
+        token = word if index == len(words) - 1 else f"{word} "
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {"index": 0, "delta": {"content": token}, "finish_reason": None}
+            ],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(token_ms / 1000)
+    yield "data: [DONE]\n\n"
+
+
+def create_app(
+    latency_ms: float = 300,
+    jitter_ms: float = 100,
+    error_rate: float = 0.0,
+    token_ms: float = 20,
+) -> FastAPI:
+    """
+    Build the fake API app
+
+    Args:
+        latency_ms: Mean latency before the response (or first streamed token)
+        jitter_ms: Uniform +/- jitter applied to the latency
+        error_rate: Fraction of requests answered with a 429 or 503
+        token_ms: Delay between streamed tokens
+    """
+    app = FastAPI(title="Fake LLM API")
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        delay = max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+
+        if random.random() < error_rate:
+            status = random.choice([429, 503])
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": "fake failure", "type": "fake"}},
+                headers={"retry-after": "0.1"} if status == 429 else None,
+            )
+
+        prompt = body["messages"][-1]["content"]
+        summary = f"Fake summary of {len(prompt)} prompt characters."
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(summary, body.get("model", "fake"), token_ms),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": summary},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt) // 4,
+                "completion_tokens": len(summary) // 4,
+                "total_tokens": (len(prompt) + len(summary)) // 4,
+            },
+        }
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.token_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
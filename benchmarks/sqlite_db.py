@@ -0,0 +1,61 @@
+"""
+In-memory SQLite stand-in for PostgreSQL, for micro-benchmarks that only need
+the books and chapters tables (extraction and persistence).
+
+The models target PostgreSQL: tables live in the ``public`` schema and
+chapters.search_vector is a TSVECTOR written with PostgreSQL text search
+functions. Here the schema is translated away, search_vector is created as a
+plain TEXT column and the text search functions are stubs returning NULL, so
+it stays NULL. Full-text search, the summary cache upsert and other
+PostgreSQL-only queries are not available.
+"""
+
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base
+from backend.models.book import Book, Chapter
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector(type_: TSVECTOR, compiler: Any, **kw: Any) -> str:
+    return "TEXT"
+
+
+def _register_stubs(dbapi_connection: Any, connection_record: Any) -> None:
+    # Called by the statements that write Chapter.search_vector
+    for name in ("to_tsvector", "setweight"):
+        dbapi_connection.create_function(name, 2, lambda *args: None)
+
+
+def create_sqlite_engine(url: str = "sqlite://") -> Engine:
+    """
+    Create a SQLite engine with the books and chapters tables
+
+    Args:
+        url: SQLite URL; the default is a private in-memory database
+
+    Returns:
+        Engine whose sessions can be passed to UploadController.save_book_data
+    """
+    engine = create_engine(
+        url,
+        # One connection, so every session sees the same in-memory database
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+        execution_options={"schema_translate_map": {"public": None}},
+    )
+    event.listen(engine, "connect", _register_stubs)
+    Base.metadata.create_all(engine, tables=[Book.__table__, Chapter.__table__])
+    return engine
+
+
+def sqlite_sessionmaker(url: str = "sqlite://") -> sessionmaker:
+    return sessionmaker(
+        autocommit=False, autoflush=False, bind=create_sqlite_engine(url)
+    )
@@ -0,0 +1,475 @@
+"""
+Reproducible benchmark suite for ingestion, reads and summarization, with the
+results written as JSON so runs can be compared over time.
+
+Generates synthetic EPUBs (--books x --chapters x --chapter-kb) and measures:
+
+    extract    UploadController.extract_chapters, per book
+    persist    UploadController.save_book_data, per book
+    upload     POST /upload through the ASGI app
+    toc        GET /books/{id}/chapters
+    content    GET /chapters/{id}/content
+    summarize  POST /chapters/{id}/summarize?force=true, with the Groq API
+               replaced by benchmarks.fake_llm_server at --llm-latency-ms
+
+With --db postgres (the default) everything runs against the POSTGRES_*
+database and every book written is deleted afterwards. --db sqlite runs only
+extract and persist, against an in-memory SQLite database, for quick
+micro-benchmarks on a machine without PostgreSQL.
+
+Usage:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --db sqlite --chapters 200 --chapter-kb 32
+    python -m benchmarks.suite --output new.json --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.cli.import_library import file_sha256
+from backend.controllers.similarity_controller import SimilarityController
+from backend.controllers.summary_controller import SummaryController
+from backend.controllers.upload_controller import UploadController
+from backend.models.book import Book, Chapter
+from backend.models.summary import SummaryCache
+from benchmarks.fake_llm_server import create_app
+from benchmarks.synthetic import write_synthetic_epub
+
+BENCHMARKS = ("extract", "persist", "upload", "toc", "content", "summarize")
+SQLITE_BENCHMARKS = ("extract", "persist")
+# Settings that change the numbers, recorded with every run
+RECORDED_ENV = (
+    "DB_POOL_SIZE",
+    "DB_POOL_MAX_OVERFLOW",
+    "EXTRACT_PROCESSES",
+    "UPLOAD_LAZY_PARSE",
+    "CHAPTER_CONTENT_COMPRESSION",
+    "RESPONSE_CACHE_SIZE",
+    "LLM_MAX_CONCURRENCY",
+    "SUMMARY_CHUNK_TOKENS",
+)
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def summarize(latencies: list[float], elapsed: float, **extra: Any) -> dict[str, Any]:
+    """
+    Throughput and latency percentiles of one benchmark
+
+    Args:
+        latencies: Seconds per operation
+        elapsed: Wall-clock seconds for all operations, which may overlap
+        extra: Benchmark-specific fields to include
+
+    Returns:
+        JSON-serializable result with latencies in milliseconds
+    """
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(len(ordered) / elapsed, 2) if elapsed else None,
+        **{
+            f"p{pct}_ms": round(percentile(ordered, pct) * 1000, 2)
+            for pct in (50, 90, 99)
+        },
+        "max_ms": round(ordered[-1] * 1000, 2),
+        **extra,
+    }
+
+
+def run_sync(operations: list[Callable[[], Any]]) -> tuple[list[float], float]:
+    """Run operations one after another, returning (latencies, elapsed)"""
+    latencies = []
+    start = time.perf_counter()
+    for operation in operations:
+        op_start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - op_start)
+    return latencies, time.perf_counter() - start
+
+
+async def run_concurrent(
+    operations: list[Callable[[], Awaitable[Any]]], concurrency: int
+) -> tuple[list[float], float]:
+    """Run operations with at most ``concurrency`` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed_operation(operation: Callable[[], Awaitable[Any]]) -> float:
+        async with semaphore:
+            op_start = time.perf_counter()
+            await operation()
+            return time.perf_counter() - op_start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*map(timed_operation, operations))
+    return list(latencies), time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def fake_llm(latency_ms: float, jitter_ms: float) -> Iterator[str]:
+    """Serve the fake Groq API in a background thread and point the client at it"""
+    port = _free_port()
+    config = uvicorn.Config(
+        create_app(latency_ms, jitter_ms, error_rate=0.0, token_ms=0),
+        host="127.0.0.1",
+        port=port,
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    base_url = f"http://127.0.0.1:{port}"
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    try:
+        yield base_url
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+class BenchmarkSuite:
+    """Generates the synthetic library, runs the selected benchmarks, cleans up"""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.results: dict[str, Any] = {}
+        self.epubs: list[Path] = []
+        self.chapters: dict[Path, dict[str, str]] = {}
+        self.book_ids: list[int] = []
+        self.uploaded_hashes: list[str] = []
+
+    def selected(self, name: str) -> bool:
+        return name in self.args.only
+
+    def generate_library(self, directory: Path) -> None:
+        args = self.args
+        self.epubs = [
+            write_synthetic_epub(
+                directory / f"bench-{args.seed}-{index}.epub",
+                args.chapters,
+                args.chapter_kb,
+                seed=args.seed * 1000 + index,
+            )
+            for index in range(args.books)
+        ]
+
+    def bench_extract(self) -> None:
+        def extract(path: Path) -> None:
+            self.chapters[path] = dict(UploadController.extract_chapters(path))
+
+        latencies, elapsed = run_sync([lambda p=p: extract(p) for p in self.epubs])
+        text_bytes = sum(
+            len(content)
+            for chapters in self.chapters.values()
+            for content in chapters.values()
+        )
+        self.results["extract"] = summarize(
+            latencies, elapsed, text_mb_per_s=round(text_bytes / 2**20 / elapsed, 2)
+        )
+
+    def bench_persist(self, session_factory: sessionmaker) -> None:
+        if not self.chapters:
+            self.chapters = {
+                path: dict(UploadController.extract_chapters(path))
+                for path in self.epubs
+            }
+
+        with session_factory() as db:
+
+            def save(path: Path) -> None:
+                book = UploadController.save_book_data(
+                    f"persist-{path.name}", self.chapters[path], db
+                )
+                self.book_ids.append(book.id)
+
+            latencies, elapsed = run_sync([lambda p=p: save(p) for p in self.epubs])
+
+        rows = sum(len(chapters) for chapters in self.chapters.values())
+        self.results["persist"] = summarize(
+            latencies, elapsed, chapters_per_s=round(rows / elapsed, 2)
+        )
+
+    async def bench_api(self, session_factory: sessionmaker) -> None:
+        """Upload, read and summarize through the ASGI app in one event loop"""
+        from backend.main import app
+
+        # The app logs at INFO; a line per request would swamp the report
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+
+        args = self.args
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            upload_ids = await self.bench_upload(client, session_factory)
+            if not upload_ids:
+                return
+
+            with session_factory() as db:
+                chapter_ids = list(
+                    db.scalars(
+                        select(Chapter.id)
+                        .where(Chapter.book_id.in_(upload_ids))
+                        .order_by(Chapter.id)
+                    )
+                )
+
+            async def get(url: str) -> None:
+                response = await client.get(url)
+                response.raise_for_status()
+
+            if self.selected("toc"):
+                urls = [
+                    f"/books/{self.rng.choice(upload_ids)}/chapters"
+                    for _ in range(args.requests)
+                ]
+                latencies, elapsed = await run_concurrent(
+                    [lambda url=url: get(url) for url in urls], args.concurrency
+                )
+                self.results["toc"] = summarize(latencies, elapsed)
+
+            if self.selected("content"):
+                urls = [
+                    f"/chapters/{self.rng.choice(chapter_ids)}/content"
+                    for _ in range(args.requests)
+                ]
+                latencies, elapsed = await run_concurrent(
+                    [lambda url=url: get(url) for url in urls], args.concurrency
+                )
+                self.results["content"] = summarize(latencies, elapsed)
+
+            if self.selected("summarize"):
+                sample = self.rng.sample(
+                    chapter_ids, min(args.summaries, len(chapter_ids))
+                )
+                with fake_llm(args.llm_latency_ms, args.llm_jitter_ms):
+
+                    async def summarize_chapter(chapter_id: int) -> None:
+                        response = await client.post(
+                            f"/chapters/{chapter_id}/summarize", params={"force": True}
+                        )
+                        response.raise_for_status()
+
+                    latencies, elapsed = await run_concurrent(
+                        [lambda c=c: summarize_chapter(c) for c in sample],
+                        args.concurrency,
+                    )
+                self.results["summarize"] = summarize(
+                    latencies,
+                    elapsed,
+                    llm_latency_ms=args.llm_latency_ms,
+                    llm_jitter_ms=args.llm_jitter_ms,
+                )
+
+    async def bench_upload(
+        self, client: httpx.AsyncClient, session_factory: sessionmaker
+    ) -> list[int]:
+        hashes = [file_sha256(path) for path in self.epubs]
+        # Left behind by an interrupted run; would turn uploads into dedup hits
+        with session_factory() as db:
+            self.delete_books(
+                db,
+                list(db.scalars(select(Book.id).where(Book.content_hash.in_(hashes)))),
+            )
+
+        book_ids: list[int] = []
+
+        async def upload(path: Path) -> None:
+            with open(path, "rb") as f:
+                response = await client.post(
+                    "/upload",
+                    params={"lazy": False},
+                    files={"file": (path.name, f, "application/epub+zip")},
+                )
+            response.raise_for_status()
+            book_ids.append(response.json()["book_id"])
+
+        latencies, elapsed = await run_concurrent(
+            [lambda p=p: upload(p) for p in self.epubs], self.args.concurrency
+        )
+        self.book_ids.extend(book_ids)
+        self.uploaded_hashes = hashes
+        if self.selected("upload"):
+            size_mb = sum(path.stat().st_size for path in self.epubs) / 2**20
+            self.results["upload"] = summarize(
+                latencies, elapsed, file_mb_per_s=round(size_mb / elapsed, 2)
+            )
+        return book_ids
+
+    @staticmethod
+    def delete_books(db: Session, book_ids: list[int]) -> None:
+        if not book_ids:
+            return
+        keys = {
+            SummaryController.summary_key(chapter.text or "")
+            for chapter in db.scalars(
+                select(Chapter).where(
+                    Chapter.book_id.in_(book_ids), Chapter.summary.is_not(None)
+                )
+            )
+        }
+        for content_hash, model, prompt_version in keys:
+            db.execute(
+                delete(SummaryCache).where(
+                    SummaryCache.content_hash == content_hash,
+                    SummaryCache.model == model,
+                    SummaryCache.prompt_version == prompt_version,
+                )
+            )
+        chapter_ids = list(
+            db.scalars(select(Chapter.id).where(Chapter.book_id.in_(book_ids)))
+        )
+        db.execute(delete(Chapter).where(Chapter.book_id.in_(book_ids)))
+        db.execute(delete(Book).where(Book.id.in_(book_ids)))
+        db.commit()
+        if chapter_ids:
+            # Queued behind any indexing the uploads scheduled
+            SimilarityController.schedule(
+                SimilarityController.remove_chapters, chapter_ids
+            )
+
+    def cleanup(self, session_factory: sessionmaker) -> None:
+        with session_factory() as db:
+            self.delete_books(db, self.book_ids)
+        SimilarityController.wait()
+        for content_hash in self.uploaded_hashes:
+            UploadController.blob_path(content_hash, ".epub").unlink(missing_ok=True)
+
+    def run(self) -> dict[str, Any]:
+        args = self.args
+        if args.db == "sqlite":
+            from benchmarks.sqlite_db import sqlite_sessionmaker
+
+            session_factory = sqlite_sessionmaker()
+        else:
+            from backend.database import SessionLocal
+
+            session_factory = SessionLocal
+
+        with tempfile.TemporaryDirectory(prefix="tsundoku-bench-") as directory:
+            # Uploads index their chapters; keep them out of the app's index
+            SimilarityController.INDEX_DIR = Path(directory) / "similarity"
+            self.generate_library(Path(directory))
+            try:
+                if self.selected("extract"):
+                    self.bench_extract()
+                if self.selected("persist"):
+                    self.bench_persist(session_factory)
+                if args.db == "postgres" and any(
+                    self.selected(name) for name in BENCHMARKS[2:]
+                ):
+                    asyncio.run(self.bench_api(session_factory))
+            finally:
+                self.cleanup(session_factory)
+
+        return {"meta": self.metadata(), "results": self.results}
+
+    def metadata(self) -> dict[str, Any]:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": {
+                key: value
+                for key, value in vars(self.args).items()
+                if key not in ("output", "compare")
+            },
+            "env": {
+                name: os.environ[name] for name in RECORDED_ENV if name in os.environ
+            },
+        }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> None:
+    """Print p50 and throughput changes of benchmarks present in both runs"""
+    print(f"{'benchmark':<10} {'p50 ms':>22} {'throughput/s':>24}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "throughput_per_s"):
+            change = (result[key] - old[key]) / old[key] * 100 if old[key] else 0
+            cells.append(f"{old[key]:>8} -> {result[key]:<8} {change:+5.0f}%")
+        print(f"{name:<10} {cells[0]:>22} {cells[1]:>24}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db", choices=("postgres", "sqlite"), default="postgres")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--books", type=int, default=5)
+    parser.add_argument("--chapters", type=int, default=20, help="per book")
+    parser.add_argument("--chapter-kb", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="per read benchmark")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--summaries", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write JSON here, not stdout")
+    parser.add_argument("--compare", type=Path, help="earlier --output to compare to")
+    args = parser.parse_args()
+    if args.db == "sqlite":
+        args.only = [name for name in args.only if name in SQLITE_BENCHMARKS]
+    random.seed(args.seed)
+
+    report = BenchmarkSuite(args).run()
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
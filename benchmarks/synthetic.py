@@ -0,0 +1,68 @@
+import random
+from pathlib import Path
+
+from ebooklib import epub
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog book chapter reader summary "
+    "library shelf page story night morning river mountain letter window"
+).split()
+
+
+def make_paragraphs(size_kb: int, seed: int) -> list[str]:
+    """Generate roughly ``size_kb`` kilobytes of pseudo-random paragraphs"""
+    rng = random.Random(seed)
+    paragraphs: list[str] = []
+    total = 0
+    while total < size_kb * 1024:
+        sentence_count = rng.randint(3, 8)
+        paragraph = " ".join(
+            " ".join(rng.choices(WORDS, k=rng.randint(6, 16))).capitalize() + "."
+            for _ in range(sentence_count)
+        )
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+    return paragraphs
+
+
+def write_synthetic_epub(
+    path: Path, chapters: int = 20, chapter_kb: int = 16, seed: int = 0
+) -> Path:
+    """
+    Write a synthetic EPUB with a TOC, nav and one HTML item per chapter
+
+    Args:
+        path: Destination file
+        chapters: Number of chapters
+        chapter_kb: Approximate text size of each chapter in kilobytes
+        seed: Random seed, so runs with the same arguments are reproducible
+
+    Returns:
+        The path that was written
+    """
+    book = epub.EpubBook()
+    book.set_identifier(f"synthetic-{chapters}-{chapter_kb}-{seed}")
+    book.set_title(f"Synthetic Book ({chapters} x {chapter_kb}KB)")
+    book.set_language("en")
+
+    items = []
+    for index in range(1, chapters + 1):
+        item = epub.EpubHtml(
+            title=f"Chapter {index}", file_name=f"chapter_{index}.xhtml", lang="en"
+        )
+        body = "\n".join(
+            f"<p>{paragraph}</p>"
+            for paragraph in make_paragraphs(chapter_kb, seed * 100_000 + index)
+        )
+        item.content = f"<h1>Chapter {index}</h1>\n{body}"
+        book.add_item(item)
+        items.append(item)
+
+    book.toc = items
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav", *items]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    epub.write_epub(str(path), book)
+    return path
@@ -34,7 +34,8 @@ export function ChapterList({ bookId, onChapterSelect }: ChapterListProps) {
         const response = await fetch(
           `http://localhost:${
             import.meta.env.VITE_PORT
-          }/books/${bookId}/chapters`
+          }/books/${bookId}/chapters`,
+          { credentials: "include" }
         );
         if (response.ok) {
           const data = await response.json();
@@ -56,7 +57,8 @@ export function ChapterList({ bookId, onChapterSelect }: ChapterListProps) {
       const response = await fetch(
         `http://localhost:${
           import.meta.env.VITE_PORT
-        }/chapters/${chapterId}/content`
+        }/chapters/${chapterId}/content`,
+        { credentials: "include" }
       );
 
       if (response.ok) {
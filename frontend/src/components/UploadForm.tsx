@@ -37,7 +37,7 @@ export function UploadForm({ onUploadSuccess }: UploadFormProps) {
 
     // Handle rejected files
     if (rejectedFiles.length > 0) {
-      setFileError("Only EPUB files are supported currently");
+      setFileError("Only EPUB, PDF, HTML and text files are supported");
       setFile(null);
       return;
     }
@@ -52,8 +52,10 @@ export function UploadForm({ onUploadSuccess }: UploadFormProps) {
   const { getRootProps, getInputProps, isDragActive } = useDropzone({
     onDrop,
     accept: {
-      // "application/pdf": [".pdf"],
       "application/epub+zip": [".epub"],
+      "application/pdf": [".pdf"],
+      "text/html": [".html", ".htm", ".xhtml"],
+      "text/plain": [".txt", ".text"],
     },
     multiple: false,
   });
@@ -74,6 +76,7 @@ export function UploadForm({ onUploadSuccess }: UploadFormProps) {
         {
           method: "POST",
           body: formData,
+          credentials: "include",
         }
       );
 
@@ -116,7 +119,7 @@ export function UploadForm({ onUploadSuccess }: UploadFormProps) {
               : "Click to upload or drag and drop"}
           </Typography>
           <Typography variant="caption" color="text.secondary">
-            PDF or EPUB files only
+            EPUB, PDF, HTML or text files
           </Typography>
         </Box>
 
@@ -40,7 +40,8 @@ export function Reader() {
       const response = await fetch(
         `http://localhost:${
           import.meta.env.VITE_PORT
-        }/chapters/${chapterId}/content`
+        }/chapters/${chapterId}/content`,
+        { credentials: "include" }
       );
 
       if (response.ok) {
@@ -67,7 +68,7 @@ export function Reader() {
         `http://localhost:${import.meta.env.VITE_PORT}/chapters/${
           chapterContent.id
         }/summarize`,
-        { method: "POST" }
+        { method: "POST", credentials: "include" }
       );
 
       if (response.ok) {
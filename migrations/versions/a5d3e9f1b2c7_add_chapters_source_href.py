@@ -0,0 +1,27 @@
+"""add source_href to chapters for lazy ingestion
+
+Revision ID: a5d3e9f1b2c7
+Revises: f2c6b8e0a4d1
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a5d3e9f1b2c7"
+down_revision: str | None = "f2c6b8e0a4d1"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chapters", sa.Column("source_href", sa.String(length=1024), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chapters", "source_href")
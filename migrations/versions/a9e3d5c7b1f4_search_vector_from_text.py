@@ -0,0 +1,84 @@
+"""write chapters.search_vector with the text instead of generating it
+
+Revision ID: a9e3d5c7b1f4
+Revises: c6e1a9d4f2b5
+Create Date: 2026-10-18
+"""
+
+import zlib
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a9e3d5c7b1f4"
+down_revision: str | None = "c6e1a9d4f2b5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+BATCH_SIZE = 200
+
+# Keep in sync with backend.models.book.search_vector
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(substr({text}, 1, 1000000), '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Keeps the values, and the index, of plain text rows
+    op.execute("ALTER TABLE chapters ALTER COLUMN search_vector DROP EXPRESSION")
+
+    # The generated column could not read compressed content, so those rows
+    # only had their titles indexed
+    connection = op.get_bind()
+    update = sa.text(
+        "UPDATE chapters SET search_vector = "
+        + SEARCH_VECTOR_SQL.format(title="title", text=":text")
+        + " WHERE id = :id"
+    )
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, content_compressed FROM chapters "
+                "WHERE content_compressed IS NOT NULL AND id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            update,
+            [
+                {"id": row.id, "text": zlib.decompress(row.content_compressed).decode()}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chapters_search_vector", table_name="chapters")
+    op.drop_column("chapters", "search_vector")
+    op.add_column(
+        "chapters",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                SEARCH_VECTOR_SQL.format(title="title", text="content"), persisted=True
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_chapters_search_vector",
+        "chapters",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
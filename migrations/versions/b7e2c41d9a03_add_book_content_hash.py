@@ -0,0 +1,32 @@
+"""add content hash to books
+
+Revision ID: b7e2c41d9a03
+Revises: xxxx
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c41d9a03"
+down_revision: str | None = "xxxx"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "books", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    # Unique so concurrent uploads of the same file cannot both be ingested
+    op.create_index(
+        op.f("ix_books_content_hash"), "books", ["content_hash"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_books_content_hash"), table_name="books")
+    op.drop_column("books", "content_hash")
@@ -0,0 +1,34 @@
+"""add compressed content column to chapters
+
+Revision ID: b8f4c2d7e6a3
+Revises: a5d3e9f1b2c7
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8f4c2d7e6a3"
+down_revision: str | None = "a5d3e9f1b2c7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chapters", sa.Column("content_compressed", sa.LargeBinary(), nullable=True)
+    )
+    # Already zlib-compressed: store out of line without another pglz attempt
+    op.execute(
+        "ALTER TABLE chapters ALTER COLUMN content_compressed SET STORAGE EXTERNAL"
+    )
+    # Existing rows are converted with `python -m backend.cli.compress_content`
+
+
+def downgrade() -> None:
+    # Run `python -m backend.cli.compress_content --decompress` first, or the
+    # compressed content is lost
+    op.drop_column("chapters", "content_compressed")
@@ -0,0 +1,29 @@
+"""add composite (book_id, order) index on chapters
+
+Revision ID: c3f8a2e61b47
+Revises: b7e2c41d9a03
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3f8a2e61b47"
+down_revision: str | None = "b7e2c41d9a03"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_chapters_book_id_order", "chapters", ["book_id", "order"], unique=False
+    )
+    # The composite index covers lookups by book_id on its own
+    op.drop_index(op.f("ix_chapters_book_id"), table_name="chapters")
+
+
+def downgrade() -> None:
+    op.create_index(op.f("ix_chapters_book_id"), "chapters", ["book_id"], unique=False)
+    op.drop_index("ix_chapters_book_id_order", table_name="chapters")
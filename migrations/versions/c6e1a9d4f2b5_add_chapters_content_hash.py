@@ -0,0 +1,32 @@
+"""add content hash to chapters for incremental re-ingestion
+
+Revision ID: c6e1a9d4f2b5
+Revises: b8f4c2d7e6a3
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c6e1a9d4f2b5"
+down_revision: str | None = "b8f4c2d7e6a3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chapters", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    # Compressed rows stay NULL; re-ingestion hashes them when it needs to
+    op.execute(
+        "UPDATE chapters SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex') "
+        "WHERE content IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chapters", "content_hash")
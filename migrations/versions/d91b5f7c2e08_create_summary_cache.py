@@ -0,0 +1,37 @@
+"""create summary cache table
+
+Revision ID: d91b5f7c2e08
+Revises: c3f8a2e61b47
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d91b5f7c2e08"
+down_revision: str | None = "c3f8a2e61b47"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "summary_cache",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("model", sa.String(length=255), nullable=False),
+        sa.Column("prompt_version", sa.String(length=32), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "content_hash", "model", "prompt_version", name="uq_summary_cache_key"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("summary_cache")
@@ -0,0 +1,55 @@
+"""create summary jobs table
+
+Revision ID: e4a7d03c5f19
+Revises: d91b5f7c2e08
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7d03c5f19"
+down_revision: str | None = "d91b5f7c2e08"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "summary_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("book_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("force", sa.Boolean(), nullable=False),
+        sa.Column("total_chapters", sa.Integer(), nullable=False),
+        sa.Column("completed_chapters", sa.Integer(), nullable=False),
+        sa.Column("failed_chapters", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["book_id"],
+            ["books.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_summary_jobs_book_id"), "summary_jobs", ["book_id"], unique=False
+    )
+    # Workers claim the oldest queued job
+    op.create_index(
+        "ix_summary_jobs_queued",
+        "summary_jobs",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_summary_jobs_queued", table_name="summary_jobs")
+    op.drop_index(op.f("ix_summary_jobs_book_id"), table_name="summary_jobs")
+    op.drop_table("summary_jobs")
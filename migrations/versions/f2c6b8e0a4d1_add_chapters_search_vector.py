@@ -0,0 +1,49 @@
+"""add full-text search vector to chapters
+
+Revision ID: f2c6b8e0a4d1
+Revises: e4a7d03c5f19
+Create Date: 2026-10-18
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "f2c6b8e0a4d1"
+down_revision: str | None = "e4a7d03c5f19"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Keep in sync with Chapter.search_vector
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', left(coalesce(content, ''), 1000000)), 'B')"
+)
+
+
+def upgrade() -> None:
+    # Adding a stored generated column rewrites the chapters table
+    op.add_column(
+        "chapters",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_chapters_search_vector",
+        "chapters",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chapters_search_vector", table_name="chapters")
+    op.drop_column("chapters", "search_vector")
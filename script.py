@@ -1,8 +1,9 @@
 from pathlib import Path
 
-from bs4 import BeautifulSoup
 from ebooklib import epub
 
+from backend.core.html_text import extract_title_and_text
+
 
 def read_epub(file_path: str | Path) -> dict[str, str]:
     """
@@ -18,26 +19,12 @@ def read_epub(file_path: str | Path) -> dict[str, str]:
     book = epub.read_epub(str(file_path), {"ignore_ncx": True})
     chapters: dict[str, str] = {}
 
-    # Process each item in the book
+    # Process each item in the book, keeping the heading in the content
     for item in book.get_items():
         if isinstance(item, epub.EpubHtml):
-            # Parse HTML content
-            soup = BeautifulSoup(item.get_body_content(), "html.parser")
-
-            # Extract title from headings
-            title = None
-            for heading in soup.find_all(["h1", "h2", "h3"]):
-                if heading.text.strip():
-                    title = heading.text.strip()
-                    break
-
-            # If no heading found, use item ID as title
-            if not title:
-                title = item.id
-
-            # Extract and clean content
-            content = soup.get_text().strip()
-
+            title, content = extract_title_and_text(
+                item.get_body_content(), item.id, keep_title=True
+            )
             chapters[title] = content
 
     return chapters